@@ -0,0 +1,95 @@
+"""Measures the cost of building a `Context` from interaction data.
+
+Usage (from the repository root): python -m benchmarks.context [--requests 2000] [--resolved 25]
+
+Builds the Context of a command interaction carrying `--resolved` users, members,
+channels, roles and messages (as a command with many options, or a select menu
+on a large guild would), and reports the time per interaction for:
+- lazy: `Context.from_data` alone, the models are parsed on first access
+- author: `from_data`, then reading `ctx.author`, which is all most commands use
+- eager: `from_data`, then reading every parsed attribute, as before they were lazy
+"""
+import argparse
+import copy
+import statistics
+import time
+
+from deta_discord_interactions import Context
+
+
+def interaction(resolved_count: int) -> dict:
+    def user(i):
+        return {"id": str(i), "username": f"user{i}", "discriminator": "0", "avatar": None, "public_flags": 0}
+
+    def message(i):
+        return {
+            "id": str(i),
+            "channel_id": "1",
+            "content": "x" * 200,
+            "author": user(i),
+            "embeds": [],
+            "attachments": [],
+            "timestamp": "2022-01-01T00:00:00+00:00",
+        }
+
+    ids = range(1, resolved_count + 1)
+    return {
+        "type": 2,
+        "id": "1",
+        "token": "token",
+        "channel_id": "1",
+        "guild_id": "1",
+        "member": {"user": user(0), "roles": ["1"], "nick": None, "permissions": "0"},
+        "message": message(0),
+        "data": {
+            "id": "1",
+            "name": "command",
+            "type": 1,
+            "options": [{"type": 6, "name": f"user{i}", "value": str(i)} for i in ids],
+            "resolved": {
+                "users": {str(i): user(i) for i in ids},
+                "members": {str(i): {"roles": [], "nick": f"member{i}", "permissions": "0"} for i in ids},
+                "channels": {str(i): {"id": str(i), "name": f"channel{i}", "type": 0, "permissions": "0"} for i in ids},
+                "roles": {str(i): {"id": str(i), "name": f"role{i}", "color": 0, "permissions": "0"} for i in ids},
+                "messages": {str(i): message(i) for i in ids},
+            },
+        },
+    }
+
+
+def read_author(context: Context):
+    context.author
+
+
+def read_everything(context: Context):
+    for name in ("author", "message", "components", "members", "users", "channels", "roles", "messages", "attachments", "target_user"):
+        getattr(context, name)
+
+
+def measure(data: dict, requests: int, access) -> float:
+    "Returns the median time (µs) per interaction"
+    # Copied beforehand, as Discord would send a new body each time
+    payloads = [copy.deepcopy(data) for _ in range(requests)]
+    times = []
+    for payload in payloads:
+        start = time.perf_counter()
+        context = Context.from_data(data=payload)
+        access(context)
+        times.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--resolved", type=int, default=25, help="How many objects of each kind are resolved")
+    args = parser.parse_args()
+
+    data = interaction(args.resolved)
+    print(f"{'access':<10}{'µs/interaction':>16}")
+    for name, access in (("lazy", lambda context: None), ("author", read_author), ("eager", read_everything)):
+        print(f"{name:<10}{measure(data, args.requests, access):>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
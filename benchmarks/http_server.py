@@ -0,0 +1,180 @@
+"""Compares the default `run_server` with its production mode.
+
+Usage (from the repository root): python -m benchmarks.http_server [--clients 16] [--requests 200] [--slow-ratio 0.1] [--slow-ms 50] [--cpu-ms 0] [--workers 0]
+
+Each client sends interactions over HTTP, a fraction of which run a command that
+sleeps for `--slow-ms` (simulating a Database fetch or a followup request)
+and then keeps the CPU busy for `--cpu-ms` (simulating rendering a response).
+With `--workers N`, also measures the production mode forked into N processes.
+Reports the throughput, failed requests and latency percentiles of the successful
+requests for each server mode.
+"""
+import argparse
+import http.client
+import json
+import os
+import multiprocessing
+import random
+import socket
+import statistics
+import threading
+import time
+
+os.environ.setdefault("DISCORD_CLIENT_ID", "123")
+os.environ.setdefault("DISCORD_PUBLIC_KEY", "123")
+os.environ.setdefault("DISCORD_CLIENT_SECRET", "123")
+os.environ.setdefault("DONT_REGISTER_WITH_DISCORD", "True")
+os.environ.setdefault("DONT_VALIDATE_SIGNATURE", "True")
+
+from deta_discord_interactions import DiscordInteractions  # noqa: E402
+from deta_discord_interactions.http import get_server, run_server  # noqa: E402
+
+
+def build_app(slow_ms: int, cpu_ms: int = 0) -> DiscordInteractions:
+    app = DiscordInteractions()
+
+    @app.command()
+    def ping(ctx):
+        return "Pong!"
+
+    @app.command()
+    def slow(ctx):
+        time.sleep(slow_ms / 1000)
+        deadline = time.perf_counter() + cpu_ms / 1000
+        while time.perf_counter() < deadline:
+            pass
+        return "Done!"
+
+    return app
+
+
+def interaction(name: str) -> bytes:
+    return json.dumps({
+        "type": 2,
+        "id": "1",
+        "token": "",
+        "data": {"id": "1", "name": name},
+        "member": {"id": "1", "nick": "", "user": {"id": "1", "username": "benchmark"}},
+    }).encode()
+
+
+def run_client(port: int, requests: int, slow_ratio: float, keep_alive: bool, latencies: list, errors: list, seed: int):
+    rng = random.Random(seed)
+    connection = None
+    for _ in range(requests):
+        body = interaction("slow" if rng.random() < slow_ratio else "ping")
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            connection.request("POST", "/discord", body=body, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                raise ValueError(response.status)
+        except (OSError, http.client.HTTPException, ValueError) as err:
+            errors.append(err)
+            response = None
+        else:
+            latencies.append(time.perf_counter() - start)
+        if not keep_alive or response is None or response.will_close:
+            connection.close()
+            connection = None
+    if connection is not None:
+        connection.close()
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def serve_workers(port: int, slow_ms: int, cpu_ms: int, server_options: dict):
+    run_server(build_app(slow_ms, cpu_ms), port, **server_options)
+
+
+def wait_for_port(port: int, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def benchmark(name: str, port: int, args, **server_options) -> dict:
+    if server_options.get("workers", 1) > 1:
+        process = multiprocessing.get_context("fork").Process(
+            target=serve_workers,
+            args=(port, args.slow_ms, args.cpu_ms, server_options),
+        )
+        process.start()
+        wait_for_port(port)
+        server = None
+    else:
+        server = get_server(build_app(args.slow_ms, args.cpu_ms), port, **server_options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    latencies: list[float] = []
+    errors: list[Exception] = []
+    keep_alive = server_options.get("production", False)
+    clients = [
+        threading.Thread(target=run_client, args=(port, args.requests, args.slow_ratio, keep_alive, latencies, errors, seed))
+        for seed in range(args.clients)
+    ]
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+    else:
+        process.terminate()
+        process.join()
+    return {
+        "server": name,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "req/s": len(latencies) / elapsed,
+        "p50 ms": statistics.median(latencies) * 1000,
+        "p99 ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client")
+    parser.add_argument("--slow-ratio", type=float, default=0.1)
+    parser.add_argument("--slow-ms", type=int, default=50)
+    parser.add_argument("--cpu-ms", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=0, help="Processes for the multi-process run, 0 to skip it")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    results = [
+        benchmark("default", args.port, args),
+        benchmark("production", args.port + 1, args, production=True, max_workers=32, keep_alive_timeout=2),
+    ]
+    if args.workers > 1:
+        results.append(benchmark(
+            f"{args.workers} workers", args.port + 2, args,
+            production=True, max_workers=32, keep_alive_timeout=2, workers=args.workers,
+        ))
+    print(f"{'server':<12}{'requests':>10}{'errors':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for result in results:
+        print(
+            f"{result['server']:<12}{result['requests']:>10}{result['errors']:>10}{result['req/s']:>10.1f}"
+            f"{result['p50 ms']:>10.2f}{result['p99 ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
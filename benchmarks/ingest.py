@@ -0,0 +1,105 @@
+"""Measures the cost of ingesting a request through the WSGI app.
+
+Usage (from the repository root): python -m benchmarks.ingest [--requests 2000] [--body-kb 4]
+
+Sends signed PING and command interactions straight to `DiscordInteractions.__call__`
+(no sockets involved), and reports for each of them the time per request, and the
+peak memory traced by `tracemalloc` while handling a single request, which grows
+with every copy of the body made along the way.
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+os.environ.setdefault("DISCORD_CLIENT_ID", "123")
+os.environ.setdefault("DISCORD_PUBLIC_KEY", "123")
+os.environ.setdefault("DISCORD_CLIENT_SECRET", "123")
+os.environ.setdefault("DONT_REGISTER_WITH_DISCORD", "True")
+
+from nacl.signing import SigningKey  # noqa: E402
+
+from deta_discord_interactions import DiscordInteractions  # noqa: E402
+
+
+def build_app(signing_key: SigningKey) -> DiscordInteractions:
+    app = DiscordInteractions()
+    app.discord_public_key = signing_key.verify_key.encode().hex()
+    app.DONT_VALIDATE_SIGNATURE = False
+
+    @app.command()
+    def echo(ctx, text: str):
+        return text[:10]
+
+    return app
+
+
+def interactions(body_kb: int) -> dict[str, bytes]:
+    member = {"id": "1", "nick": "", "user": {"id": "1", "username": "benchmark"}}
+    return {
+        "ping": json.dumps({"type": 1, "id": "1", "token": "", "padding": "x" * body_kb * 1024}).encode(),
+        "command": json.dumps({
+            "type": 2,
+            "id": "1",
+            "token": "",
+            "data": {"id": "1", "name": "echo", "options": [{"type": 3, "name": "text", "value": "x" * body_kb * 1024}]},
+            "member": member,
+        }).encode(),
+    }
+
+
+def environ(signing_key: SigningKey, body: bytes) -> dict:
+    timestamp = "1700000000"
+    return {
+        "wsgi.input": io.BytesIO(body),
+        "CONTENT_LENGTH": str(len(body)),
+        "REQUEST_METHOD": "POST",
+        "PATH_INFO": "/discord",
+        "QUERY_STRING": "",
+        "HTTP_X_SIGNATURE_ED25519": signing_key.sign(timestamp.encode() + body).signature.hex(),
+        "HTTP_X_SIGNATURE_TIMESTAMP": timestamp,
+    }
+
+
+def measure(app: DiscordInteractions, environs: list[dict]) -> tuple[float, float]:
+    "Returns the median time (µs) and median peak memory (KiB) per request"
+    def start_response(status, headers):
+        assert status == "200 OK", status
+
+    times = []
+    for env in environs[: len(environs) // 2]:
+        start = time.perf_counter()
+        app(env, start_response)
+        times.append((time.perf_counter() - start) * 1e6)
+
+    peaks = []
+    tracemalloc.start()
+    for env in environs[len(environs) // 2:]:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        app(env, start_response)
+        peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+    tracemalloc.stop()
+    return statistics.median(times), statistics.median(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--body-kb", type=int, default=4, help="Size of the padding added to each body")
+    args = parser.parse_args()
+
+    signing_key = SigningKey.generate()
+    app = build_app(signing_key)
+    print(f"{'interaction':<14}{'body KiB':>10}{'µs/req':>10}{'peak KiB':>10}")
+    for name, body in interactions(args.body_kb).items():
+        environs = [environ(signing_key, body) for _ in range(args.requests)]
+        micros, peak = measure(app, environs)
+        print(f"{name:<14}{len(body) / 1024:>10.1f}{micros:>10.1f}{peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Compares the JSON codecs available in `deta_discord_interactions.codec`.
+
+Usage (from the repository root): python -m benchmarks.json_codecs [--requests 5000]
+
+For each installed codec, measures:
+- decode: parsing a realistic APPLICATION_COMMAND interaction
+- encode: encoding a Message response with an embed and components
+- end to end: the interaction going through `DiscordInteractions.__call__`,
+  from the raw body to the encoded response
+"""
+import argparse
+import io
+import json
+import os
+import time
+
+os.environ.setdefault("DISCORD_CLIENT_ID", "123")
+os.environ.setdefault("DISCORD_PUBLIC_KEY", "123")
+os.environ.setdefault("DISCORD_CLIENT_SECRET", "123")
+os.environ.setdefault("DONT_REGISTER_WITH_DISCORD", "True")
+os.environ.setdefault("DONT_VALIDATE_SIGNATURE", "True")
+
+from deta_discord_interactions import (  # noqa: E402
+    ActionRow,
+    Button,
+    DiscordInteractions,
+    Embed,
+    Message,
+    codec,
+)
+from deta_discord_interactions.models.embed import Field  # noqa: E402
+
+
+def build_message() -> Message:
+    return Message(
+        "Here are your results",
+        embed=Embed(
+            title="Results",
+            description="Lorem ipsum dolor sit amet " * 10,
+            fields=[Field(name=f"Field {i}", value=f"Value {i} ✓", inline=True) for i in range(10)],
+        ),
+        components=[
+            ActionRow([Button(custom_id=f"page|{i}", label=f"Page {i}") for i in range(5)]),
+        ],
+    )
+
+
+def build_app() -> DiscordInteractions:
+    app = DiscordInteractions()
+
+    @app.command()
+    def search(ctx, query: str, limit: int = 10):
+        return build_message()
+
+    return app
+
+
+def build_body() -> bytes:
+    member = {
+        "user": {"id": "123456789012345678", "username": "benchmark", "discriminator": "0", "avatar": None},
+        "roles": [str(10**17 + i) for i in range(10)],
+        "nick": None,
+        "permissions": "2147483647",
+        "joined_at": "2023-01-01T00:00:00.000000+00:00",
+    }
+    return json.dumps({
+        "type": 2,
+        "id": "123456789012345678",
+        "application_id": "123456789012345678",
+        "token": "x" * 200,
+        "guild_id": "123456789012345678",
+        "channel_id": "123456789012345678",
+        "locale": "en-US",
+        "member": member,
+        "data": {
+            "id": "123456789012345678",
+            "name": "search",
+            "type": 1,
+            "options": [
+                {"type": 3, "name": "query", "value": "some query"},
+                {"type": 4, "name": "limit", "value": 5},
+            ],
+        },
+    }).encode()
+
+
+def timed(function, repeat: int) -> float:
+    "Returns the mean time per call in microseconds"
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    app = build_app()
+    body = build_body()
+    message = build_message()
+
+    def end_to_end():
+        environ = {
+            "wsgi.input": io.BytesIO(body),
+            "CONTENT_LENGTH": str(len(body)),
+            "REQUEST_METHOD": "POST",
+            "PATH_INFO": "/discord",
+            "QUERY_STRING": "",
+        }
+        app(environ, lambda status, headers: None)
+
+    print(f"{'codec':<10}{'decode µs':>12}{'encode µs':>12}{'end to end µs':>16}")
+    for name in codec.CODECS:
+        try:
+            codec.set_codec(name)
+        except ImportError:
+            print(f"{name:<10}{'not installed':>40}")
+            continue
+        decode = timed(lambda: codec.loads(body), args.requests)
+        encode = timed(message.encode, args.requests)
+        total = timed(end_to_end, args.requests)
+        print(f"{name:<10}{decode:>12.2f}{encode:>12.2f}{total:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
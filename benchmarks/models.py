@@ -0,0 +1,58 @@
+"""Measures the memory used by the models, as held in a cache by a bot.
+
+Usage (from the repository root): python -m benchmarks.models [--objects 10000]
+
+Builds `--objects` instances of each model from realistic Discord payloads,
+keeps them all alive (like a cache of the members of a large guild would),
+and reports the memory traced by `tracemalloc` per instance, along with the
+time `from_dict` took per instance. Whether the model uses `__slots__`
+depends on the Python version, see `slotted_dataclass`.
+"""
+import argparse
+import time
+import tracemalloc
+
+from deta_discord_interactions import Channel, Embed, Member, Role, User
+
+
+def user(i: int) -> dict:
+    return {"id": str(10**17 + i), "username": f"user{i}", "discriminator": "0", "avatar": "a" * 32, "public_flags": 0}
+
+
+PAYLOADS = {
+    User: user,
+    Member: lambda i: {"user": user(i), "nick": f"member{i}", "roles": [], "permissions": "0", "joined_at": None},
+    Role: lambda i: {"id": str(10**17 + i), "name": f"role{i}", "color": 0, "hoist": False, "position": i, "managed": False},
+    Channel: lambda i: {"id": str(10**17 + i), "name": f"channel{i}", "type": 0, "permissions": "0"},
+    Embed: lambda i: {"title": f"embed{i}", "description": "x" * 50, "color": 0},
+}
+
+
+def measure(model, count: int) -> tuple[float, float]:
+    "Returns the memory (bytes) and the time (µs) per instance"
+    payloads = [PAYLOADS[model](i) for i in range(count)]
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    cache = [model.from_dict(payload) for payload in payloads]
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del cache
+    return size / count, elapsed / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'model':<10}{'slots':>7}{'bytes/obj':>12}{'µs/obj':>10}")
+    for model in PAYLOADS:
+        size, micros = measure(model, args.objects)
+        slotted = "__slots__" in vars(model)
+        print(f"{model.__name__:<10}{str(slotted):>7}{size:>12.0f}{micros:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
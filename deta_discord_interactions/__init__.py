@@ -1,50 +1,133 @@
-from deta_discord_interactions.command import (
-    Command,
-    SlashCommandSubgroup,
-    SlashCommandGroup,
-)
-
-from deta_discord_interactions.context import Context
-
-from deta_discord_interactions.models import (
-    ApplicationCommandType,
-    CommandOptionType,
-    ChannelType,
-    Permission,
-    Member,
-    User,
-    Role,
-    Channel,
-    Attachment,
-    Message,
-    ResponseType,
-    Component,
-    ActionRow,
-    Button,
-    ButtonStyles,
-    TextInput,
-    TextStyles,
-    Modal,
-    ComponentType,
-    SelectMenu,
-    SelectMenuOption,
-    Autocomplete,
-    AutocompleteResult,
-    Option,
-    Choice,
-    MessageInteraction,
-)
-
-from deta_discord_interactions.discord import (
-    InteractionType,
-    DiscordInteractions,
-    DiscordInteractionsBlueprint,
-)
-
-import deta_discord_interactions.models.embed as embed
-from deta_discord_interactions.models import Embed
-
-from deta_discord_interactions.client import Client
+# The public names are imported on first access (PEP 562), so that
+# `import deta_discord_interactions` stays cheap on cold starts and
+# only the parts of the library that are actually used get imported.
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from deta_discord_interactions.command import (
+        Command,
+        SlashCommandSubgroup,
+        SlashCommandGroup,
+    )
+
+    from deta_discord_interactions.context import Context
+
+    from deta_discord_interactions.models import (
+        ApplicationCommandType,
+        CommandOptionType,
+        ChannelType,
+        Permission,
+        Member,
+        User,
+        Role,
+        Channel,
+        Attachment,
+        Message,
+        ResponseType,
+        Component,
+        ActionRow,
+        Button,
+        ButtonStyles,
+        TextInput,
+        TextStyles,
+        Modal,
+        ComponentType,
+        SelectMenu,
+        SelectMenuOption,
+        Autocomplete,
+        AutocompleteResult,
+        Option,
+        Choice,
+        MessageInteraction,
+    )
+
+    from deta_discord_interactions.discord import (
+        InteractionType,
+        DiscordInteractions,
+        DiscordInteractionsBlueprint,
+    )
+
+    import deta_discord_interactions.models.embed as embed
+    from deta_discord_interactions.models import Embed
+
+    from deta_discord_interactions.client import Client
+
+    from deta_discord_interactions.asgi import ASGIApp
+
+    from deta_discord_interactions.background import BackgroundExecutor, BackgroundQueueFull
+
+    from deta_discord_interactions.binding import Snowflake, HandlerStateError
+
+    from deta_discord_interactions.state import StateCodec
+
+    import deta_discord_interactions.timing as timing
+
+
+_LAZY_ATTRIBUTES = {
+    "Command": "deta_discord_interactions.command",
+    "SlashCommandSubgroup": "deta_discord_interactions.command",
+    "SlashCommandGroup": "deta_discord_interactions.command",
+    "Context": "deta_discord_interactions.context",
+    "ApplicationCommandType": "deta_discord_interactions.models",
+    "CommandOptionType": "deta_discord_interactions.models",
+    "ChannelType": "deta_discord_interactions.models",
+    "Permission": "deta_discord_interactions.models",
+    "Member": "deta_discord_interactions.models",
+    "User": "deta_discord_interactions.models",
+    "Role": "deta_discord_interactions.models",
+    "Channel": "deta_discord_interactions.models",
+    "Attachment": "deta_discord_interactions.models",
+    "Message": "deta_discord_interactions.models",
+    "ResponseType": "deta_discord_interactions.models",
+    "Component": "deta_discord_interactions.models",
+    "ActionRow": "deta_discord_interactions.models",
+    "Button": "deta_discord_interactions.models",
+    "ButtonStyles": "deta_discord_interactions.models",
+    "TextInput": "deta_discord_interactions.models",
+    "TextStyles": "deta_discord_interactions.models",
+    "Modal": "deta_discord_interactions.models",
+    "ComponentType": "deta_discord_interactions.models",
+    "SelectMenu": "deta_discord_interactions.models",
+    "SelectMenuOption": "deta_discord_interactions.models",
+    "Autocomplete": "deta_discord_interactions.models",
+    "AutocompleteResult": "deta_discord_interactions.models",
+    "Option": "deta_discord_interactions.models",
+    "Choice": "deta_discord_interactions.models",
+    "MessageInteraction": "deta_discord_interactions.models",
+    "InteractionType": "deta_discord_interactions.discord",
+    "DiscordInteractions": "deta_discord_interactions.discord",
+    "DiscordInteractionsBlueprint": "deta_discord_interactions.discord",
+    "Embed": "deta_discord_interactions.models",
+    "Client": "deta_discord_interactions.client",
+    "ASGIApp": "deta_discord_interactions.asgi",
+    "BackgroundExecutor": "deta_discord_interactions.background",
+    "BackgroundQueueFull": "deta_discord_interactions.background",
+    "Snowflake": "deta_discord_interactions.binding",
+    "HandlerStateError": "deta_discord_interactions.binding",
+    "StateCodec": "deta_discord_interactions.state",
+}
+
+_LAZY_MODULES = {
+    "embed": "deta_discord_interactions.models.embed",
+    "timing": "deta_discord_interactions.timing",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    elif name in _LAZY_MODULES:
+        value = importlib.import_module(_LAZY_MODULES[name])
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Cache it, so that the next lookups do not go through this function
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
 
 __all__ = [
@@ -78,6 +161,13 @@ __all__ = [
     "SelectMenu",
     "SelectMenuOption",
     "Client",
+    "ASGIApp",
+    "BackgroundExecutor",
+    "BackgroundQueueFull",
+    "Snowflake",
+    "HandlerStateError",
+    "StateCodec",
+    "timing",
     "Permission",
     "Autocomplete",
     "AutocompleteResult",
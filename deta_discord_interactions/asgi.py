@@ -0,0 +1,243 @@
+"""ASGI adapter for :class:`DiscordInteractions`.
+
+Awaits ``async def`` commands, autocomplete handlers, custom ID handlers and
+Deta Actions directly in the event loop, and offloads synchronous ones to a
+bounded thread pool so that slow handlers do not block other interactions.
+
+Example usage:
+    app = DiscordInteractions()
+    asgi_app = ASGIApp(app, max_workers=8)
+    # uvicorn main:asgi_app
+"""
+import asyncio
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Optional
+
+from deta_discord_interactions import timing
+from deta_discord_interactions.background import BackgroundQueueFull
+from deta_discord_interactions.concurrency import call_async
+from deta_discord_interactions.context import Context
+from deta_discord_interactions.discord import DiscordInteractions, InteractionType, Invocation, PongResponse, response_sent_event
+from deta_discord_interactions.models import Message
+
+
+class ASGIApp:
+    """
+    Serves a :class:`DiscordInteractions` instance as an ASGI application.
+
+    Attributes
+    ----------
+    discord: DiscordInteractions
+        The app to serve.
+    max_workers: int, optional
+        Maximum amount of threads used to run synchronous handlers and custom routes.
+        If omitted, uses the :class:`ThreadPoolExecutor` default.
+    """
+
+    def __init__(self, discord: DiscordInteractions, *, max_workers: Optional[int] = None):
+        self.discord = discord
+        self.max_workers = max_workers
+        self._executor = None
+        # Keeps references to deferred handlers until their result is delivered
+        self._deferred_tasks: set[asyncio.Task] = set()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        "The thread pool synchronous handlers are offloaded to"
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="discord-interactions",
+            )
+        return self._executor
+
+    def shutdown(self, wait: bool = True):
+        """
+        Shuts down the thread pool and the app's background executor,
+        waiting for running handlers and background tasks to finish if ``wait`` is True
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        self.discord.shutdown(wait=wait)
+
+    async def __call__(self, scope: dict, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        body = await self.read_body(receive)
+        with self.discord.track_response() as sent:
+            status, headers, content = await self.handle_request(self.build_environ(scope, body))
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+            })
+            await send({
+                "type": "http.response.body",
+                "body": b"".join(content),
+            })
+        finally:
+            sent.set()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.discord.aclose()
+                self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def read_body(self, receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    def build_environ(self, scope: dict, body: bytes) -> dict:
+        "Converts an ASGI HTTP scope into the WSGI environ the rest of the library expects"
+        environ = {
+            "wsgi.input": BytesIO(body),
+            "REQUEST_METHOD": scope.get("method", "GET"),
+            "PATH_INFO": scope.get("path", "/"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "CONTENT_LENGTH": str(len(body)),
+            "REMOTE_ADDR": (scope.get("client") or ("127.0.0.1", 0))[0],
+        }
+        for name, value in scope.get("headers", []):
+            environ[f"HTTP_{name.decode('latin-1')}".upper().replace("-", "_")] = value.decode("latin-1")
+        return environ
+
+    async def handle_request(self, environ: dict) -> tuple[str, list[tuple[str, str]], list[bytes]]:
+        """
+        Handles a request, returning the status, headers and body of the response.
+        """
+        response = {}
+
+        def start_response(status, headers):
+            response["status"] = status
+            response["headers"] = headers
+
+        with self.discord.observe_request(environ, start_response) as start_response:
+            try:
+                data = self.discord.parse_request(environ)
+                handler = self.discord.resolve_route(data)
+                if handler == self.discord.handle_discord_route:
+                    result = await self.handle_interaction(data)
+                    with timing.phase("encode"):
+                        content, mimetype = result.encode()
+                    start_response("200 OK", [("Content-Type", mimetype)])
+                    content = [content]
+                elif handler == self.discord.handle_action_route:
+                    result = await self.run_deta_action(self.discord.get_action_event(data))
+                    content = self.discord.action_response(result, start_response)
+                else:
+                    content = await call_async(
+                        self.executor,
+                        functools.partial(handler, data, start_response, self.discord.abort),
+                        is_async=inspect.iscoroutinefunction(handler),
+                    )
+            except Exception as err:
+                content = self.discord.error_response(err, start_response)
+        return response["status"], response["headers"], list(content)
+
+    async def handle_interaction(self, data: dict):
+        """
+        Verify the signature in the incoming request and return the
+        result from the corresponding handler.
+
+        Returns
+        -------
+        Message | Modal | AutocompleteResult
+            The response from the corresponding handler.
+        """
+        self.discord.verify_signature(data)
+        timing.set_interaction(data["json"])
+
+        interaction_type = data["json"].get("type")
+        if interaction_type == InteractionType.PING:
+            return PongResponse()
+
+        # Only the executor threads are sampled, the event loop runs other requests too
+        with self.discord.profile_interaction(data["json"], attach_thread=False):
+            return await self.run_invocation(self.discord.prepare_interaction(data["json"]))
+
+    async def run_invocation(self, invocation: Invocation):
+        """
+        Async counterpart of :meth:`DiscordInteractions.run_invocation`,
+        awaiting ``async def`` functions and offloading the others to :attr:`executor`.
+        """
+        async def run():
+            with timing.phase("handler"):
+                result = await call_async(self.executor, invocation.call, is_async=invocation.is_async)
+            return invocation.convert(result)
+
+        return await self.run_deferrable(
+            invocation.context,
+            run(),
+            invocation.defer_after,
+            update=invocation.update,
+        )
+
+    async def run_command(self, data: dict):
+        "Async counterpart of :meth:`DiscordInteractions.run_command`"
+        return await self.run_invocation(self.discord.prepare_command(data))
+
+    async def run_handler(self, data: dict, *, allow_modal: bool = True):
+        "Async counterpart of :meth:`DiscordInteractions.run_handler`"
+        return await self.run_invocation(self.discord.prepare_handler(data, allow_modal=allow_modal))
+
+    async def run_autocomplete(self, data: dict):
+        "Async counterpart of :meth:`DiscordInteractions.run_autocomplete`"
+        return await self.run_invocation(self.discord.prepare_autocomplete(data))
+
+    async def run_deferrable(self, context: Context, coroutine, defer_after: Optional[float], *, update: bool = False):
+        "Async counterpart of :meth:`DiscordInteractions.run_deferrable`"
+        if defer_after is None:
+            return await coroutine
+        task = asyncio.ensure_future(coroutine)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), defer_after)
+        except asyncio.TimeoutError:
+            self._deferred_tasks.add(task)
+            task.add_done_callback(functools.partial(self._deliver_deferred, context, response_sent_event.get()))
+            return Message(deferred=True, update=update)
+
+    def _deliver_deferred(self, context: Context, response_sent: Optional[threading.Event], task: asyncio.Task):
+        self._deferred_tasks.discard(task)
+        if task.cancelled():
+            return
+
+        def deliver():
+            self.discord.deliver_deferred(context, task.result(), response_sent=response_sent)
+
+        # Editing the message is a blocking request
+        try:
+            self.discord.background_executor.submit(deliver)
+        except BackgroundQueueFull as err:
+            self.discord.background_executor.report_failure(err, deliver)
+
+    async def run_deta_action(self, event: dict[str, str]):
+        "Async counterpart of :meth:`DiscordInteractions.run_deta_action`"
+        action = self.discord.get_action(event)
+        return await call_async(
+            self.executor,
+            functools.partial(action, event),
+            is_async=inspect.iscoroutinefunction(action),
+        )
+
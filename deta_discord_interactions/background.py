@@ -0,0 +1,200 @@
+"""Bounded thread pool for work that continues after the interaction has been answered.
+
+Example usage:
+    @app.command()
+    def report(ctx):
+        def build_report(ctx):
+            ctx.edit(generate_report())
+        ctx.run_in_background(build_report)
+        return Message(deferred=True)
+"""
+import os
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Optional
+
+
+class BackgroundQueueFull(Exception):
+    "Raised when submitting a task while the executor already has as many tasks as it accepts"
+
+
+class BackgroundExecutor:
+    """
+    Runs tasks in a thread pool, accepting at most ``max_workers + max_queued``
+    unfinished tasks at a time.
+
+    Attributes
+    ----------
+    max_workers: int, optional
+        How many tasks run at the same time.
+        If omitted, uses the same default as :class:`ThreadPoolExecutor`.
+    max_queued: int
+        How many more tasks may wait for a free thread before
+        :meth:`submit` starts raising :class:`BackgroundQueueFull`.
+    failure_callbacks: list[Callable[[Exception, Callable], None]]
+        Called with the exception and the function whenever a task fails.
+        If empty, failures are printed to stderr.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queued: int = 100):
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.failure_callbacks: list[Callable[[Exception, Callable], None]] = []
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="discord-interactions-background")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.submitted_count = 0
+        self.completed_count = 0
+        self.failed_count = 0
+        self.rejected_count = 0
+
+    @property
+    def capacity(self) -> int:
+        "How many unfinished tasks are accepted at once"
+        return self.max_workers + self.max_queued
+
+    def submit(self, function: Callable, *args, **kwargs) -> Future:
+        """
+        Schedules ``function(*args, **kwargs)`` to run in a worker thread.
+
+        Raises
+        ------
+        BackgroundQueueFull
+            If there are already too many unfinished tasks.
+        """
+        with self._lock:
+            if self._pending >= self.capacity:
+                self.rejected_count += 1
+                raise BackgroundQueueFull(f"There are already {self._pending} background tasks pending")
+            self._pending += 1
+            self.submitted_count += 1
+        try:
+            future = self._executor.submit(self._run, function, args, kwargs)
+        except BaseException:
+            self._task_done(None)
+            raise
+        # Also called for tasks cancelled before they started
+        future.add_done_callback(self._task_done)
+        return future
+
+    def run_with_deadline(self, function: Callable[[], Any], timeout: float, on_late: Callable[[Any], None]) -> tuple[bool, Any]:
+        """
+        Runs ``function()`` in a worker thread and waits up to ``timeout`` seconds for it.
+
+        If it finishes in time, returns ``(True, result)``, or raises its exception.
+        Otherwise, returns ``(False, None)`` right away, and once it finishes,
+        ``on_late(result)`` is called from the worker thread.
+        Exceptions raised after the deadline are reported as failed tasks.
+
+        Raises
+        ------
+        BackgroundQueueFull
+            If there are already too many unfinished tasks.
+        """
+        lock = threading.Lock()
+        state = {"finished": False, "late": False}
+
+        def task():
+            try:
+                outcome = (True, function())
+            except Exception as err:
+                outcome = (False, err)
+            with lock:
+                state["finished"] = True
+                late = state["late"]
+            if not late:
+                return outcome
+            success, value = outcome
+            if not success:
+                raise value
+            on_late(value)
+
+        future = self.submit(task)
+        try:
+            success, value = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            with lock:
+                if not state["finished"]:
+                    state["late"] = True
+                    return False, None
+            success, value = future.result()
+        if not success:
+            raise value
+        return True, value
+
+    def _task_done(self, future: Optional[Future]):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, function: Callable, args: tuple, kwargs: dict):
+        with self._lock:
+            self._running += 1
+        try:
+            result = function(*args, **kwargs)
+        except Exception as err:
+            with self._lock:
+                self.failed_count += 1
+            self.report_failure(err, function)
+            raise
+        else:
+            with self._lock:
+                self.completed_count += 1
+            return result
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def report_failure(self, err: Exception, function: Callable):
+        "Calls the `failure_callbacks`, or prints the exception if there are none"
+        if not self.failure_callbacks:
+            traceback.print_exception(type(err), err, err.__traceback__)
+            print(f"Background task {getattr(function, '__name__', function)!r} failed: {err}", flush=True)
+        for callback in self.failure_callbacks:
+            try:
+                callback(err, function)
+            except Exception:
+                traceback.print_exc()
+
+    @property
+    def queue_depth(self) -> int:
+        "How many tasks are waiting for a free thread"
+        with self._lock:
+            return self._pending - self._running
+
+    def stats(self) -> dict:
+        """
+        Returns counters describing the executor.
+
+        Returns
+        -------
+        dict
+            ``running``, ``queued``, ``submitted``, ``completed``, ``failed`` and ``rejected``.
+        """
+        with self._lock:
+            return {
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "submitted": self.submitted_count,
+                "completed": self.completed_count,
+                "failed": self.failed_count,
+                "rejected": self.rejected_count,
+            }
+
+    def shutdown(self, wait: bool = True, *, cancel_pending: bool = False):
+        """
+        Stops accepting tasks.
+
+        Parameters
+        ----------
+        wait: bool, default True
+            Whether to block until the remaining tasks finish.
+        cancel_pending: bool, default False
+            Whether to cancel the tasks that have not started yet
+            instead of letting them run.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_pending)
@@ -0,0 +1,295 @@
+"""Turns the options of an invocation into the arguments of a command.
+
+Each :class:`Command` compiles its converters once, when it is created: one
+per option whose value needs converting, such as building a :class:`Member`
+from the resolved data of a USER option, or looking up the member of an enum.
+:func:`bind_options` then follows the invoked subcommand path through the
+command groups to the target :class:`Command`, and converts its options in a
+single loop.
+
+Custom ID handlers are compiled the same way when they are added: a
+:class:`StateDecoder` converts the state stored in a custom ID back to the
+types its handler is annotated with.
+"""
+import enum
+import inspect
+import itertools
+import types
+import typing
+from typing import Any, Callable, Optional, Union
+
+from deta_discord_interactions.models import (
+    Attachment,
+    Channel,
+    CommandOptionType,
+    Member,
+    Role,
+    User,
+)
+from deta_discord_interactions.state import StateCodec
+
+
+Converter = Callable[[Any, dict], Any]
+"Converts the value of an option, given the resolved data of the interaction"
+
+SUBCOMMAND_TYPES = frozenset((CommandOptionType.SUB_COMMAND, CommandOptionType.SUB_COMMAND_GROUP))
+
+
+def _user(value, resolved: dict):
+    members = resolved.get("members")
+    if members and value in members:
+        # Copied, so that the resolved data is left untouched
+        return Member.from_dict({**members[value], "user": resolved["users"][value]})
+    return User.from_dict(resolved["users"][value])
+
+
+def _channel(value, resolved: dict):
+    return Channel.from_dict(resolved["channels"][value])
+
+
+def _role(value, resolved: dict):
+    return Role.from_dict(resolved["roles"][value])
+
+
+def _attachment(value, resolved: dict):
+    return Attachment.from_dict(resolved["attachments"][value])
+
+
+def _number(value, resolved: dict):
+    # Discord sends whole numbers without a decimal point
+    return float(value)
+
+
+TYPE_CONVERTERS: dict[int, Converter] = {
+    CommandOptionType.USER: _user,
+    CommandOptionType.CHANNEL: _channel,
+    CommandOptionType.ROLE: _role,
+    CommandOptionType.ATTACHMENT: _attachment,
+    CommandOptionType.NUMBER: _number,
+}
+"The converters of the option types whose values are not passed as is"
+
+
+def enum_converter(annotation: type[enum.Enum]) -> Converter:
+    "Returns a converter looking up the member of ``annotation`` with the value of the option"
+    value_type = int if issubclass(annotation, enum.IntEnum) else str
+    members = {value_type(member.value): member for member in annotation}
+
+    def convert(value, resolved: dict):
+        return members[value_type(value)]
+    return convert
+
+
+def compile_converters(options: list[dict], enums: Optional[dict[str, type[enum.Enum]]] = None) -> dict[str, Optional[Converter]]:
+    """
+    Returns the converter of each option of a command, or None for the options passed as is.
+
+    Parameters
+    ----------
+    options: list[dict]
+        The options of the command, as sent to Discord.
+    enums: dict[str, type[Enum]], optional
+        The enum each option was annotated with, by option name.
+    """
+    enums = enums or {}
+    converters = {}
+    for option in options:
+        name = option["name"]
+        if name in enums:
+            converters[name] = enum_converter(enums[name])
+        else:
+            converters[name] = TYPE_CONVERTERS.get(option["type"])
+    return converters
+
+
+def bind_options(target, options: list[dict], resolved: dict) -> tuple[list, dict]:
+    """
+    Creates the arguments to call a command with.
+
+    Parameters
+    ----------
+    target: Command | SlashCommandSubgroup, optional
+        The invoked command. If None, the options are converted based on their type only.
+    options: list[dict]
+        The options of the invocation.
+    resolved: dict
+        The resolved data of the invocation.
+
+    Returns
+    -------
+    list[str]
+        The names of the invoked subcommands.
+    dict[str, Any]
+        The value of each option, by name.
+    """
+    args = []
+    while options and options[0]["type"] in SUBCOMMAND_TYPES:
+        option = options[0]
+        args.append(option["name"])
+        subcommands = getattr(target, "subcommands", None)
+        target = subcommands.get(option["name"]) if subcommands else None
+        options = option.get("options")
+
+    kwargs = {}
+    if not options:
+        return args, kwargs
+    converters = getattr(target, "converters", None) or {}
+    for option in options:
+        name = option["name"]
+        if name in converters:
+            converter = converters[name]
+        else:
+            converter = TYPE_CONVERTERS.get(option["type"])
+        value = option["value"]
+        kwargs[name] = value if converter is None else converter(value, resolved)
+    return args, kwargs
+
+
+class Snowflake(str):
+    """
+    Annotation for the custom ID handler arguments holding Discord IDs,
+    like ``ctx.id`` or ``ctx.author.id``. They are still passed as ``str``,
+    after checking that they only contain digits.
+    """
+
+
+class HandlerStateError(ValueError):
+    "Raised when the state in a custom ID does not match the annotations of its handler"
+
+
+def _state_bool(value: str):
+    if value == "True":
+        return True
+    elif value == "False":
+        return False
+    elif value == "None":
+        return None
+    raise ValueError(value)
+
+
+def _state_snowflake(value: str):
+    if not value.isdigit():
+        raise ValueError(value)
+    return value
+
+
+def _state_enum(annotation: type[enum.Enum]) -> Callable[[str], Any]:
+    # Accepts what str() gives for the member, its value and its name
+    members = {}
+    for name, member in annotation.__members__.items():
+        members[str(member)] = member
+        members[str(member.value)] = member
+        members[name] = member
+    return members.__getitem__
+
+
+def _state_optional(convert: Optional[Callable[[str], Any]]) -> Callable[[str], Any]:
+    def convert_optional(value: str):
+        if value == "None":
+            return None
+        return value if convert is None else convert(value)
+    return convert_optional
+
+
+def state_converter(annotation) -> Optional[Callable[[str], Any]]:
+    """
+    Returns the function converting a value stored in a custom ID to ``annotation``,
+    or None if the value is passed as a ``str``.
+    """
+    if typing.get_origin(annotation) in (Union, getattr(types, "UnionType", Union)):
+        arguments = typing.get_args(annotation)
+        if type(None) not in arguments or len(arguments) != 2:
+            return None
+        inner, = (argument for argument in arguments if argument is not type(None))
+        return _state_optional(state_converter(inner))
+    if annotation is bool:
+        return _state_bool
+    if annotation is int or annotation is float:
+        return annotation
+    if annotation is Snowflake:
+        return _state_snowflake
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return _state_enum(annotation)
+    if isinstance(annotation, StateCodec):
+        return annotation.decode
+    return None
+
+
+class StateDecoder:
+    """
+    Converts the state of a custom ID to the arguments of its handler.
+
+    Created once per handler, see :meth:`DiscordInteractionsBlueprint.add_custom_handler`.
+
+    Parameters
+    ----------
+    handler: Callable
+        The custom ID handler. Its parameters after the context are
+        converted according to their annotations: the positional ones from
+        the state stored after the custom ID, and the parameters of its
+        pattern by name.
+    """
+
+    def __init__(self, handler: Callable):
+        self.handler = handler
+        try:
+            hints = typing.get_type_hints(handler)
+        except Exception:
+            hints = {}
+        parameters = itertools.islice(inspect.signature(handler).parameters.values(), 1, None)
+        self.plan: list[tuple[int, str, Callable[[str], Any]]] = []
+        self.named: dict[str, Callable[[str], Any]] = {}
+        positional = True
+        for index, parameter in enumerate(parameters):
+            if parameter.kind not in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD):
+                positional = False
+            convert = state_converter(hints.get(parameter.name, parameter.annotation))
+            if convert is None:
+                continue
+            if positional:
+                self.plan.append((index, parameter.name, convert))
+            if parameter.kind is not parameter.POSITIONAL_ONLY:
+                self.named[parameter.name] = convert
+
+    def __call__(self, state: list[str]) -> list:
+        """
+        Returns the arguments to call the handler with, after the context.
+
+        Raises
+        ------
+        HandlerStateError
+            If a value cannot be converted to the type of its parameter.
+        """
+        args = list(state)
+        count = len(args)
+        for index, name, convert in self.plan:
+            if index >= count:
+                break
+            try:
+                args[index] = convert(args[index])
+            except (ValueError, KeyError):
+                raise HandlerStateError(f"Invalid {name} in handler state: {args[index]!r}") from None
+        return args
+
+    def decode_params(self, params: dict[str, Any]) -> dict[str, Any]:
+        """
+        Returns the parameters matched by the pattern of the handler, converted
+        according to its annotations unless the pattern already converted them.
+
+        Raises
+        ------
+        HandlerStateError
+            If a value cannot be converted to the type of its parameter.
+        """
+        if not params or not self.named:
+            return params
+        params = dict(params)
+        for name, value in params.items():
+            convert = self.named.get(name)
+            if convert is None or not isinstance(value, str):
+                continue
+            try:
+                params[name] = convert(value)
+            except (ValueError, KeyError):
+                raise HandlerStateError(f"Invalid {name} in custom ID: {value!r}") from None
+        return params
@@ -2,6 +2,7 @@ import copy
 from contextlib import contextmanager
 import typing
 
+from deta_discord_interactions.concurrency import resolve_awaitable
 from deta_discord_interactions.context import Context
 from deta_discord_interactions.models import Message
 from deta_discord_interactions.models import Modal
@@ -85,6 +86,7 @@ class Client:
         else:
             raise Exception("Invalid command type")
 
+        result = resolve_awaitable(result)
         if isinstance(result, Modal):
             return result
         return Message.from_return_value(result)
@@ -96,7 +98,7 @@ class Client:
         Parameters
         ----------
         custom_id
-            The ID of the handler function to run.
+            The ID of the handler function to run, or a custom ID matching its pattern.
         *args
             Options to pass to the handler being called.
         """
@@ -106,13 +108,8 @@ class Client:
         new_context.custom_id = "\n".join((custom_id, *args))
         new_context.parse_custom_id()
 
-        handler = self.discord.custom_id_handlers[new_context.primary_id]
-
-        args = new_context.create_handler_args(handler)
-        response = handler(new_context, *args)
-        if isinstance(response, Modal):
-            return response
-        return Message.from_return_value(response)
+        invocation = self.discord.bind_handler(new_context)
+        return invocation.convert(resolve_awaitable(invocation.call()))
 
 
     def run_autocomplete(self, *names, **params):
@@ -156,7 +153,7 @@ class Client:
             args[-1].focused = True
 
         return AutocompleteResult.from_return_value(
-            command.run_autocomplete(self.current_context, *args, **kwargs)
+            resolve_awaitable(command.run_autocomplete(self.current_context, *args, **kwargs))
         )
 
     def run_action(self, action_id: str):
@@ -0,0 +1,177 @@
+"""JSON encoding and decoding used across the library.
+
+Uses the standard library by default. `orjson <https://github.com/ijl/orjson>`_
+or `msgspec <https://jcristharif.com/msgspec/>`_ can be used instead by choosing them
+with the ``DISCORD_INTERACTIONS_JSON`` environment variable (``orjson``, ``msgspec``,
+``json`` or ``auto`` for the first one installed), with :func:`set_codec`,
+or through :attr:`DiscordInteractions.json_codec`.
+It is shared by the whole process, since Messages and Database records
+are encoded without knowing which app they belong to.
+
+The pretty output, used for the local files, always comes from the standard library,
+so that the files are written the same way whichever codec is in use.
+
+Example usage:
+    from deta_discord_interactions import codec
+    codec.set_codec("json")
+    codec.dumps({"a": 1})  # b'{"a":1}'
+"""
+import json
+import os
+from typing import Any, Union
+
+
+class JSONCodec:
+    """
+    JSON codec using the standard library. Base class for the other codecs.
+
+    Attributes
+    ----------
+    name: str
+        The name used to select this codec.
+    """
+    name = "json"
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        "Decodes a JSON document"
+        return json.loads(data)
+
+    def dumps(self, obj: Any, *, pretty: bool = False) -> bytes:
+        """
+        Encodes `obj` as UTF-8 JSON.
+
+        Parameters
+        ----------
+        obj: Any
+            The object to encode.
+        pretty: bool, default False
+            If True, indents the output by 4 spaces and sorts the keys, as :func:`json.dumps` does.
+            Otherwise, uses the most compact representation.
+        """
+        return self.dumps_str(obj, pretty=pretty).encode("UTF-8")
+
+    def dumps_str(self, obj: Any, *, pretty: bool = False) -> str:
+        "Same as :meth:`dumps`, but returns a str"
+        if pretty:
+            return json.dumps(obj, indent=4, sort_keys=True)
+        return json.dumps(obj, separators=(",", ":"))
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name!r}>"
+
+
+class OrjsonCodec(JSONCodec):
+    "JSON codec using orjson"
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self.orjson = orjson
+        # The standard library converts int keys to strings, Discord data such as resolved ids may use them
+        self.options = orjson.OPT_NON_STR_KEYS
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self.orjson.loads(data)
+
+    def dumps(self, obj: Any, *, pretty: bool = False) -> bytes:
+        if pretty:
+            # orjson can only indent by 2 spaces
+            return super().dumps(obj, pretty=True)
+        return self.orjson.dumps(obj, option=self.options)
+
+    def dumps_str(self, obj: Any, *, pretty: bool = False) -> str:
+        if pretty:
+            return super().dumps_str(obj, pretty=True)
+        return self.orjson.dumps(obj, option=self.options).decode("UTF-8")
+
+
+class MsgspecCodec(JSONCodec):
+    "JSON codec using msgspec"
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec.json
+        self.encoder = msgspec.json.Encoder()
+        self.decoder = msgspec.json.Decoder()
+        self.format = msgspec.json.format
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self.decoder.decode(data)
+
+    def dumps(self, obj: Any, *, pretty: bool = False) -> bytes:
+        if pretty:
+            # msgspec cannot sort keys on every supported version
+            return super().dumps(obj, pretty=True)
+        return self.encoder.encode(obj)
+
+    def dumps_str(self, obj: Any, *, pretty: bool = False) -> str:
+        if pretty:
+            return super().dumps_str(obj, pretty=True)
+        return self.encoder.encode(obj).decode("UTF-8")
+
+
+CODECS: dict[str, type[JSONCodec]] = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "json": JSONCodec,
+}
+
+
+def create_codec(name: str = "auto") -> JSONCodec:
+    """
+    Creates the codec called `name`.
+    ``"auto"`` picks the first installed of orjson, msgspec and the standard library.
+
+    Raises ImportError if the library for the codec is not installed.
+    """
+    if name == "auto":
+        for codec_class in CODECS.values():
+            try:
+                return codec_class()
+            except ImportError:
+                continue
+    if name not in CODECS:
+        raise ValueError(f"Unknown JSON codec {name!r}, expected one of {['auto', *CODECS]}")
+    return CODECS[name]()
+
+
+_codec: JSONCodec = create_codec(os.getenv("DISCORD_INTERACTIONS_JSON", "json"))
+
+
+def get_codec() -> JSONCodec:
+    "Returns the codec currently in use"
+    return _codec
+
+
+def set_codec(codec: Union[str, JSONCodec]) -> JSONCodec:
+    """
+    Changes the codec used by the whole library.
+
+    Parameters
+    ----------
+    codec: str | JSONCodec
+        Either the name of a codec (see :func:`create_codec`) or a codec instance.
+
+    Returns
+    -------
+    JSONCodec
+        The codec now in use.
+    """
+    global _codec
+    _codec = create_codec(codec) if isinstance(codec, str) else codec
+    return _codec
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    "Decodes a JSON document using the current codec"
+    return _codec.loads(data)
+
+
+def dumps(obj: Any, *, pretty: bool = False) -> bytes:
+    "Encodes `obj` as UTF-8 JSON using the current codec. See :meth:`JSONCodec.dumps`"
+    return _codec.dumps(obj, pretty=pretty)
+
+
+def dumps_str(obj: Any, *, pretty: bool = False) -> str:
+    "Encodes `obj` as a JSON str using the current codec"
+    return _codec.dumps_str(obj, pretty=pretty)
@@ -3,8 +3,9 @@ import enum
 import inspect
 import itertools
 
-from typing import Callable, TYPE_CHECKING
+from typing import Callable, Optional, TYPE_CHECKING
 
+from deta_discord_interactions import binding
 from deta_discord_interactions.context import Context
 from deta_discord_interactions.models import (
     Message,
@@ -68,6 +69,10 @@ class Command:
     discord: DiscordInteractions
         DiscordInteractionsBlueprint instance which this Command is associated
         with.
+    defer_after: float
+        If set, the command runs in a worker thread and, if it takes longer
+        than this many seconds, a deferred Message is sent as the response
+        and the result is edited into it once the command finishes.
     """
 
     def __init__(
@@ -85,6 +90,7 @@ class Command:
         description_localizations: dict[str, str] = None,
         discord: "DiscordInteractions" = None,
         autocomplete_handler: Callable = None,
+        defer_after: Optional[float] = None,
     ):
         self.command = command
         self.name = name
@@ -98,6 +104,7 @@ class Command:
         self.description_localizations = description_localizations
         self.discord = discord
         self.autocomplete_handler = autocomplete_handler
+        self.defer_after = defer_after
         self.id = None
 
         if self.name is None:
@@ -137,6 +144,7 @@ class Command:
                 (o.dump() if isinstance(o, Option) else o) for o in self.options
             ]
 
+        enums = {}
         if self.type is ApplicationCommandType.CHAT_INPUT and self.options is None:
             sig = inspect.signature(self.command)
 
@@ -190,6 +198,7 @@ class Command:
                 }
 
                 if issubclass(annotation, enum.Enum):
+                    enums[parameter.name] = annotation
                     choices = []
 
                     if issubclass(annotation, enum.IntEnum):
@@ -206,6 +215,9 @@ class Command:
 
                 self.options.append(option)
 
+        # Compiled once, so that binding the options of each invocation is a single loop
+        self.converters = binding.compile_converters(self.options or [], enums)
+
     def make_context_and_run(
         self, *, discord: "DiscordInteractions", data: dict
     ):
@@ -226,16 +238,7 @@ class Command:
         Message
             The response by the command, converted to a Message object.
         """
-
-        context = Context.from_data(discord, data)
-        args, kwargs = context.create_args()
-
-        result = self.run(context, *args, **kwargs)
-
-        if isinstance(result, Modal):
-            return result
-        else:
-            return Message.from_return_value(result)
+        return discord.run_invocation(discord.prepare_command(data, self))
 
     def run(self, context: Context, *args, **kwargs):
         """
@@ -253,6 +256,18 @@ class Command:
 
         return self.command(context, *args, **kwargs)
 
+    def get_subcommand(self, *subcommands) -> "Command":
+        """
+        Returns the :class:`Command` that will be invoked for the given
+        subcommand names. For normal commands, that is the command itself.
+
+        Parameters
+        ----------
+        *subcommands
+            The names of the subcommands being invoked.
+        """
+        return self
+
     def make_context_and_run_autocomplete(
         self, *, discord: "DiscordInteractions", data: dict
     ):
@@ -273,13 +288,7 @@ class Command:
         AutocompleteResult
             The response by the handler, converted to an AutocompleteResult object.
         """
-
-        context = Context.from_data(discord, data)
-        args, kwargs = context.create_autocomplete_args()
-
-        result = self.run_autocomplete(context, *args, **kwargs)
-
-        return AutocompleteResult.from_return_value(result)
+        return discord.run_invocation(discord.prepare_autocomplete(data, self))
 
     def run_autocomplete(self, context: Context, *args, **kwargs):
         """
@@ -386,6 +395,7 @@ class SlashCommandSubgroup(Command):
         description_localizations: dict[str, str] = None,
         options: list[Option] = None,
         annotations: dict[str, str] = None,
+        defer_after: Optional[float] = None,
     ):
         """
         Decorator to create a new Subcommand of this Subgroup.
@@ -406,6 +416,9 @@ class SlashCommandSubgroup(Command):
         annotations: dict[str, str]
             If ``options`` is not provided, descriptions for each of the
             options defined in the function's keyword arguments.
+        defer_after: float, optional
+            If set, responds with a deferred Message if the subcommand takes
+            longer than this many seconds.
         """
 
         def decorator(func: Callable) -> Command:
@@ -417,6 +430,7 @@ class SlashCommandSubgroup(Command):
                 description_localizations=description_localizations,
                 options=options,
                 annotations=annotations,
+                defer_after=defer_after,
             )
             self.subcommands[subcommand.name] = subcommand
             return subcommand
@@ -460,6 +474,18 @@ class SlashCommandSubgroup(Command):
         """
         return self.subcommands[subcommands[0]].run(context, *subcommands[1:], **kwargs)
 
+    def get_subcommand(self, *subcommands) -> Command:
+        """
+        Returns the :class:`Command` that will be invoked for the given
+        subcommand names.
+
+        Parameters
+        ----------
+        *subcommands
+            The names of the subcommands being invoked.
+        """
+        return self.subcommands[subcommands[0]].get_subcommand(*subcommands[1:])
+
     def run_autocomplete(self, context, *subcommands, **kwargs):
         """
         Invokes the relevant subcommand's autocomplete handler for the given :class:`Context`.
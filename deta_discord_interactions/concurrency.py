@@ -0,0 +1,74 @@
+"""Helpers to call user functions that may or may not be ``async def``."""
+import contextvars
+import functools
+import inspect
+from concurrent.futures import Executor
+from typing import Any, Callable, Optional
+
+from deta_discord_interactions import profiling
+
+
+def resolve_awaitable(value: Any) -> Any:
+    """
+    If ``value`` is awaitable (e.g. the result of calling an ``async def``
+    command), run it to completion and return its result.
+    Otherwise, returns ``value`` unchanged.
+
+    Only usable from synchronous code (such as the WSGI app).
+    Use :class:`ASGIApp` to run async handlers inside of an event loop.
+    """
+    if not inspect.isawaitable(value):
+        return value
+    import asyncio
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        if inspect.iscoroutine(value):
+            value.close()
+        raise RuntimeError(
+            "Cannot run an async handler synchronously from inside of a running event loop. "
+            "Use the ASGIApp instead."
+        )
+
+    if inspect.iscoroutine(value):
+        return asyncio.run(value)
+
+    async def _await():
+        return await value
+    return asyncio.run(_await())
+
+
+async def call_async(executor: Optional[Executor], function: Callable[[], Any], is_async: Optional[bool] = None) -> Any:
+    """
+    Call ``function()`` from inside of an event loop.
+
+    ``async def`` functions are awaited directly, while synchronous functions
+    are offloaded to ``executor`` so that they do not block the event loop,
+    keeping the current context variables (like :func:`asyncio.to_thread`).
+
+    Parameters
+    ----------
+    executor: Executor, optional
+        The executor to run synchronous functions in.
+        If None, uses the event loop's default executor.
+    function: Callable
+        A function taking no arguments. Use :func:`functools.partial` to bind them.
+    is_async: bool, optional
+        Whether calling ``function`` returns an awaitable.
+        If None, it is detected with :func:`inspect.iscoroutinefunction`.
+    """
+    if is_async is None:
+        is_async = inspect.iscoroutinefunction(function)
+    if is_async:
+        result = function()
+    else:
+        import asyncio
+        result = await asyncio.get_running_loop().run_in_executor(
+            executor,
+            functools.partial(contextvars.copy_context().run, profiling.follow(function)),
+        )
+    if inspect.isawaitable(result):
+        result = await result
+    return result
@@ -1,9 +1,7 @@
-from dataclasses import dataclass
+from concurrent.futures import Future
+import copy
+from dataclasses import dataclass, field
 from typing import Callable, Optional, Union, TYPE_CHECKING
-import inspect
-import itertools
-
-import requests
 
 from deta_discord_interactions.models import (
     LoadableDataclass,
@@ -18,6 +16,7 @@ from deta_discord_interactions.models import (
     Component,
     Option,
 )
+from deta_discord_interactions.binding import StateDecoder, bind_options
 
 if TYPE_CHECKING:
     from deta_discord_interactions.discord import DiscordInteractions
@@ -67,6 +66,10 @@ class Context(LoadableDataclass):
         :class:`Channel` objects for each channel specified as an option.
     roles
         :class:`Role` object for each role specified as an option.
+    messages
+        :class:`Message` objects for each message specified as an option.
+    attachments
+        :class:`Attachment` objects for each attachment specified as an option.
     target_user
         The targeted :class:`User` if it is a User context menu command.
     target_message
@@ -80,6 +83,13 @@ class Context(LoadableDataclass):
         The guild's preferred locale, if invoked in a guild.
     app_permissions
         Bitwise set of permissions the app or bot has within the channel the interaction was sent from.
+    handler_params
+        The parameters matched by the pattern of the custom ID handler, such as
+        ``{"n": 2}`` for ``page:{n:int}`` and the custom ID ``page:2``.
+
+    When created with :meth:`from_data`, the attributes holding models
+    (:attr:`author`, :attr:`message`, :attr:`components`, the resolved
+    objects and the targets) are parsed the first time they are accessed.
     """
     author: Optional[User] = None
     id: str = None
@@ -106,11 +116,19 @@ class Context(LoadableDataclass):
     custom_id: str = None
     primary_id: str = None
     handler_state: list = None
+    handler_params: dict = None
 
     target_id: str = None
     target_user: Optional[User] = None
     target_message: Optional[Message] = None
 
+    # Parsed together with the members, channels and roles
+    users: Optional[dict[str, User]] = field(default=None, repr=False, compare=False)
+    messages: Optional[dict[str, Message]] = field(default=None, repr=False, compare=False)
+    attachments: Optional[dict[str, Attachment]] = field(default=None, repr=False, compare=False)
+    data: Optional[dict] = field(default=None, repr=False, compare=False)
+    "The raw interaction data, set by :meth:`from_data`"
+
     @classmethod
     def from_data(
         cls, discord: "DiscordInteractions" = None, data = None
@@ -137,16 +155,13 @@ class Context(LoadableDataclass):
             locale=data.get("locale"),
             guild_locale=data.get("guild_locale"),
             app_permissions=data.get("app_permissions"),
+            data=data,
         )
-
-        result.data = data
-
-        result.parse_author(data)
-        result.parse_message(data)
         result.parse_custom_id()
-        result.parse_resolved()
-        result.parse_target()
-        result.parse_components()
+
+        # Parsed on first access instead, see _LazyAttribute
+        for name in _LAZY_ATTRIBUTES:
+            result.__dict__.pop(name, None)
         return result
 
     @property
@@ -206,11 +221,11 @@ class Context(LoadableDataclass):
         and role passed as an argument to the command.
         """
 
-        self.members = {}
-        for id in self.resolved.get("members", {}):
-            member_info = self.resolved["members"][id]
-            member_info["user"] = self.resolved["users"][id]
-            self.members[id] = Member.from_dict(member_info)
+        # Copied, so that the resolved data is left untouched
+        self.members = {
+            id: Member.from_dict({**data, "user": self.resolved["users"][id]})
+            for id, data in self.resolved.get("members", {}).items()
+        }
 
         self.users = {
             id: User.from_dict(data)
@@ -234,7 +249,7 @@ class Context(LoadableDataclass):
 
         self.attachments = {
             id: Attachment.from_dict(data)
-            for id, data in self.resolved.get("messages", {}).items()
+            for id, data in self.resolved.get("attachments", {}).items()
         }
 
     def parse_target(self):
@@ -260,13 +275,19 @@ class Context(LoadableDataclass):
     def parse_components(self):
         self.components = [Component.from_dict(c) for c in self.components]
 
-    def create_args(self):
+    def create_args(self, command=None):
         """
         Create the arguments which will be passed to the function when the
         :class:`Command` is invoked.
+
+        Parameters
+        ----------
+        command: Command, optional
+            The invoked command. Its compiled converters are used if given,
+            which also turns enum options into enum members.
         """
         if self.command_type == ApplicationCommandType.CHAT_INPUT:
-            return self.create_args_chat_input()
+            return self.create_args_chat_input(command)
         elif self.command_type == ApplicationCommandType.USER:
             return [self.target_user], {}
         elif self.command_type == ApplicationCommandType.MESSAGE:
@@ -280,63 +301,12 @@ class Context(LoadableDataclass):
         if self.command_type == ApplicationCommandType.CHAT_INPUT:
             return self.create_autocomplete_args_chat_input()
 
-    def create_args_chat_input(self):
+    def create_args_chat_input(self, command=None):
         """
         Create the arguments for this command, assuming it is a ``CHAT_INPUT``
-        command.
+        command. See :func:`binding.bind_options`.
         """
-
-        def create_args_recursive(data, resolved):
-            if not data.get("options"):
-                return [], {}
-
-            args = []
-            kwargs = {}
-
-            for option in data["options"]:
-                if option["type"] in [
-                    CommandOptionType.SUB_COMMAND,
-                    CommandOptionType.SUB_COMMAND_GROUP,
-                ]:
-                    args.append(option["name"])
-
-                    sub_args, sub_kwargs = create_args_recursive(option, resolved)
-
-                    args += sub_args
-                    kwargs.update(sub_kwargs)
-
-                elif option["type"] == CommandOptionType.USER:
-                    if "members" in resolved:
-                        member_data = resolved["members"][option["value"]]
-                        member_data["user"] = resolved["users"][option["value"]]
-
-                        kwargs[option["name"]] = Member.from_dict(member_data)
-                    else:
-                        kwargs[option["name"]] = User.from_dict(
-                            resolved["users"][option["value"]]
-                        )
-
-                elif option["type"] == CommandOptionType.CHANNEL:
-                    kwargs[option["name"]] = Channel.from_dict(
-                        resolved["channels"][option["value"]]
-                    )
-
-                elif option["type"] == CommandOptionType.ROLE:
-                    kwargs[option["name"]] = Role.from_dict(
-                        resolved["roles"][option["value"]]
-                    )
-
-                elif option["type"] == CommandOptionType.ATTACHMENT:
-                    kwargs[option["name"]] = Attachment.from_dict(
-                        resolved["attachments"][option["value"]]
-                    )
-
-                else:
-                    kwargs[option["name"]] = option["value"]
-
-            return args, kwargs
-
-        return create_args_recursive({"options": self.options}, self.resolved)
+        return bind_options(command, self.options, self.resolved or {})
 
     def create_autocomplete_args_chat_input(self):
         """
@@ -371,7 +341,7 @@ class Context(LoadableDataclass):
 
         return create_args_recursive({"options": self.options}, self.resolved)
 
-    def create_handler_args(self, handler: Callable):
+    def create_handler_args(self, handler: Callable, decoder: Optional[StateDecoder] = None):
         """
         Create the arguments which will be passed to the function when a
         custom ID handler is invoked.
@@ -380,35 +350,30 @@ class Context(LoadableDataclass):
         ----------
         handler: Callable
             The custom ID handler to create arguments for.
-        """
-
-        args = self.handler_state[1:]
-
-        sig = inspect.signature(handler)
-
-        iterator = zip(
-            itertools.count(), args, itertools.islice(sig.parameters.values(), 1, None)
-        )
-
-        for i, argument, parameter in iterator:
-            annotation = parameter.annotation
-
-            if annotation == int:
-                args[i] = int(argument)
+        decoder: StateDecoder, optional
+            The decoder compiled for the handler when it was added.
+            Compiled now if omitted.
 
-            elif annotation == bool:
-                if argument == "True":
-                    args[i] = True
-                elif argument == "False":
-                    args[i] = False
-                elif argument == "None":
-                    args[i] = None
-                else:
-                    raise ValueError(
-                        f"Invalid bool in handler state parsing: {args[i]}"
-                    )
+        Raises
+        ------
+        HandlerStateError
+            If the state does not match the annotations of the handler.
+        """
+        if decoder is None or decoder.handler is not handler:
+            decoder = StateDecoder(handler)
+        return decoder(self.handler_state[1:])
 
-        return args
+    def create_handler_kwargs(self, handler: Callable, decoder: Optional[StateDecoder] = None) -> dict:
+        """
+        Create the keyword arguments which will be passed to the function when a
+        custom ID handler is invoked, from the parameters of its pattern.
+        See :meth:`create_handler_args`.
+        """
+        if not self.handler_params:
+            return {}
+        if decoder is None or decoder.handler is not handler:
+            decoder = StateDecoder(handler)
+        return decoder.decode_params(self.handler_params)
 
     def followup_url(self, message: str = None):
         """
@@ -451,7 +416,7 @@ class Context(LoadableDataclass):
             return
 
         response, mimetype = updated.encode(followup=True)
-        updated = requests.patch(
+        updated = self.discord.rest.patch(
             self.followup_url(message),
             data=response,
             headers={"Content-Type": mimetype},
@@ -472,7 +437,7 @@ class Context(LoadableDataclass):
         if not self.discord or self.discord.DONT_REGISTER_WITH_DISCORD:
             return
 
-        response = requests.delete(self.followup_url(message))
+        response = self.discord.rest.delete(self.followup_url(message))
         response.raise_for_status()
 
     def send(self, message: Union[Message, str]):
@@ -491,12 +456,101 @@ class Context(LoadableDataclass):
         message = Message.from_return_value(message)
 
         response, mimetype = message.encode(followup=True)
-        message = requests.post(
+        message = self.discord.rest.post(
             self.followup_url(), data=response, headers={"Content-Type": mimetype}
         )
         message.raise_for_status()
         return message.json()["id"]
 
+    async def aedit(self, updated: Union[Message, str], message: str = "@original"):
+        """
+        Async counterpart of :meth:`edit`, using the app's :class:`AsyncRESTClient`.
+        Requires httpx.
+        """
+
+        updated = Message.from_return_value(updated)
+
+        if not self.discord or self.discord.DONT_REGISTER_WITH_DISCORD:
+            return
+
+        response, mimetype = updated.encode(followup=True)
+        updated = await self.discord.async_rest.patch(
+            self.followup_url(message),
+            content=response,
+            headers={"Content-Type": mimetype},
+        )
+        updated.raise_for_status()
+
+    async def adelete(self, message: str = "@original"):
+        """
+        Async counterpart of :meth:`delete`, using the app's :class:`AsyncRESTClient`.
+        Requires httpx.
+        """
+
+        if not self.discord or self.discord.DONT_REGISTER_WITH_DISCORD:
+            return
+
+        response = await self.discord.async_rest.delete(self.followup_url(message))
+        response.raise_for_status()
+
+    async def asend(self, message: Union[Message, str]):
+        """
+        Async counterpart of :meth:`send`, using the app's :class:`AsyncRESTClient`.
+        Requires httpx.
+
+        Many followups can be sent concurrently from a single event loop,
+        for example with ``await asyncio.gather(*(ctx.asend(m) for m in messages))``.
+        """
+
+        if not self.discord or self.discord.DONT_REGISTER_WITH_DISCORD:
+            return
+
+        message = Message.from_return_value(message)
+
+        response, mimetype = message.encode(followup=True)
+        message = await self.discord.async_rest.post(
+            self.followup_url(), content=response, headers={"Content-Type": mimetype}
+        )
+        message.raise_for_status()
+        return message.json()["id"]
+
+    def run_in_background(self, function: Callable, *args, **kwargs) -> Future:
+        """
+        Run ``function(ctx, *args, **kwargs)`` in the app's
+        :class:`BackgroundExecutor`, where ``ctx`` is a copy of this Context.
+        The function can use it to ``send`` or ``edit`` messages once it is done.
+
+        Usually paired with returning ``Message(deferred=True)``.
+        If this Context is not attached to an app (such as when using the
+        :class:`Client`), runs the function immediately instead.
+
+        Parameters
+        ----------
+        function: Callable
+            The function to run.
+        *args, **kwargs
+            Passed to the function after the Context.
+
+        Returns
+        -------
+        Future
+            The Future for the result of the function.
+
+        Raises
+        ------
+        BackgroundQueueFull
+            If the executor already has as many pending tasks as it accepts.
+        """
+        snapshot = copy.copy(self)
+        if self.discord is None or not hasattr(self.discord, "background_executor"):
+            future = Future()
+            try:
+                future.set_result(function(snapshot, *args, **kwargs))
+            except Exception as err:
+                future.set_exception(err)
+            return future
+        return self.discord.background_executor.submit(function, snapshot, *args, **kwargs)
+
     def get_command(self, command_name: str = None):
         """
         Get the ID of a command by name.
@@ -531,3 +585,57 @@ class Context(LoadableDataclass):
                 if component.custom_id == component_id:
                     return component
         raise LookupError("The specified component was not found.")
+
+
+class _LazyAttribute:
+    """
+    Parses an attribute of a :class:`Context` created with :meth:`Context.from_data`
+    the first time it is accessed, and stores it on the instance, which takes
+    precedence over this descriptor for the next accesses.
+
+    Contexts created directly get their attributes from ``__init__`` instead.
+    """
+
+    def __init__(self, parse: Callable[[Context], None], default=None):
+        self.parse = parse
+        self.default = default
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None or instance.data is None:
+            return self.default
+        self.parse(instance)
+        return instance.__dict__[self.name]
+
+
+def _parse_target(context: Context):
+    context.target_user = None
+    context.target_message = None
+    context.parse_target()
+
+
+def _parse_components(context: Context):
+    context.components = context.data.get("data", {}).get("components", [])
+    context.parse_components()
+
+
+_LAZY_ATTRIBUTES = {
+    "author": lambda context: context.parse_author(context.data),
+    "message": lambda context: context.parse_message(context.data),
+    "components": _parse_components,
+    "members": Context.parse_resolved,
+    "users": Context.parse_resolved,
+    "channels": Context.parse_resolved,
+    "roles": Context.parse_resolved,
+    "messages": Context.parse_resolved,
+    "attachments": Context.parse_resolved,
+    "target_user": _parse_target,
+    "target_message": _parse_target,
+}
+
+for _name, _parse in _LAZY_ATTRIBUTES.items():
+    _attribute = _LazyAttribute(_parse)
+    _attribute.__set_name__(Context, _name)
+    setattr(Context, _name, _attribute)
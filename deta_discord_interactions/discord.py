@@ -1,27 +1,44 @@
+import contextlib
+import contextvars
+import functools
+import inspect
 import os
+import threading
 import time
-from typing import Callable, NoReturn
-import json
-
-import requests
-
-from nacl.exceptions import BadSignatureError
-from nacl.signing import VerifyKey
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Iterable, NoReturn, Optional, Union
 
 from deta_discord_interactions.models.option import Option
+from deta_discord_interactions.signature import SignatureVerifier
 
 from deta_discord_interactions.command import Command, SlashCommandGroup
+from deta_discord_interactions import codec, profiling, timing
+from deta_discord_interactions.binding import StateDecoder
+from deta_discord_interactions.background import BackgroundExecutor, BackgroundQueueFull
+from deta_discord_interactions.concurrency import resolve_awaitable
+from deta_discord_interactions.permissions import PermissionCache, permissions_key
+from deta_discord_interactions.ratelimit import RateLimiter
+from deta_discord_interactions.recorder import Recorder
+from deta_discord_interactions.rest import AsyncRESTClient, RESTClient, error_code
+from deta_discord_interactions.routing import CustomIdPattern, CustomIdRouter, Router
 from deta_discord_interactions.context import Context, ApplicationCommandType
-from deta_discord_interactions.models import Message, Modal, ResponseType, Permission
+from deta_discord_interactions.models import AutocompleteResult, Message, Modal, ResponseType, Permission
+
+if TYPE_CHECKING:
+    from deta_discord_interactions import registration, tokens
 
 
 class AbortError(Exception):
-    def __init__(self, http_code):
+    def __init__(self, http_code, headers: Optional[list[tuple[str, str]]] = None):
         self.http_code = http_code
+        self.headers = headers or []
 
 class PongResponse:
+    ENCODED = codec.dumps({"type": ResponseType.PONG})
+
     def encode(self):
-        return json.dumps({"type": ResponseType.PONG}).encode('UTF-8'), "application/json"
+        return self.ENCODED, "application/json"
 
 
 class InteractionType:
@@ -32,6 +49,89 @@ class InteractionType:
     MODAL_SUBMIT = 5
 
 
+class Invocation:
+    """
+    A command or handler bound to the arguments of an interaction, ready to be called.
+    Built by :meth:`DiscordInteractions.prepare_interaction`, so that the WSGI
+    and ASGI apps only differ in how they call it.
+
+    Attributes
+    ----------
+    context: Context
+        The Context of the interaction.
+    function: Callable
+        The command or handler, called with the context, ``args`` and ``kwargs``.
+    args: list
+        The positional arguments, such as the names of the subcommands.
+    kwargs: dict
+        The keyword arguments, such as the options.
+    is_async: bool
+        Whether the function defining the command or handler is an ``async def``.
+    convert: Callable
+        Converts its return value into the response.
+    defer_after: float, optional
+        How long to wait for it before deferring the response, see :meth:`DiscordInteractions.run_deferrable`.
+    update: bool
+        Whether to defer with ``DEFERRED_UPDATE_MESSAGE``, for message components.
+    """
+    __slots__ = ("context", "function", "args", "kwargs", "is_async", "convert", "defer_after", "update")
+
+    def __init__(
+        self,
+        context: Context,
+        function: Callable,
+        args: list,
+        kwargs: dict,
+        *,
+        is_async: bool,
+        convert: Callable,
+        defer_after: Optional[float] = None,
+        update: bool = False,
+    ):
+        self.context = context
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.is_async = is_async
+        self.convert = convert
+        self.defer_after = defer_after
+        self.update = update
+
+    def call(self):
+        "Calls the command or handler, returning its raw return value (awaitable if it is an ``async def``)"
+        return self.function(self.context, *self.args, **self.kwargs)
+
+
+# Set by DiscordInteractions.track_response for the request being handled
+response_sent_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar("response_sent", default=None)
+
+
+class ResponseBody(list):
+    """
+    WSGI response body calling ``on_close`` once the server is done sending it,
+    since the response is only sent after the WSGI app returns.
+    """
+
+    def __init__(self, body: Iterable[bytes], on_close: Callable[[], None]):
+        super().__init__(body)
+        self.on_close = on_close
+
+    def close(self):
+        self.on_close()
+
+
+def _message_or_modal(result) -> Union[Message, Modal]:
+    if isinstance(result, Modal):
+        return result
+    return Message.from_return_value(result)
+
+
+def _message(result) -> Message:
+    if isinstance(result, Modal):
+        raise ValueError("Cannot return a Modal to that interaction type.")
+    return Message.from_return_value(result)
+
+
 class DiscordInteractionsBlueprint:
     """
     Represents a collection of :class:`ApplicationCommand` s.
@@ -42,6 +142,9 @@ class DiscordInteractionsBlueprint:
     def __init__(self):
         self.discord_commands: dict[str, Command] = {}
         self.custom_id_handlers: dict[str, Callable] = {}
+        self.custom_id_decoders: dict[str, StateDecoder] = {}
+        self.custom_id_router = CustomIdRouter()
+        self.custom_id_defer_after: dict[str, float] = {}
         self.deta_actions: dict[str, Callable] = {}
 
     def add_command(
@@ -57,6 +160,7 @@ class DiscordInteractionsBlueprint:
         dm_permission: bool = None,
         name_localizations: dict[str, str] = None,
         description_localizations: dict[str, str] = None,
+        defer_after: Optional[float] = None,
     ):
         """
         Create and add a new :class:`ApplicationCommand`.
@@ -85,6 +189,11 @@ class DiscordInteractionsBlueprint:
             A permission integer defining the required permissions a user must have to run the command.
         dm_permission: bool
             Indicates whether the command can be used in DMs.
+        defer_after: float, optional
+            If set, runs the command in a worker thread, and if it has not
+            finished after this many seconds, responds with a deferred Message
+            and edits the result in once it finishes.
+            Discord expects a response within 3 seconds, so around 2 works well.
         """
         command = Command(
             command=command,
@@ -98,6 +207,7 @@ class DiscordInteractionsBlueprint:
             name_localizations=name_localizations,
             description_localizations=description_localizations,
             discord=self,
+            defer_after=defer_after,
         )
         self.discord_commands[command.name] = command
         return command
@@ -114,6 +224,7 @@ class DiscordInteractionsBlueprint:
         dm_permission: bool = None,
         name_localizations: dict[str, str] = None,
         description_localizations: dict[str, str] = None,
+        defer_after: Optional[float] = None,
     ) -> Callable[[Callable], Command]:
         """
         Decorator to create a new :class:`Command`.
@@ -140,6 +251,9 @@ class DiscordInteractionsBlueprint:
             A permission integer defining the required permissions a user must have to run the command
         dm_permission: bool
             Indicates whether the command can be used in DMs
+        defer_after: float, optional
+            If set, responds with a deferred Message if the command takes
+            longer than this many seconds. See :meth:`add_command`.
 
         Returns
         -------
@@ -159,6 +273,7 @@ class DiscordInteractionsBlueprint:
                 dm_permission=dm_permission,
                 name_localizations=name_localizations,
                 description_localizations=description_localizations,
+                defer_after=defer_after,
             )
             return command
 
@@ -220,7 +335,7 @@ class DiscordInteractionsBlueprint:
         self.discord_commands[name] = group
         return group
 
-    def add_custom_handler(self, handler: Callable, custom_id: str):
+    def add_custom_handler(self, handler: Callable, custom_id: str, *, defer_after: Optional[float] = None):
         """
         Add a handler for an incoming interaction with the specified custom ID.
 
@@ -229,17 +344,60 @@ class DiscordInteractionsBlueprint:
         handler: Callable
             The function to call to handle the incoming interaction.
         custom_id: str
-            The custom ID to respond to.
+            The custom ID to respond to. It can also be a pattern such as
+            ``page:{n:int}:{query}``, see :class:`routing.CustomIdRouter`,
+            whose parameters are passed to the handler as keyword arguments,
+            so they must come after the parameters receiving the state.
+        defer_after: float, optional
+            If set, runs the handler in a worker thread, and if it has not
+            finished after this many seconds, responds with a deferred update
+            and edits the result into the message once it finishes.
+
+        The state stored after the custom ID is converted according to the
+        annotations of the handler, see :class:`binding.StateDecoder`.
 
         Returns
         -------
         str
             The custom ID that the handler will respond to.
+            For patterns, a :class:`routing.CustomIdPattern`, whose ``build``
+            method creates the custom IDs matching it.
         """
+        if CustomIdRouter.is_pattern(custom_id):
+            self.custom_id_router.add(custom_id)
+            custom_id = CustomIdPattern(custom_id)
         self.custom_id_handlers[custom_id] = handler
+        self.custom_id_decoders[custom_id] = StateDecoder(handler)
+        if defer_after is not None:
+            self.custom_id_defer_after[custom_id] = defer_after
+        else:
+            self.custom_id_defer_after.pop(custom_id, None)
         return custom_id
 
-    def custom_handler(self, custom_id: str):
+    def match_custom_id(self, primary_id: str) -> tuple[str, dict]:
+        """
+        Finds the custom ID handler for the first line of a custom ID.
+
+        Returns
+        -------
+        str
+            The custom ID or pattern the handler was registered with.
+        dict
+            The parameters matched by the pattern, if any.
+
+        Raises
+        ------
+        KeyError
+            If no handler matches.
+        """
+        if primary_id in self.custom_id_handlers:
+            return primary_id, {}
+        pattern, params = self.custom_id_router.match(primary_id)
+        if pattern is None:
+            raise KeyError(primary_id)
+        return pattern, params
+
+    def custom_handler(self, custom_id: str, *, defer_after: Optional[float] = None):
         """
         Returns a decorator to register a handler for a custom ID.
 
@@ -247,6 +405,9 @@ class DiscordInteractionsBlueprint:
         ----------
         custom_id
             The custom ID to respond to.
+        defer_after: float, optional
+            If set, responds with a deferred update if the handler takes
+            longer than this many seconds. See :meth:`add_custom_handler`.
 
         Returns
         -------
@@ -255,7 +416,7 @@ class DiscordInteractionsBlueprint:
 
         def decorator(func):
             nonlocal custom_id
-            custom_id = self.add_custom_handler(func, custom_id)
+            custom_id = self.add_custom_handler(func, custom_id, defer_after=defer_after)
             return custom_id
 
         return decorator
@@ -268,10 +429,16 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
     webhook.
     """
     DISCORD_BASE_URL = "https://discord.com/api/v10"
+    # Discord expects the initial response within 3 seconds
+    DEFERRED_RESPONSE_TIMEOUT = 3.0
+    DEFERRED_EDIT_ATTEMPTS = 4
+    DEFERRED_EDIT_BACKOFF = 0.25
 
     def __init__(self):
         super().__init__()
         self.discord_token = None
+        self._token_lock = threading.Lock()
+        self._token_store = None
         try:
             self.discord_client_id = os.environ["DISCORD_CLIENT_ID"]
             self.discord_public_key = os.environ["DISCORD_PUBLIC_KEY"]
@@ -281,7 +448,21 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
             self.DONT_VALIDATE_SIGNATURE = os.getenv("DONT_VALIDATE_SIGNATURE", False)
         except KeyError:
             raise Exception("Please fill in the .env files with your application's credentials.")
-        self.__routes = {}
+        self.router = Router()
+        self.router.add("/discord", self.handle_discord_route)
+        self.router.add("/__space/v0/actions", self.handle_action_route)
+        self._signature_verifier = None
+        self._rate_limiter = None
+        self._rest = None
+        self._async_rest = None
+        self.permission_cache = PermissionCache()
+        self._background_executor = None
+        self.timing_enabled = False
+        self.emit_server_timing = False
+        self.timing_observers: list[Callable[[timing.RequestTimer], None]] = []
+        self.metrics = None
+        self.profiler: Optional[profiling.Profiler] = profiling.Profiler.from_env()
+        self.recorder: Optional[Recorder] = Recorder.from_env()
 
     def fetch_token(self):
         """
@@ -301,8 +482,8 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
             )
             return discord_token
 
-        response = requests.post(
-            self.DISCORD_BASE_URL + "/oauth2/token",
+        response = self.rest.post(
+            "/oauth2/token",
             data={
                 "grant_type": "client_credentials",
                 "scope": self.discord_scope,
@@ -328,11 +509,64 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
         dict[str, str]
             The Authorization header.
         """
-        if self.discord_token is None or time.time() > self.discord_token["expires_on"]:
-            self.discord_token = self.fetch_token()
-        return {"Authorization": f"Bearer {self.discord_token['access_token']}"}
+        token = self.discord_token
+        if token is None or time.time() > token["expires_on"]:
+            token = self.refresh_token()
+        return {"Authorization": f"Bearer {token['access_token']}"}
+
+    def refresh_token(self) -> dict:
+        """
+        Sets :attr:`discord_token` to a valid token and returns it.
+
+        Only one thread fetches a new token at a time, the others wait for it
+        and use the same one. If there is a :attr:`token_store` holding a valid
+        token (saved by another worker, for example), it is used instead of
+        fetching a new one, and newly fetched tokens are saved there.
+        """
+        with self._token_lock:
+            token = self.discord_token
+            if token is not None and time.time() <= token["expires_on"]:
+                # Another thread refreshed it while this one was waiting
+                return token
+
+            store = self._token_store
+            if store is not None:
+                from deta_discord_interactions import tokens
+                key = tokens.token_key(self.discord_client_id, self.discord_scope)
+                try:
+                    stored = store.get(key)
+                except Exception:
+                    traceback.print_exc()
+                    stored = None
+                if stored is not None and stored.valid:
+                    self.discord_token = stored.to_token()
+                    return self.discord_token
+
+            token = self.fetch_token()
+            if store is not None and not self.DONT_REGISTER_WITH_DISCORD:
+                try:
+                    store.put(key, tokens.StoredToken.from_token(token))
+                except Exception:
+                    traceback.print_exc()
+            self.discord_token = token
+            return token
+
+    @property
+    def token_store(self) -> Optional["tokens.TokenStore"]:
+        """
+        Where to share the OAuth2 token between workers, see :mod:`deta_discord_interactions.tokens`.
+        Can be set to a file path, or to a :class:`Database` of :class:`StoredToken`.
+        """
+        return self._token_store
+
+    @token_store.setter
+    def token_store(self, store):
+        if store is not None:
+            from deta_discord_interactions import tokens
+            store = tokens.open_store(store)
+        self._token_store = store
 
-    def update_commands(self, guild_id: str = None, *, from_inside_a_micro: bool = False):
+    def update_commands(self, guild_id: str = None, *, from_inside_a_micro: bool = False, cache=None):
         """
         Update the list of commands registered with Discord.
         This method will overwrite all existing commands.
@@ -345,44 +579,145 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
         from_inside_a_micro: bool
             If you really want to update the commands from inside the micro, set this to True.
             I would strongly advise against it though - at least, do not run this *every time* but from a specific command or route
+        cache: str | Path | Database, optional
+            Where to remember the registered commands, either a JSON file or a
+            :class:`Database` of :class:`RegisteredCommands`.
+            If the commands did not change since they were last registered,
+            their IDs are restored from it and nothing is sent to Discord.
+            See :mod:`deta_discord_interactions.registration`.
         """
         # It *would* work, it's just a big waste and may slow down the bot overall
         if (os.getenv("DETA_SPACE_APP") is not None) and (from_inside_a_micro == False):
             raise Exception("Cannot register commands from inside a Deta Micro")
 
+        if self.DONT_REGISTER_WITH_DISCORD:
+            for command in self.discord_commands.values():
+                command.id = command.name
+            return
+
+        overwrite_data = [command.dump() for command in self.discord_commands.values()]
+        result = self.register_commands(guild_id, overwrite_data, cache=cache)
+        for name, command_id in result.ids.items():
+            self.discord_commands[name].id = command_id
+
+    def update_commands_bulk(
+        self,
+        guild_ids: Iterable[str],
+        *,
+        max_workers: int = 4,
+        from_inside_a_micro: bool = False,
+        cache=None,
+    ) -> dict[str, "registration.RegistrationResult"]:
+        """
+        Register the commands in many guilds at once.
+
+        The registrations run in up to ``max_workers`` threads, sharing the
+        :attr:`rate_limiter`, which waits when Discord reports that a rate
+        limit was reached and retries the requests that got a 429.
+        Failing guilds do not stop the others.
+
+        Unlike :meth:`update_commands`, this does not set the ``id`` of the
+        :class:`Command` s, since each guild has different IDs.
+
+        Parameters
+        ----------
+        guild_ids: Iterable[str]
+            The IDs of the guilds to register the commands in.
+        max_workers: int, default 4
+            How many registrations to send at the same time.
+        from_inside_a_micro: bool
+            See :meth:`update_commands`.
+        cache: str | Path | Database, optional
+            See :meth:`update_commands`. Guilds whose commands did not change are skipped.
+
+        Returns
+        -------
+        dict[str, RegistrationResult]
+            The result of each guild, by guild ID. Check its ``error`` attribute.
+        """
+        from deta_discord_interactions import registration
+
+        if (os.getenv("DETA_SPACE_APP") is not None) and (from_inside_a_micro == False):
+            raise Exception("Cannot register commands from inside a Deta Micro")
+
+        guild_ids = list(dict.fromkeys(guild_ids))
+        if self.DONT_REGISTER_WITH_DISCORD:
+            ids = {name: name for name in self.discord_commands}
+            return {guild_id: registration.RegistrationResult(guild_id, ids=ids) for guild_id in guild_ids}
+
+        overwrite_data = [command.dump() for command in self.discord_commands.values()]
+        if cache is not None:
+            # Shared by the threads, so that they do not overwrite each other's writes
+            cache = registration.open_cache(cache)
+        # Fetch the token once, instead of once per thread
+        self.auth_headers()
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="discord-interactions-register") as executor:
+            futures = {
+                guild_id: executor.submit(self.register_commands, guild_id, overwrite_data, cache=cache)
+                for guild_id in guild_ids
+            }
+            for guild_id, future in futures.items():
+                try:
+                    results[guild_id] = future.result()
+                except Exception as err:
+                    results[guild_id] = registration.RegistrationResult(guild_id, error=err)
+        return results
+
+    def register_commands(self, guild_id: Optional[str], payload: list[dict], *, cache=None) -> "registration.RegistrationResult":
+        """
+        Send the commands in ``payload`` to Discord, overwriting the existing
+        ones in ``guild_id``, or the global commands if it is None.
+        Used by :meth:`update_commands` and :meth:`update_commands_bulk`.
+
+        Raises
+        ------
+        ValueError
+            If Discord rejected the commands.
+        RateLimitExceeded
+            If the request was still rate limited after retrying.
+        """
+        import requests
+        from deta_discord_interactions import registration
+
+        if cache is not None:
+            cache = registration.open_cache(cache)
+            key = registration.cache_key(self.discord_client_id, guild_id)
+            digest = registration.payload_hash(payload)
+            registered = cache.get(key)
+            if (
+                registered is not None
+                and registered.payload_hash == digest
+                and registered.ids.keys() >= self.discord_commands.keys()
+            ):
+                ids = {name: registered.ids[name] for name in self.discord_commands}
+                return registration.RegistrationResult(guild_id, ids=ids, cached=True)
+
         if guild_id:
-            url = (
-                f"{self.DISCORD_BASE_URL}/applications/"
-                f"{self.discord_client_id}/"
-                f"guilds/{guild_id}/commands"
-            )
+            path = f"/applications/{self.discord_client_id}/guilds/{guild_id}/commands"
         else:
-            url = (
-                f"{self.DISCORD_BASE_URL}/applications/"
-                f"{self.discord_client_id}/commands"
-            )
+            path = f"/applications/{self.discord_client_id}/commands"
 
-        overwrite_data = [command.dump() for command in self.discord_commands.values()]
+        response = self.rest.put(path, json=payload, headers=self.auth_headers())
 
-        if not self.DONT_REGISTER_WITH_DISCORD:
-            response = requests.put(
-                url, json=overwrite_data, headers=self.auth_headers()
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            raise ValueError(
+                f"Unable to register commands:"
+                f"{response.status_code} {response.text}"
             )
 
-            try:
-                response.raise_for_status()
-            except requests.exceptions.HTTPError:
-                raise ValueError(
-                    f"Unable to register commands:"
-                    f"{response.status_code} {response.text}"
-                )
+        ids = {
+            command["name"]: command["id"]
+            for command in response.json()
+            if command["name"] in self.discord_commands
+        }
 
-            for command in response.json():
-                if command["name"] in self.discord_commands:
-                    self.discord_commands[command["name"]].id = command["id"]
-        else:
-            for command in self.discord_commands.values():
-                command.id = command.name
+        if cache is not None:
+            cache.put(key, registration.RegisteredCommands(payload_hash=digest, ids=ids))
+        return registration.RegistrationResult(guild_id, ids=ids)
 
     def build_permission_overwrite_url(
         self,
@@ -413,6 +748,7 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
         *,
         guild_id: str,
         command_id: str = None,
+        use_cache: bool = True,
     ):
         """
         Get the list of permission overwrites in a specific guild for a
@@ -426,6 +762,9 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
             The ID of the guild to retrieve permissions from.
         command_id: str
             The ID of the command to retrieve permissions for.
+        use_cache: bool, default True
+            Whether to return the overwrites from :attr:`permission_cache` if known.
+            They are cached either way.
 
         Returns
         -------
@@ -438,14 +777,26 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
             guild_id=guild_id,
             command_id=command_id,
         )
+        command_id = command_id or command.id
+
+        if use_cache:
+            cached = self.permission_cache.get(guild_id, command_id)
+            if cached is not None:
+                return cached
 
-        response = requests.get(
+        response = self.rest.get(
             url,
             headers=self.auth_headers(),
         )
-        response.raise_for_status()
+        if response.status_code == 404 and error_code(response) == 10066:
+            # Unknown application command permissions: the command has no overwrites
+            permissions = []
+        else:
+            response.raise_for_status()
+            permissions = [Permission.from_dict(perm) for perm in response.json()["permissions"]]
 
-        return [Permission.from_dict(perm) for perm in response.json()]
+        self.permission_cache.put(guild_id, command_id, permissions)
+        return permissions
 
     def set_permission_overwrites(
         self,
@@ -475,13 +826,86 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
             command_id=command_id,
         )
 
-        response = requests.put(
+        response = self.rest.put(
             url,
             headers=self.auth_headers(),
             json={"permissions": [perm.dump() for perm in permissions]},
         )
         response.raise_for_status()
+        self.permission_cache.put(guild_id, command_id or command.id, permissions)
+
+    def get_guild_permission_overwrites(self, guild_id: str, *, use_cache: bool = True) -> dict[str, list[Permission]]:
+        """
+        Get the permission overwrites of every command in a guild, with a single request.
+
+        Parameters
+        ----------
+        guild_id: str
+            The ID of the guild to retrieve permissions from.
+        use_cache: bool, default True
+            Whether to return the overwrites from :attr:`permission_cache` if known.
+            They are cached either way.
+
+        Returns
+        -------
+        dict[str, list[Permission]]
+            The permission overwrites of each command that has any, by command ID.
+            An overwrite for the application ID applies to all of its commands.
+        """
+        if use_cache:
+            cached = self.permission_cache.get_guild(guild_id)
+            if cached is not None:
+                return cached
+
+        response = self.rest.get(
+            f"/applications/{self.discord_client_id}/guilds/{guild_id}/commands/permissions",
+            headers=self.auth_headers(),
+        )
+        response.raise_for_status()
 
+        overwrites = {
+            command["id"]: [Permission.from_dict(perm) for perm in command["permissions"]]
+            for command in response.json()
+        }
+        self.permission_cache.put_guild(guild_id, overwrites)
+        return overwrites
+
+    def set_guild_permission_overwrites(
+        self,
+        guild_id: str,
+        overwrites: dict[Union[str, Command], list[Permission]],
+        *,
+        use_cache: bool = True,
+    ) -> list[str]:
+        """
+        Overwrite the permission overwrites of several commands in a guild,
+        only sending those that are different from their current overwrites.
+
+        Parameters
+        ----------
+        guild_id: str
+            The ID of the guild to set the permissions in.
+        overwrites: dict[str | Command, list[Permission]]
+            The new overwrites, by command ID or :class:`.Command`.
+            Commands that are not included are left unchanged.
+        use_cache: bool, default True
+            Whether to compare against the overwrites in :attr:`permission_cache`
+            if known, rather than fetching them first.
+
+        Returns
+        -------
+        list[str]
+            The IDs of the commands whose overwrites were changed.
+        """
+        current = self.get_guild_permission_overwrites(guild_id, use_cache=use_cache)
+        changed = []
+        for command, permissions in overwrites.items():
+            command_id = command.id if isinstance(command, Command) else command
+            if permissions_key(permissions) == permissions_key(current.get(command_id, [])):
+                continue
+            self.set_permission_overwrites(permissions, guild_id=guild_id, command_id=command_id)
+            changed.append(command_id)
+        return changed
 
     def register_blueprint(self, blueprint: DiscordInteractionsBlueprint):
         """
@@ -498,8 +922,150 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
         """
         self.discord_commands.update(blueprint.discord_commands)
         self.custom_id_handlers.update(blueprint.custom_id_handlers)
+        self.custom_id_decoders.update(blueprint.custom_id_decoders)
+        for route in blueprint.custom_id_router:
+            self.custom_id_router.add(route.path)
+        self.custom_id_defer_after.update(blueprint.custom_id_defer_after)
         self.deta_actions.update(blueprint.deta_actions)
 
+    def get_command(self, data: dict) -> Command:
+        "Returns the :class:`Command` that incoming interaction data invokes"
+        command_name = data["data"]["name"]
+
+        command = self.discord_commands.get(command_name)
+
+        if command is None:
+            raise ValueError(f"Invalid command name: {command_name}")
+
+        return command
+
+    def prepare_interaction(self, data: dict) -> "Invocation":
+        """
+        Builds the :class:`Context` of an interaction and binds the arguments
+        of the command or handler it invokes, without calling it yet.
+
+        Parameters
+        ----------
+        data
+            Incoming interaction data, other than a PING.
+
+        Returns
+        -------
+        Invocation
+            The command or handler, ready to be called
+            by :meth:`run_invocation` or :meth:`ASGIApp.run_invocation`.
+        """
+        interaction_type = data.get("type")
+        if interaction_type == InteractionType.APPLICATION_COMMAND:
+            return self.prepare_command(data)
+        elif interaction_type == InteractionType.MESSAGE_COMPONENT:
+            return self.prepare_handler(data)
+        elif interaction_type == InteractionType.APPLICATION_COMMAND_AUTOCOMPLETE:
+            return self.prepare_autocomplete(data)
+        elif interaction_type == InteractionType.MODAL_SUBMIT:
+            return self.prepare_handler(data, allow_modal=False)
+        else:
+            raise RuntimeWarning(
+                f"Interaction type {interaction_type} is not yet supported"
+            )
+
+    def prepare_command(self, data: dict, command: Optional[Command] = None) -> "Invocation":
+        "Prepares the command invoked by incoming interaction data, see :meth:`prepare_interaction`"
+        if command is None:
+            command = self.get_command(data)
+        with timing.phase("context"):
+            context = Context.from_data(self, data)
+        with timing.phase("bind"):
+            args, kwargs = context.create_args(command)
+        target = command.get_subcommand(*args)
+        return Invocation(
+            context,
+            command.run,
+            args,
+            kwargs,
+            is_async=inspect.iscoroutinefunction(target.command),
+            convert=_message_or_modal,
+            defer_after=target.defer_after,
+        )
+
+    def prepare_autocomplete(self, data: dict, command: Optional[Command] = None) -> "Invocation":
+        "Prepares the autocomplete handler invoked by incoming interaction data, see :meth:`prepare_interaction`"
+        if command is None:
+            command = self.get_command(data)
+        with timing.phase("context"):
+            context = Context.from_data(self, data)
+        with timing.phase("bind"):
+            args, kwargs = context.create_autocomplete_args()
+        target = command.get_subcommand(*args)
+        return Invocation(
+            context,
+            command.run_autocomplete,
+            args,
+            kwargs,
+            is_async=inspect.iscoroutinefunction(target.autocomplete_handler),
+            convert=AutocompleteResult.from_return_value,
+        )
+
+    def prepare_handler(self, data: dict, *, allow_modal: bool = True) -> "Invocation":
+        "Prepares the custom ID handler invoked by incoming interaction data, see :meth:`prepare_interaction`"
+        with timing.phase("context"):
+            context = Context.from_data(self, data)
+        return self.bind_handler(context, allow_modal=allow_modal)
+
+    def bind_handler(self, context: Context, *, allow_modal: bool = True) -> "Invocation":
+        """
+        Finds the custom ID handler for the custom ID of ``context`` and binds its arguments.
+
+        Parameters
+        ----------
+        context: Context
+            The Context of the interaction, with its custom ID parsed.
+        allow_modal: bool, default True
+            Whether the handler may respond with a Modal,
+            which it cannot when handling a modal submission.
+        """
+        handler_id, context.handler_params = self.match_custom_id(context.primary_id)
+        # Grouped by handler rather than by custom ID, which can hold any state
+        timing.set_handler_id(handler_id)
+        profiling.set_handler_id(handler_id)
+        handler = self.custom_id_handlers[handler_id]
+        decoder = self.custom_id_decoders.get(handler_id)
+        with timing.phase("bind"):
+            args = context.create_handler_args(handler, decoder)
+            kwargs = context.create_handler_kwargs(handler, decoder)
+        return Invocation(
+            context,
+            handler,
+            args,
+            kwargs,
+            is_async=inspect.iscoroutinefunction(handler),
+            convert=_message_or_modal if allow_modal else _message,
+            defer_after=self.custom_id_defer_after.get(handler_id),
+            update=allow_modal,
+        )
+
+    def run_invocation(self, invocation: "Invocation"):
+        """
+        Calls a command or handler prepared by :meth:`prepare_interaction`,
+        deferring the response if it takes longer than its ``defer_after``.
+
+        Returns
+        -------
+        Message | Modal | AutocompleteResult
+            The response to the interaction.
+        """
+        def run():
+            with timing.phase("handler"):
+                result = resolve_awaitable(invocation.call())
+            return invocation.convert(result)
+
+        return self.run_deferrable(
+            invocation.context,
+            run,
+            invocation.defer_after,
+            update=invocation.update,
+        )
+
     def run_command(self, data: dict):
         """
         Run the corresponding :class:`Command` given incoming interaction
@@ -515,15 +1081,7 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
         Message
             The resulting message from the command.
         """
-
-        command_name = data["data"]["name"]
-
-        command = self.discord_commands.get(command_name)
-
-        if command is None:
-            raise ValueError(f"Invalid command name: {command_name}")
-
-        return command.make_context_and_run(discord=self, data=data)
+        return self.run_invocation(self.prepare_command(data))
 
     def run_handler(self, data: dict, *, allow_modal: bool = True):
         """
@@ -540,19 +1098,121 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
         Message
             The resulting message.
         """
+        return self.run_invocation(self.prepare_handler(data, allow_modal=allow_modal))
+
+    @property
+    def background_executor(self) -> BackgroundExecutor:
+        """
+        The :class:`BackgroundExecutor` used by :meth:`Context.run_in_background`
+        and by commands and handlers with ``defer_after``.
+        Created the first time it is needed. Assign a new one to change its limits.
+        """
+        if self._background_executor is None:
+            self._background_executor = BackgroundExecutor()
+        return self._background_executor
 
-        context = Context.from_data(self, data)
-        handler = self.custom_id_handlers[context.primary_id]
-        args = context.create_handler_args(handler)
-        result = handler(context, *args)
+    @background_executor.setter
+    def background_executor(self, executor: BackgroundExecutor):
+        self._background_executor = executor
 
-        if isinstance(result, Modal):
-            if allow_modal:
-                return result
-            else:
-                raise ValueError("Cannot return a Modal to that interaction type.")
+    def shutdown(self, wait: bool = True):
+        """
+        Stops the background executor, waiting for the remaining background tasks if ``wait`` is True.
+        Also stops the profiler, writing its last profiles, closes the connections to Discord
+        and the recording file.
+        """
+        if self._background_executor is not None:
+            self._background_executor.shutdown(wait=wait)
+            self._background_executor = None
+        if self.profiler is not None:
+            self.profiler.stop()
+        if self._rest is not None:
+            self._rest.close()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    async def aclose(self):
+        "Closes the asynchronous connections to Discord opened from the running event loop"
+        if self._async_rest is not None:
+            await self._async_rest.aclose()
+
+    def run_deferrable(self, context: Context, function: Callable[[], Union[Message, Modal]], defer_after: Optional[float], *, update: bool = False):
+        """
+        Calls ``function()`` and returns its result if it finishes within
+        ``defer_after`` seconds. Otherwise, returns a deferred Message, and
+        once it finishes, edits its result into the original message.
 
-        return Message.from_return_value(result)
+        Parameters
+        ----------
+        context: Context
+            The Context of the interaction being handled.
+        function: Callable
+            Runs the command or handler, returning a Message or Modal.
+        defer_after: float, optional
+            How long to wait for. If None, just calls ``function()``.
+        update: bool, default False
+            Whether to defer with ``DEFERRED_UPDATE_MESSAGE`` (for message components)
+            instead of ``DEFERRED_CHANNEL_MESSAGE_WITH_SOURCE``.
+        """
+        if defer_after is None:
+            return function()
+        try:
+            finished, result = self.background_executor.run_with_deadline(
+                functools.partial(contextvars.copy_context().run, profiling.follow(function)),
+                defer_after,
+                functools.partial(self.deliver_deferred, context, response_sent=response_sent_event.get()),
+            )
+        except BackgroundQueueFull as err:
+            # Better to risk missing the deadline than to drop the interaction
+            print(f"Cannot defer, running the handler without a deadline: {err}", flush=True)
+            return function()
+        if finished:
+            return result
+        return Message(deferred=True, update=update)
+
+    def deliver_deferred(self, context: Context, result: Union[Message, Modal], *, response_sent: Optional[threading.Event] = None):
+        """
+        Edits the result of a deferred command or handler into the original message.
+
+        Parameters
+        ----------
+        context: Context
+            The Context of the deferred interaction.
+        result: Message
+            What the command or handler returned.
+        response_sent: threading.Event, optional
+            Set once the deferred response has been sent, see :meth:`track_response`.
+            Waits up to :attr:`DEFERRED_RESPONSE_TIMEOUT` seconds for it before editing.
+            Editing is also retried with backoff while Discord answers with a 404,
+            as it may not have processed the deferred response yet.
+        """
+        import requests
+
+        if isinstance(result, Modal):
+            raise ValueError("Cannot respond with a Modal after the interaction has been deferred.")
+        if response_sent is not None:
+            response_sent.wait(self.DEFERRED_RESPONSE_TIMEOUT)
+        for attempt in range(self.DEFERRED_EDIT_ATTEMPTS):
+            try:
+                context.edit(result)
+                return
+            except requests.HTTPError as err:
+                if err.response is None or err.response.status_code != 404 or attempt == self.DEFERRED_EDIT_ATTEMPTS - 1:
+                    raise
+            time.sleep(self.DEFERRED_EDIT_BACKOFF * 2 ** attempt)
+
+    @contextlib.contextmanager
+    def track_response(self):
+        """
+        Context manager yielding an Event that the server sets once the response has been sent.
+        Results of the commands and handlers deferred inside it are only edited in after that.
+        """
+        sent = threading.Event()
+        token = response_sent_event.set(sent)
+        try:
+            yield sent
+        finally:
+            response_sent_event.reset(token)
 
     def run_autocomplete(self, data: dict):
         """
@@ -570,19 +1230,96 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
             The result of the autocomplete handler.
         """
 
-        command_name = data["data"]["name"]
-
-        command = self.discord_commands[command_name]
+        return self.run_invocation(self.prepare_autocomplete(data))
 
-        return command.make_context_and_run_autocomplete(discord=self, data=data)
-
-    def run_deta_action(self, event: dict[str, str]):
-        """Runs registered Deta Actions"""
+    def get_action(self, event: dict[str, str]) -> Callable:
+        "Returns the Deta Action an event runs, aborting with a 400 if it is not registered"
         action = self.deta_actions.get(event.get("id"))
         if action is None:
             self.abort(400, f"Deta event tried to run an unregistered action: {event!r}")
-        else:
-            return action(event)
+        return action
+
+    def run_deta_action(self, event: dict[str, str]):
+        """Runs registered Deta Actions"""
+        return resolve_awaitable(self.get_action(event)(event))
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """
+        The :class:`RateLimiter` used for the requests sent to Discord.
+        Created the first time it is needed.
+        """
+        if self._rate_limiter is None:
+            self._rate_limiter = RateLimiter()
+        return self._rate_limiter
+
+    @property
+    def rest(self) -> RESTClient:
+        """
+        The :class:`RESTClient` used for the requests sent to Discord,
+        sharing :attr:`rate_limiter`. Created the first time it is needed.
+        """
+        if self._rest is None:
+            self._rest = RESTClient(self.DISCORD_BASE_URL, rate_limiter=self.rate_limiter)
+        return self._rest
+
+    @rest.setter
+    def rest(self, client: RESTClient):
+        self._rest = client
+
+    @property
+    def async_rest(self) -> AsyncRESTClient:
+        """
+        The :class:`AsyncRESTClient` used for the asynchronous requests sent to Discord,
+        such as :meth:`Context.asend`, sharing :attr:`rate_limiter`.
+        Created the first time it is needed. Requires httpx.
+        """
+        if self._async_rest is None:
+            self._async_rest = AsyncRESTClient(self.DISCORD_BASE_URL, rate_limiter=self.rate_limiter)
+        return self._async_rest
+
+    @async_rest.setter
+    def async_rest(self, client: AsyncRESTClient):
+        self._async_rest = client
+
+    @property
+    def signature_verifier(self) -> SignatureVerifier:
+        """
+        The :class:`SignatureVerifier` used for incoming interactions.
+        Created the first time it is needed, then reused for every request.
+        """
+        if self._signature_verifier is None:
+            self._signature_verifier = SignatureVerifier(self.discord_public_key)
+        return self._signature_verifier
+
+    @property
+    def json_codec(self) -> codec.JSONCodec:
+        """
+        The JSON codec used to decode requests and encode responses.
+        Can be set to a codec name (``"orjson"``, ``"msgspec"``, ``"json"``)
+        or a :class:`JSONCodec`. This setting is shared by the whole process,
+        see :mod:`deta_discord_interactions.codec`.
+        """
+        return codec.get_codec()
+
+    @json_codec.setter
+    def json_codec(self, value):
+        codec.set_codec(value)
+
+    def warm_up(self):
+        """
+        Build everything that is otherwise created lazily on the first
+        request, such as the :class:`SignatureVerifier`.
+
+        Called by ``run_server(workers=...)`` before forking, so that the
+        worker processes share it instead of each building their own.
+        Also imports the dependencies that are otherwise imported when first needed.
+        """
+        import requests
+        import requests_toolbelt
+
+        if not self.DONT_VALIDATE_SIGNATURE:
+            _ = self.signature_verifier
 
     def verify_signature(self, request):
         """
@@ -602,28 +1339,15 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
         if signature is None or timestamp is None:
             self.abort(401, "Missing signature or timestamp")
 
-        message = f"{timestamp}{request['raw_data'].decode('UTF-8')}".encode("UTF-8")
-        verify_key = VerifyKey(bytes.fromhex(self.discord_public_key))
-        try:
-            verify_key.verify(message, bytes.fromhex(signature))
-        except BadSignatureError:
-            try:
-                body = (
-                    json.dumps(
-                        json.loads(
-                            request['raw_data'].decode('UTF-8')
-                        ),
-                        separators=(',', ':'),
-                    )
-                    .encode('UTF-8')
-                )
-                message = f"{timestamp}{body}".encode("UTF-8")
-                verify_key.verify(message, bytes.fromhex(signature))
-            except BadSignatureError:
-                self.abort(401, "Incorrect Signature")
-            else:
-                import warnings
-                warnings.warn("The whitespace for the request data may have been modified before being sent to discord-interactions")
+        with timing.phase("verify"):
+            verified = self.signature_verifier.verify(
+                signature,
+                timestamp,
+                request.get("raw_data", b""),
+                request.get("json"),
+            )
+        if not verified:
+            self.abort(401, "Incorrect Signature")
 
     def handle_interaction(self, request: dict):
         """
@@ -636,103 +1360,299 @@ class DiscordInteractions(DiscordInteractionsBlueprint):
             The response from the corresponding handler.
         """
         self.verify_signature(request)
+        timing.set_interaction(request["json"])
 
         interaction_type = request["json"].get("type")
         if interaction_type == InteractionType.PING:
             return PongResponse()
-        elif interaction_type == InteractionType.APPLICATION_COMMAND:
-            return self.run_command(request["json"])
-        elif interaction_type == InteractionType.MESSAGE_COMPONENT:
-            return self.run_handler(request["json"])
-        elif interaction_type == InteractionType.APPLICATION_COMMAND_AUTOCOMPLETE:
-            return self.run_autocomplete(request["json"])
-        elif interaction_type == InteractionType.MODAL_SUBMIT:
-            return self.run_handler(request["json"], allow_modal=False)
-        else:
-            raise RuntimeWarning(
-                f"Interaction type {interaction_type} is not yet supported"
-            )
+
+        with self.profile_interaction(request["json"]):
+            return self.run_invocation(self.prepare_interaction(request["json"]))
     
-    def route(self, route_path: str):
+    def route(self, route_path: str, methods: Optional[list[str]] = None):
         """Decorator to register a custom route.
         Used internally for Webhooks OAuth, but for most purposes,
         I would recommend to use another Micro with FastAPI or Flask instead.
 
+        The path may contain parameters such as `<int:user_id>`, which are
+        passed to the function in `request["path_params"]`.
+        See :mod:`deta_discord_interactions.routing` for the supported converters.
+
         Example usage:
         @app.route('/')
         def home(request, start_response, abort):
             start_response('200 OK', [])
             return ['Hello World!'.encode('UTF-8')]
+
+        @app.route('/users/<int:user_id>', methods=['GET'])
+        def user(request, start_response, abort):
+            start_response('200 OK', [])
+            return [f'User {request["path_params"]["user_id"]}'.encode('UTF-8')]
+
+        Parameters
+        ----------
+        route_path: str
+            The path to register the function for.
+        methods: list[str], optional
+            The HTTP methods the function accepts.
+            If omitted, accepts any method.
+            Requests with other methods get a 405 response.
         """
         def decorator(function):
-            self.__routes[route_path] = function
+            self.router.add(route_path, function, methods)
             return function
         return decorator
 
-    def __call__(self, environ: dict, start_response: Callable):
+    def parse_request(self, environ: dict) -> dict:
         """
-        Handles incoming interaction data
-        (WSGI)
+        Read the body and parse the path and query string of an incoming
+        WSGI request.
+
+        The body is read exactly once, and the same bytes object is used both
+        for JSON decoding and for verifying the signature.
+
+        Returns
+        -------
+        dict
+            The environ itself, with the added ``json``, ``raw_data``,
+            ``path`` and ``query_dict`` keys.
         """
-        try:
-            data = environ.copy()
-            raw_data = environ["wsgi.input"].read()
+        data = environ
+        with timing.phase("parse"):
+            content_length = environ.get("CONTENT_LENGTH")
+            if content_length:
+                raw_data = environ["wsgi.input"].read(int(content_length))
+            else:
+                raw_data = environ["wsgi.input"].read()
             if raw_data:
-                data["json"] = json.loads(raw_data.decode("UTF-8"))
+                data["json"] = codec.loads(raw_data)
                 data["raw_data"] = raw_data
 
-            data["path"] = data.get("PATH_INFO", '').split("?", 1)[0] or '/'
+        data["path"] = data.get("PATH_INFO", '').split("?", 1)[0] or '/'
 
+        if data["QUERY_STRING"]:
+            data["query_dict"] = dict(args.split('=', 1) for args in data["QUERY_STRING"].split("&"))
+        else:
+            data["query_dict"] = {}
+        return data
 
-            if data["QUERY_STRING"]:
-                data["query_dict"] = dict(args.split('=', 1) for args in data["QUERY_STRING"].split("&"))
-            else:
-                data["query_dict"] = {}
-            ### Handle Discord
-            if data['path'] == '/discord':
-                result = self.handle_interaction(data)
-                response, mimetype = result.encode()
-                status = "200 OK"
-                response_headers = [("Content-Type", mimetype)]
-                start_response(status, response_headers)
-                return [response]
+    def dispatch_request(self, data: dict, start_response: Callable) -> list[bytes]:
+        """
+        Send a parsed request to the corresponding route and return the
+        response body.
+        """
+        handler = self.resolve_route(data)
+        return resolve_awaitable(handler(data, start_response, self.abort))
+
+    def resolve_route(self, data: dict) -> Callable:
+        """
+        Find the function that handles a parsed request,
+        setting its ``path_params``.
+        Aborts with a 404 or 405 if there is none.
+        """
+        route, data["path_params"] = self.router.match(data["path"])
+        if route is None:
             ### Catch a common mistake
-            elif (  # If you set it like `https://example.deta.app` instead of `https://example.deta.app/discord`
-                data['path'] == '/' 
-                and '/' not in self.__routes 
-                and "Discord-Interactions" in data.get("HTTP_USER_AGENT")
+            if (  # If you set it like `https://example.deta.app` instead of `https://example.deta.app/discord`
+                data['path'] == '/'
+                and "Discord-Interactions" in data.get("HTTP_USER_AGENT", "")
                 and self.verify_signature(data)
             ):
                 raise Exception("Please set the path to `.../discord` on the Developer Portal, not just the Micro URL")
-            ### Deta special routes
-            elif data['path'] == "/__space/v0/actions":
-                event = data.get("json", {}).get("event")
-                if event is None:
-                    self.abort(400, 'Malformated deta space event')
-                result = self.run_deta_action(event)
-                if result:
-                    start_response("200 OK", [("Content-Type", "application/json")])
-                    return [json.dumps({"result": result}).encode("UTF-8")]
-                else:
-                    start_response('200 OK', [])
-                    return []
-            ### User defined routes (including Utils such as oauth)
-            elif data['path'] in self.__routes:
-                return self.__routes[data['path']](data, start_response, self.abort)
             ### Unexpected route
-            else:
-                self.abort(404, 'Page not found')
-        except AbortError as err:
+            self.abort(404, 'Page not found')
+
+        handler = route.get_handler(data.get("REQUEST_METHOD", "GET"))
+        if handler is None:
+            raise AbortError("405 Method Not Allowed", [("Allow", ", ".join(route.allowed_methods))])
+        return handler
+
+    def handle_discord_route(self, data: dict, start_response: Callable, abort: Callable) -> list[bytes]:
+        "Route for the interactions sent by Discord"
+        result = self.handle_interaction(data)
+        with timing.phase("encode"):
+            response, mimetype = result.encode()
+        status = "200 OK"
+        response_headers = [("Content-Type", mimetype)]
+        start_response(status, response_headers)
+        return [response]
+
+    def handle_action_route(self, data: dict, start_response: Callable, abort: Callable) -> list[bytes]:
+        "Route for Deta Space Actions"
+        result = self.run_deta_action(self.get_action_event(data))
+        return self.action_response(result, start_response)
+
+    def get_action_event(self, data: dict) -> dict[str, str]:
+        "Extracts the event from a Deta Space Action request"
+        event = data.get("json", {}).get("event")
+        if event is None:
+            self.abort(400, 'Malformated deta space event')
+        return event
+
+    def action_response(self, result, start_response: Callable) -> list[bytes]:
+        "Builds the response for a Deta Action that returned ``result``"
+        if result:
+            start_response("200 OK", [("Content-Type", "application/json")])
+            return [codec.dumps({"result": result})]
+        else:
+            start_response('200 OK', [])
+            return []
+
+    def error_response(self, err: Exception, start_response: Callable) -> list[bytes]:
+        "Builds the response for an exception raised while handling a request"
+        if isinstance(err, AbortError):
+            timing.set_outcome("abort")
             status = err.http_code
-            response_headers = [("Content-Type", "application/json")]
+            response_headers = [("Content-Type", "application/json"), *err.headers]
             start_response(status, response_headers)
-            return [json.dumps({"error": status}).encode("UTF-8")]
-        except Exception as err:
-            import traceback
-            traceback.print_exc()
-            print(f"Unexpected error: {err}", flush=True)
-            start_response('500 Internal Server Error', [("Content-Type", "application/json")])
-            return [json.dumps({"error": str(type(err))}).encode("UTF-8")]
+            return [codec.dumps({"error": status})]
+        timing.set_outcome("exception")
+        traceback.print_exception(type(err), err, err.__traceback__)
+        print(f"Unexpected error: {err}", flush=True)
+        start_response('500 Internal Server Error', [("Content-Type", "application/json")])
+        return [codec.dumps({"error": str(type(err))})]
+
+    def enable_timing(self, *, server_timing: bool = False):
+        """
+        Start recording how long each phase of each request takes.
+        See :mod:`deta_discord_interactions.timing` for the phases.
+
+        Parameters
+        ----------
+        server_timing: bool, default False
+            Whether to add a ``Server-Timing`` header to the responses,
+            which shows the phases in the browser developer tools.
+            Only enable it if you do not mind exposing these timings.
+        """
+        self.timing_enabled = True
+        self.emit_server_timing = server_timing
+
+    def enable_profiling(
+        self,
+        output=None,
+        *,
+        sample_rate: float = 1.0,
+        slower_than: Optional[float] = None,
+        interval: float = 0.005,
+    ) -> profiling.Profiler:
+        """
+        Start sampling the stacks of the interactions, aggregating them per command.
+        See :class:`profiling.Profiler` for the parameters.
+        Can also be enabled with the ``DISCORD_INTERACTIONS_PROFILE`` environment variables.
+
+        Returns
+        -------
+        Profiler
+            The profiler, also available as ``app.profiler``.
+        """
+        if self.profiler is not None:
+            self.profiler.stop()
+        self.profiler = profiling.Profiler(
+            output,
+            sample_rate=sample_rate,
+            slower_than=slower_than,
+            interval=interval,
+        )
+        return self.profiler
+
+    def enable_recording(
+        self,
+        path,
+        *,
+        scrub_tokens: bool = True,
+        paths: Iterable[str] = ("/discord",),
+        sample_rate: float = 1.0,
+    ) -> Recorder:
+        """
+        Start appending the requests received to a JSON Lines file, to replay them later.
+        See :class:`recorder.Recorder` for the parameters.
+        Can also be enabled with the ``DISCORD_INTERACTIONS_RECORD`` environment variable.
+
+        Returns
+        -------
+        Recorder
+            The recorder, also available as ``app.recorder``.
+        """
+        if self.recorder is not None:
+            self.recorder.close()
+        self.recorder = Recorder(path, scrub_tokens=scrub_tokens, paths=paths, sample_rate=sample_rate)
+        return self.recorder
+
+    def profile_interaction(self, data: dict, *, attach_thread: bool = True):
+        "Context manager profiling the interaction handled inside it, if profiling is enabled and it was picked"
+        if self.profiler is None:
+            return profiling.NO_PROFILE
+        return self.profiler.profile(data, attach_thread=attach_thread)
+
+    def add_timing_observer(self, observer: Callable[[timing.RequestTimer], None]):
+        """
+        Register a function to call with the :class:`RequestTimer` of each
+        request once it finishes. Enables timing if it was not yet.
+        """
+        self.timing_enabled = True
+        self.timing_observers.append(observer)
+
+    def start_timer(self, path: str, start_response: Callable) -> tuple[timing.RequestTimer, contextvars.Token, Callable]:
+        """
+        Starts timing a request, returning the timer, the token for
+        :func:`timing.deactivate` and the ``start_response`` to use,
+        which adds the ``Server-Timing`` header if enabled.
+        """
+        timer = timing.RequestTimer(path)
+        token = timing.activate(timer)
+        if not self.emit_server_timing:
+            return timer, token, start_response
+
+        def timed_start_response(status, headers, *args):
+            return start_response(status, [*headers, ("Server-Timing", timer.server_timing())], *args)
+        return timer, token, timed_start_response
+
+    def finish_timer(self, timer: timing.RequestTimer, token: contextvars.Token):
+        "Stops timing a request and passes its timer to the observers"
+        timer.finish()
+        timing.deactivate(token)
+        for observer in self.timing_observers:
+            try:
+                observer(timer)
+            except Exception:
+                traceback.print_exc()
+
+    @contextlib.contextmanager
+    def observe_request(self, environ: dict, start_response: Callable):
+        """
+        Context manager recording and timing the request handled inside it, if enabled.
+        Yields the ``start_response`` to use, which records the response status.
+        Used by both the WSGI app and the :class:`ASGIApp`.
+        """
+        recording = None
+        if self.recorder is not None:
+            start_response, recording = self.recorder.start(environ, start_response)
+        timer = None
+        if self.timing_enabled:
+            timer, token, start_response = self.start_timer(environ.get("PATH_INFO"), start_response)
+        try:
+            yield start_response
+        finally:
+            if timer is not None:
+                self.finish_timer(timer, token)
+            if recording is not None:
+                try:
+                    self.recorder.finish(recording)
+                except Exception:
+                    traceback.print_exc()
+
+    def __call__(self, environ: dict, start_response: Callable):
+        """
+        Handles incoming interaction data
+        (WSGI)
+        """
+        with self.observe_request(environ, start_response) as start_response, self.track_response() as sent:
+            try:
+                data = self.parse_request(environ)
+                body = self.dispatch_request(data, start_response)
+            except Exception as err:
+                body = self.error_response(err, start_response)
+        return ResponseBody(body, sent.set)
 
     def abort(self, code: int, reason: str) -> NoReturn:
         raise AbortError(f"{code} {reason}")
@@ -3,11 +3,39 @@ WARNING: Appropriated only for local testing and deta space.
 Does not supports HTTPS on it's own, amongst other security negligences"""
 
 import functools
+import gc
 import os
-from io import BytesIO
+import selectors
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from typing import Callable, NoReturn, Optional
 
+class RequestBody:
+    """`wsgi.input` reading at most `length` bytes straight from the connection,
+    so that the body is not copied into an intermediate buffer before the app reads it."""
+    def __init__(self, rfile, length: int):
+        self.rfile = rfile
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        if size == 0:
+            return b""
+        data = self.rfile.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def drain(self):
+        "Discards whatever the app did not read, so the next request on the connection starts at the right place"
+        while self.remaining > 0 and self.read(65536):
+            pass
+
+
 class RequestHandler(BaseHTTPRequestHandler):
     def __init__(self, app: Callable, log_requests: bool, should_flush: bool, *args, **kwargs):
         self.app = app
@@ -16,28 +44,36 @@ class RequestHandler(BaseHTTPRequestHandler):
         super().__init__(*args, **kwargs)
 
     def send_request_to_app(self):
-        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = RequestBody(self.rfile, int(self.headers.get("Content-Length", 0)))
         query = self.path.rsplit('?', 1)[-1] if '?' in self.path else ''
         headers = {f"HTTP_{header}".upper().replace("-", "_"): value for header, value in self.headers.items()}
         environ = {
-            "wsgi.input": BytesIO(body),
-            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": body,
+            "CONTENT_LENGTH": str(body.remaining),
+            "REQUEST_METHOD": self.command,
             "PATH_INFO": self.path,
             "REMOTE_ADDR": "127.0.0.1",
             'QUERY_STRING': query,
             **headers,
         }
+        sent_headers = set()
         def _start_response(code: str, headers: list[tuple[str, str]]):
             code_number, code_reason = code.split(' ', 1)
             code_number = int(code_number)
             self.send_response(code_number, code_reason)
             for header in headers:
+                sent_headers.add(header[0].lower())
                 self.send_header(*header)
         try:
             output = self.app(environ, _start_response)
+            if "content-length" not in sent_headers:
+                # Required to keep HTTP/1.1 connections alive
+                output = list(output)
+                self.send_header("Content-Length", str(sum(len(out) for out in output)))
             self.end_headers()
             for out in output:
                 self.wfile.write(out)
+            body.drain()
         finally:
             if self.__should_flush:
                 import sys
@@ -54,9 +90,203 @@ class RequestHandler(BaseHTTPRequestHandler):
         if self.__should_log_requests:
             return super().log_request(*args, **kwargs)
 
-def get_server(app: Callable, port: Optional[int] = None, log_requests: bool = False, should_flush: bool = True):
+
+class KeepAliveRequestHandler(RequestHandler):
+    """Request Handler that keeps connections open between requests (HTTP/1.1).
+    Only handles the requests already received on the connection, then leaves it to
+    the `PooledHTTPServer` to wait for the next one without holding a worker."""
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, which would otherwise stall
+    # on delayed ACKs on connections that stay open
+    disable_nagle_algorithm = True
+
+    def __init__(self, keep_alive_timeout: float, *args, **kwargs):
+        self.timeout = keep_alive_timeout
+        super().__init__(*args, **kwargs)
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self.has_pending_request():
+            self.handle_one_request()
+
+    def has_pending_request(self) -> bool:
+        "Whether (part of) the next request was already received, without waiting for it"
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTP Server that handles requests in a bounded thread pool.
+
+    At most `max_workers` requests are handled at the same time,
+    and at most `max_queued_requests` more wait for a free worker.
+    Requests beyond that are rejected with `503 Service Unavailable`.
+
+    Connections waiting for their next request do not hold a worker:
+    a single thread watches them, hands them to the pool once a request arrives,
+    and closes them after `keep_alive_timeout` seconds without one.
+    """
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        RequestHandlerClass: Callable,
+        *,
+        max_workers: Optional[int] = None,
+        backlog: int = 128,
+        max_queued_requests: int = 64,
+        keep_alive_timeout: float = 5.0,
+        bind_and_activate: bool = True,
+    ):
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        self.request_queue_size = backlog
+        self.keep_alive_timeout = keep_alive_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="discord-interactions-http")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued_requests)
+        # Connections handed to the idle connections thread, which is started by the first one,
+        # so that each forked worker process starts its own
+        self._parked: list[tuple[socket.socket, tuple]] = []
+        self._parked_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._wakeup: Optional[tuple[socket.socket, socket.socket]] = None
+        self._closed = False
+        super().__init__(server_address, RequestHandlerClass, bind_and_activate)
+
+    def process_request(self, request, client_address):
+        # New connections wait for their first request like idle ones
+        self.park(request, client_address)
+
+    def park(self, request, client_address):
+        "Waits for the next request on the connection without holding a worker"
+        with self._parked_lock:
+            if self._closed:
+                self.shutdown_request(request)
+                return
+            if self._watcher is None:
+                self._selector = selectors.DefaultSelector()
+                self._wakeup = socket.socketpair()
+                self._wakeup[1].setblocking(False)
+                self._selector.register(self._wakeup[0], selectors.EVENT_READ)
+                self._watcher = threading.Thread(target=self._watch_idle, name="discord-interactions-http-idle", daemon=True)
+                self._watcher.start()
+            self._parked.append((request, client_address))
+            self._wake_watcher()
+
+    def _wake_watcher(self):
+        try:
+            self._wakeup[1].send(b"\0")
+        except OSError:
+            pass  # Already full of wake ups that were not read yet
+
+    def _watch_idle(self):
+        # The connections waiting for a request, in the order they started waiting
+        idle: dict[socket.socket, tuple[tuple, float]] = {}
+        while True:
+            timeout = max(0, next(iter(idle.values()))[1] - time.monotonic()) if idle else None
+            events = self._selector.select(timeout)
+            with self._parked_lock:
+                if self._closed:
+                    break
+                parked, self._parked = self._parked, []
+            deadline = time.monotonic() + self.keep_alive_timeout
+            for request, client_address in parked:
+                self._selector.register(request, selectors.EVENT_READ)
+                idle[request] = (client_address, deadline)
+            for key, _ in events:
+                if key.fileobj is self._wakeup[0]:
+                    self._wakeup[0].recv(4096)
+                    continue
+                client_address, _ = idle.pop(key.fileobj)
+                self._selector.unregister(key.fileobj)
+                self.dispatch(key.fileobj, client_address)
+            now = time.monotonic()
+            while idle:
+                request, (_, request_deadline) = next(iter(idle.items()))
+                if request_deadline > now:
+                    break
+                del idle[request]
+                self._selector.unregister(request)
+                self.shutdown_request(request)
+        for request in [*idle, *(request for request, _ in self._parked)]:
+            self.shutdown_request(request)
+        self._selector.close()
+
+    def dispatch(self, request, client_address):
+        "Hands a connection with a pending request to the pool, or rejects it if there are too many queued requests"
+        if not self._slots.acquire(blocking=False):
+            self.reject_request(request)
+            return
+        self._executor.submit(self.process_request_worker, request, client_address)
+
+    def process_request_worker(self, request, client_address):
+        keep_alive = False
+        try:
+            handler = self.finish_request(request, client_address)
+            keep_alive = not handler.close_connection
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self._slots.release()
+            if keep_alive:
+                self.park(request, client_address)
+            else:
+                self.shutdown_request(request)
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def reject_request(self, request):
+        "Responds with `503 Service Unavailable` when there are too many queued requests"
+        try:
+            request.sendall(
+                b"HTTP/1.1 503 Service Unavailable\r\n"
+                b"Content-Length: 0\r\n"
+                b"Connection: close\r\n\r\n"
+            )
+            # Closing with an unread request would reset the connection before the client reads the response
+            request.setblocking(False)
+            request.recv(65536)
+        except OSError:
+            pass
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        with self._parked_lock:
+            self._closed = True
+            watcher = self._watcher
+            if watcher is not None:
+                self._wake_watcher()
+        if watcher is not None:
+            watcher.join()
+            for sock in self._wakeup:
+                sock.close()
+        self._executor.shutdown(wait=True)
+
+
+def get_server(
+    app: Callable,
+    port: Optional[int] = None,
+    log_requests: bool = False,
+    should_flush: bool = True,
+    *,
+    production: bool = False,
+    max_workers: Optional[int] = None,
+    backlog: int = 128,
+    max_queued_requests: int = 64,
+    keep_alive_timeout: float = 5.0,
+    reuse_port: bool = False,
+):
     """Prepares a HTTP Server that calls the app for each request.
-    
+
     Parameters:
     -----------
     app : WSGI compliant callable
@@ -70,15 +300,163 @@ def get_server(app: Callable, port: Optional[int] = None, log_requests: bool = F
     should_flush : bool, default True
         If set to True, flushes the sys.stdout and sys.stderr after each request.
         In other words, leave it as True to fix common logging problems.
+    production : bool, default False
+        If set to True, handles requests concurrently in a bounded thread pool
+        and keeps connections alive between requests (HTTP/1.1).
+        Otherwise, handles one request at a time (HTTP/1.0).
+    max_workers : int, optional
+        Production mode only. Maximum amount of requests handled at the same time.
+        Idle keep-alive connections do not count towards it.
+        Defaults to the number of CPUs + 4, up to 32.
+    backlog : int, default 128
+        Production mode only. Size of the listen backlog of the socket.
+    max_queued_requests : int, default 64
+        Production mode only. How many requests may wait for a free worker
+        before new ones are rejected with `503 Service Unavailable`.
+    keep_alive_timeout : float, default 5.0
+        Production mode only. Seconds before an idle connection is closed.
+    reuse_port : bool, default False
+        If set to True, sets SO_REUSEPORT on the listening socket,
+        allowing multiple processes to listen on the same port.
     """
     if port is None:
         port = int(os.getenv("PORT", "8080"))
     server_address = ('', port)
-    handler = functools.partial(RequestHandler, app, log_requests, should_flush)
-    server = HTTPServer(server_address, handler)
+    if production:
+        handler = functools.partial(KeepAliveRequestHandler, keep_alive_timeout, app, log_requests, should_flush)
+        server = PooledHTTPServer(
+            server_address,
+            handler,
+            max_workers=max_workers,
+            backlog=backlog,
+            max_queued_requests=max_queued_requests,
+            keep_alive_timeout=keep_alive_timeout,
+            bind_and_activate=False,
+        )
+    else:
+        handler = functools.partial(RequestHandler, app, log_requests, should_flush)
+        server = HTTPServer(server_address, handler, bind_and_activate=False)
+    try:
+        if reuse_port:
+            server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        server.server_bind()
+        server.server_activate()
+    except BaseException:
+        server.server_close()
+        raise
     return server
 
-def run_server(app: Callable, port: Optional[int] = None, log_requests: bool = False, should_flush: bool = True) -> NoReturn:
+class PreforkSupervisor:
+    """Runs a HTTP Server in multiple forked worker processes and restarts them if they die.
+
+    Parameters
+    ----------
+    create_server : Callable[[], HTTPServer]
+        Called once before forking (sharing the listening socket with every worker),
+        or once in each worker if `reuse_port` is set.
+    workers : int
+        How many worker processes to keep running.
+    reuse_port : bool, default False
+        If set to True, each worker creates its own socket using SO_REUSEPORT,
+        letting the kernel balance connections between them.
+        Otherwise, every worker accepts from the same inherited socket.
+    restart_delay : float, default 1.0
+        Minimum time between two restarts of the same worker slot,
+        so that a worker crashing on startup does not cause a fork loop.
+    """
+    def __init__(self, create_server: Callable, workers: int, *, reuse_port: bool = False, restart_delay: float = 1.0):
+        if not hasattr(os, "fork"):
+            raise NotImplementedError("Multiple workers are only supported on platforms with os.fork")
+        self.create_server = create_server
+        self.workers = workers
+        self.reuse_port = reuse_port
+        self.restart_delay = restart_delay
+        self.server = None
+        self.children: dict[int, int] = {}  # pid: slot
+        self._last_start: dict[int, float] = {}
+        self._stopping = False
+
+    def spawn(self, slot: int) -> Optional[int]:
+        delay = self._last_start.get(slot, 0) + self.restart_delay - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if self._stopping:  # Received a signal while waiting
+            return None
+        self._last_start[slot] = time.monotonic()
+        pid = os.fork()
+        if pid == 0:  # Worker process
+            exit_code = 1
+            try:
+                signal.signal(signal.SIGINT, signal.SIG_IGN)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                server = self.server if self.server is not None else self.create_server()
+                server.serve_forever()
+                exit_code = 0
+            except BaseException:
+                import traceback
+                traceback.print_exc()
+            finally:
+                os._exit(exit_code)
+        self.children[pid] = slot
+        return pid
+
+    def stop(self, *_):
+        "Stops every worker. Also used as the signal handler for SIGINT and SIGTERM."
+        self._stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        "Starts the workers and supervises them until SIGINT or SIGTERM is received."
+        if not self.reuse_port:
+            self.server = self.create_server()
+        # Objects that already exist are never collected, so the garbage collector
+        # does not touch (and copy) the memory pages the workers share with this process
+        gc.freeze()
+
+        previous_handlers = {
+            sig: signal.signal(sig, self.stop)
+            for sig in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            for slot in range(self.workers):
+                self.spawn(slot)
+            while self.children:
+                try:
+                    pid, _ = os.wait()
+                except ChildProcessError:
+                    break
+                except InterruptedError:
+                    continue
+                slot = self.children.pop(pid, None)
+                if slot is not None and not self._stopping:
+                    self.spawn(slot)
+        finally:
+            self.stop()
+            for sig, handler in previous_handlers.items():
+                signal.signal(sig, handler)
+            gc.unfreeze()
+            if self.server is not None:
+                self.server.server_close()
+
+
+def run_server(
+    app: Callable,
+    port: Optional[int] = None,
+    log_requests: bool = False,
+    should_flush: bool = True,
+    *,
+    production: bool = False,
+    max_workers: Optional[int] = None,
+    backlog: int = 128,
+    max_queued_requests: int = 64,
+    keep_alive_timeout: float = 5.0,
+    workers: int = 1,
+    reuse_port: bool = False,
+) -> NoReturn:
     """Starts a HTTP Server that calls the app for each request.
 
     Parameters:
@@ -94,6 +472,34 @@ def run_server(app: Callable, port: Optional[int] = None, log_requests: bool = F
     should_flush : bool, default True
         If set to True, flushes the sys.stdout and sys.stderr after each request.
         In other words, True fixes common logging problems.
+    production : bool, default False
+        If set to True, handles requests concurrently and keeps connections alive.
+        See `get_server` for details and the other production mode parameters.
+    workers : int, default 1
+        How many processes to serve the app from. If more than one, forks the
+        worker processes after calling `app.warm_up()` (if it exists), so that
+        they share the commands and caches built until then, and restarts any
+        worker that dies. Only supported on platforms with `os.fork`.
+    reuse_port : bool, default False
+        Only used with multiple workers. If set to True, each worker listens on
+        its own socket using SO_REUSEPORT instead of sharing a single one.
     """
-    server = get_server(app, port=port, log_requests=log_requests, should_flush=should_flush)
-    server.serve_forever()
+    create_server = functools.partial(
+        get_server,
+        app,
+        port=port,
+        log_requests=log_requests,
+        should_flush=should_flush,
+        production=production,
+        max_workers=max_workers,
+        backlog=backlog,
+        max_queued_requests=max_queued_requests,
+        keep_alive_timeout=keep_alive_timeout,
+        reuse_port=reuse_port,
+    )
+    if workers > 1:
+        if hasattr(app, "warm_up"):
+            app.warm_up()
+        PreforkSupervisor(create_server, workers, reuse_port=reuse_port).run()
+    else:
+        create_server().serve_forever()
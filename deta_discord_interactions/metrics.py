@@ -0,0 +1,228 @@
+"""In-process request counters and latency histograms, in the Prometheus text format.
+
+Built on top of :mod:`deta_discord_interactions.timing`: each finished request
+is counted by interaction type, command (including its subcommands) or custom
+ID primary ID, and outcome, and its duration is added to a histogram.
+
+Example usage:
+    metrics = enable_metrics(app)  # Serves the metrics on `/metrics`
+    ...
+    metrics.summary()[("application_command", "ping")]["p99"]
+"""
+import bisect
+import threading
+from typing import Iterable, Optional
+
+from deta_discord_interactions.discord import DiscordInteractions
+from deta_discord_interactions.timing import RequestTimer, interaction_labels
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 3.0, 5.0, 10.0)
+"Upper bounds of the histogram buckets, in seconds. Discord waits 3 seconds for a response."
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """
+    Counts observed values in fixed buckets.
+
+    Attributes
+    ----------
+    buckets: tuple[float, ...]
+        The upper bound of each bucket, in increasing order.
+        Values above the last one go to an implicit ``+Inf`` bucket.
+    counts: list[int]
+        How many values fell in each bucket (not cumulative), ``+Inf`` last.
+    sum: float
+        The sum of all observed values.
+    count: int
+        How many values have been observed.
+    """
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[int]:
+        "Returns how many values were at most each bucket's upper bound, ``+Inf`` last"
+        result = []
+        total = 0
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimates the ``q`` quantile (between 0 and 1) by interpolating
+        inside the bucket it falls in, like Prometheus' ``histogram_quantile``.
+        Returns None if nothing has been observed.
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        previous = 0
+        for index, total in enumerate(self.cumulative()):
+            if total >= rank and total > previous:
+                if index == len(self.buckets):
+                    # Above every bucket, the best estimate is the largest bound
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - previous) / (total - previous)
+            previous = total
+        return self.buckets[-1]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    Collects the metrics of the requests handled by an app.
+    Meant to be used as a timing observer, see :func:`enable_metrics`.
+
+    Attributes
+    ----------
+    buckets: tuple[float, ...]
+        The histogram buckets, in seconds.
+    requests: dict[tuple[str, str, str], int]
+        How many interactions were handled, by type, name and outcome.
+    latency: dict[tuple[str, str], Histogram]
+        How long the interactions took, by type and name.
+    phases: dict[str, Histogram]
+        How long each phase took, see :mod:`deta_discord_interactions.timing`.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.requests: dict[tuple[str, str, str], int] = {}
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.phases: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, timer: RequestTimer):
+        "Records a finished request. Requests that are not interactions are ignored."
+        if timer.interaction is None:
+            return
+        labels = interaction_labels(timer.interaction, timer.handler_id)
+        duration = timer.total_ns / 1e9
+        with self._lock:
+            key = (*labels, timer.outcome)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.latency.get(labels)
+            if histogram is None:
+                histogram = self.latency[labels] = Histogram(self.buckets)
+            histogram.observe(duration)
+            for name, duration_ns in timer.phases.items():
+                histogram = self.phases.get(name)
+                if histogram is None:
+                    histogram = self.phases[name] = Histogram(self.buckets)
+                histogram.observe(duration_ns / 1e9)
+
+    def summary(self, quantiles: tuple[float, ...] = (0.5, 0.99)) -> dict[tuple[str, str], dict[str, float]]:
+        """
+        Returns the count and the estimated latency quantiles
+        (as ``p50``, ``p99``, ...) of each command and handler, in seconds.
+        """
+        with self._lock:
+            return {
+                labels: {
+                    "count": histogram.count,
+                    **{f"p{q * 100:g}": histogram.quantile(q) for q in quantiles},
+                }
+                for labels, histogram in self.latency.items()
+            }
+
+    def render(self) -> str:
+        "Formats the metrics in the Prometheus text exposition format"
+        lines = [
+            "# HELP discord_interactions_requests_total Interactions handled, by outcome.",
+            "# TYPE discord_interactions_requests_total counter",
+        ]
+        with self._lock:
+            for (type_name, name, outcome), count in sorted(self.requests.items()):
+                labels = _format_labels((("type", type_name), ("name", name), ("outcome", outcome)))
+                lines.append(f"discord_interactions_requests_total{{{labels}}} {count}")
+
+            lines.append("# HELP discord_interactions_request_duration_seconds Time taken to respond to interactions.")
+            lines.append("# TYPE discord_interactions_request_duration_seconds histogram")
+            for (type_name, name), histogram in sorted(self.latency.items()):
+                self._render_histogram(
+                    lines,
+                    "discord_interactions_request_duration_seconds",
+                    (("type", type_name), ("name", name)),
+                    histogram,
+                )
+
+            lines.append("# HELP discord_interactions_phase_duration_seconds Time taken by each phase of the requests.")
+            lines.append("# TYPE discord_interactions_phase_duration_seconds histogram")
+            for name, histogram in self.phases.items():
+                self._render_histogram(
+                    lines,
+                    "discord_interactions_phase_duration_seconds",
+                    (("phase", name),),
+                    histogram,
+                )
+        lines.append("")
+        return "\n".join(lines)
+
+    def _render_histogram(self, lines: list[str], metric: str, labels: tuple[tuple[str, str], ...], histogram: Histogram):
+        bounds = (*histogram.buckets, float("inf"))
+        for bound, total in zip(bounds, histogram.cumulative()):
+            bucket_labels = _format_labels((*labels, ("le", _format_number(bound))))
+            lines.append(f"{metric}_bucket{{{bucket_labels}}} {total}")
+        formatted = _format_labels(labels)
+        lines.append(f"{metric}_sum{{{formatted}}} {_format_number(histogram.sum)}")
+        lines.append(f"{metric}_count{{{formatted}}} {histogram.count}")
+
+
+def enable_metrics(app: DiscordInteractions, /, *, path: str = "/metrics", buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Metrics:
+    """Starts collecting metrics and serves them on ``path`` in the Prometheus text format.
+
+    Enables timing on the app, and sets ``app.metrics``.
+    The metrics are kept per process, so with multiple workers each one reports its own.
+
+    Usage:
+    `metrics = enable_metrics(app)`
+
+    Parameters
+    ----------
+    app : DiscordInteractions
+        The app to collect metrics of.
+    path : str, default '/metrics'
+        Where to serve the metrics. Make sure it is not exposed publicly
+        if you do not want others to see your command names and latencies.
+    buckets : tuple[float, ...]
+        The upper bounds of the latency histogram buckets, in seconds.
+    """
+    metrics = Metrics(buckets)
+    app.metrics = metrics
+    app.add_timing_observer(metrics.observe)
+
+    def handle_metrics(request, start_response, abort):
+        start_response("200 OK", [("Content-Type", CONTENT_TYPE)])
+        return [metrics.render().encode("utf-8")]
+
+    app.route(path, methods=["GET"])(handle_metrics)
+    return metrics
@@ -1,7 +1,7 @@
-import json
 from typing import Union
 from dataclasses import dataclass
 
+from deta_discord_interactions import codec
 from deta_discord_interactions.models.message import ResponseType
 from deta_discord_interactions.models.option import Choice
 
@@ -56,7 +56,7 @@ class AutocompleteResult:
             "data": {"choices": [choice.dump() for choice in self.choices]},
         }
 
-        return json.dumps(data).encode("UTF-8"), "application/json"
+        return codec.dumps(data), "application/json"
 
     @classmethod
     def from_return_value(cls, value: Union[dict, list, "AutocompleteResult"]):
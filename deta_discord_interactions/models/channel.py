@@ -1,7 +1,6 @@
-import dataclasses
 from typing import Optional
 
-from deta_discord_interactions.models.utils import LoadableDataclass
+from deta_discord_interactions.models.utils import LoadableDataclass, slotted_dataclass
 
 
 class ChannelType:
@@ -21,7 +20,7 @@ class ChannelType:
     GUILD_FORUM = 15
 
 
-@dataclasses.dataclass
+@slotted_dataclass
 class Channel(LoadableDataclass):
     """
     Represents a Channel in Discord. This includes voice channels, text
@@ -1,6 +1,8 @@
-from dataclasses import dataclass, asdict
+from dataclasses import asdict
 from typing import Optional, Union
 
+from deta_discord_interactions.models.utils import slotted_dataclass
+
 
 class ComponentType:
     ACTION_ROW = 1
@@ -12,6 +14,9 @@ class ComponentType:
 class Component:
     "Represents a Message Component."
 
+    # Empty, so that the components can use `slotted_dataclass`
+    __slots__ = ()
+
     def dump(self):
         "Returns this Component as a dictionary, removing fields which are None."
 
@@ -39,7 +44,7 @@ class Component:
             raise ValueError(f"Unknown component type: {data.get('type')}")
 
 
-@dataclass
+@slotted_dataclass
 class CustomIdComponent(Component):
     """
     Represents a Message Component with a Custom ID.
@@ -61,7 +66,7 @@ class CustomIdComponent(Component):
             raise ValueError("custom_id has maximum 100 characters")
 
 
-@dataclass
+@slotted_dataclass
 class ActionRow(Component):
     """
     Represents an ActionRow message component.
@@ -117,7 +122,7 @@ class ButtonStyles:
     LINK = 5
 
 
-@dataclass
+@slotted_dataclass
 class Button(CustomIdComponent):
     """
     Represents a Button message component.
@@ -144,7 +149,7 @@ class Button(CustomIdComponent):
     type: int = ComponentType.BUTTON
 
     def __post_init__(self):
-        super().__post_init__()
+        super(Button, self).__post_init__()
 
         if self.style == ButtonStyles.LINK:
             if self.url is None or self.label is None:
@@ -160,7 +165,7 @@ class Button(CustomIdComponent):
             raise ValueError("custom_id has maximum 100 characters")
 
 
-@dataclass
+@slotted_dataclass
 class SelectMenuOption:
     """
     Represents an option in a SelectMenu message component.
@@ -187,7 +192,7 @@ class SelectMenuOption:
     default: bool = False
 
 
-@dataclass
+@slotted_dataclass
 class SelectMenu(CustomIdComponent):
     """
     Represents a SelectMenu message component.
@@ -219,7 +224,7 @@ class SelectMenu(CustomIdComponent):
     type: int = ComponentType.SELECT_MENU
 
     def __post_init__(self):
-        super().__post_init__()
+        super(SelectMenu, self).__post_init__()
 
         if self.options and len(self.options) > 25:
             raise ValueError("Select is limited to 25 options")
@@ -240,7 +245,7 @@ class TextStyles:
     PARAGRAPH = 2
 
 
-@dataclass
+@slotted_dataclass
 class TextInput(CustomIdComponent):
     """
     Represents a TextInput modal component.
@@ -277,7 +282,7 @@ class TextInput(CustomIdComponent):
     type: int = ComponentType.TEXT_INPUT
 
     def __post_init__(self):
-        super().__post_init__()
+        super(TextInput, self).__post_init__()
 
         if self.min_length > self.max_length:
             raise ValueError("min_length must be less than or equal to max_length")
@@ -1,9 +1,9 @@
-from dataclasses import dataclass, asdict
+from dataclasses import asdict
 
-from deta_discord_interactions.models.utils import LoadableDataclass
+from deta_discord_interactions.models.utils import LoadableDataclass, slotted_dataclass
 
 
-@dataclass
+@slotted_dataclass
 class Footer(LoadableDataclass):
     "Represents the footer of an Embed."
     text: str
@@ -11,7 +11,7 @@ class Footer(LoadableDataclass):
     proxy_icon_url: str = None
 
 
-@dataclass
+@slotted_dataclass
 class Field(LoadableDataclass):
     "Represents a field on an Embed."
     name: str
@@ -19,7 +19,7 @@ class Field(LoadableDataclass):
     inline: bool = False
 
 
-@dataclass
+@slotted_dataclass
 class Media(LoadableDataclass):
     "Represents a thumbnail, image, or video on an Embed."
     url: str = None
@@ -28,14 +28,14 @@ class Media(LoadableDataclass):
     width: int = None
 
 
-@dataclass
+@slotted_dataclass
 class Provider(LoadableDataclass):
     "Represents a provider of an Embed."
     name: str = None
     url: str = None
 
 
-@dataclass
+@slotted_dataclass
 class Author(LoadableDataclass):
     "Represents an author of an embed."
     name: str = None
@@ -44,7 +44,7 @@ class Author(LoadableDataclass):
     proxy_icon_url: str = None
 
 
-@dataclass
+@slotted_dataclass
 class Embed(LoadableDataclass):
     """
     Represents an Embed to be sent as part of a Message.
@@ -1,10 +1,8 @@
-import dataclasses
-
-from deta_discord_interactions.models.utils import LoadableDataclass
+from deta_discord_interactions.models.utils import LoadableDataclass, slotted_dataclass
 from deta_discord_interactions.models.user import User
 
 
-@dataclasses.dataclass
+@slotted_dataclass
 class MessageInteraction(LoadableDataclass):
     """
     Partial data of the interaction that a message is a reply to.
@@ -1,10 +1,8 @@
 import dataclasses
-import json
 from typing import Optional
 from datetime import datetime
 
-import requests_toolbelt
-
+from deta_discord_interactions import codec
 from deta_discord_interactions.enums import ResponseType
 
 from deta_discord_interactions.models.utils import LoadableDataclass
@@ -226,11 +224,13 @@ class Message(LoadableDataclass):
                 "data": payload,
             }
 
-        payload_json = json.dumps(payload)
+        payload_json = codec.dumps(payload)
 
         if self.files:
+            import requests_toolbelt
+
             fields = [
-                ("payload_json", (None, payload_json.encode(), "application/json"))
+                ("payload_json", (None, payload_json, "application/json"))
             ]
 
             for i, file in enumerate(self.files):
@@ -242,4 +242,4 @@ class Message(LoadableDataclass):
 
             return (multipart.to_string(), multipart.content_type)
         else:
-            return (payload_json.encode('UTF-8'), "application/json")
+            return (payload_json, "application/json")
@@ -1,14 +1,12 @@
-import json
-
-from dataclasses import dataclass
 from typing import Union
 
-from deta_discord_interactions.models.utils import LoadableDataclass
+from deta_discord_interactions import codec
+from deta_discord_interactions.models.utils import LoadableDataclass, slotted_dataclass
 from deta_discord_interactions.models.component import Component, ComponentType
 from deta_discord_interactions.enums import ResponseType
 
 
-@dataclass
+@slotted_dataclass
 class Modal(LoadableDataclass):
     """
     Represents a Modal form window.
@@ -94,4 +92,4 @@ class Modal(LoadableDataclass):
             },
         }
 
-        return (json.dumps(payload).encode("UTF-8"), "application/json")
+        return (codec.dumps(payload), "application/json")
@@ -1,7 +1,6 @@
-from dataclasses import dataclass
 from typing import Any, Optional, Union
 
-from deta_discord_interactions.models.utils import LoadableDataclass
+from deta_discord_interactions.models.utils import LoadableDataclass, slotted_dataclass
 from deta_discord_interactions.models.user import User, Member
 from deta_discord_interactions.models.channel import Channel
 from deta_discord_interactions.models.role import Role
@@ -22,7 +21,7 @@ class CommandOptionType:
     ATTACHMENT = 11
 
 
-@dataclass
+@slotted_dataclass
 class Option(LoadableDataclass):
     """
     Represents an option provided to a slash command.
@@ -139,7 +138,7 @@ class Option(LoadableDataclass):
         return data
 
 
-@dataclass
+@slotted_dataclass
 class Choice:
     """
     Represents an option choice. These can be directly set in the command or returned as autocomplete results
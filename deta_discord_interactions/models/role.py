@@ -1,10 +1,9 @@
-import dataclasses
 from typing import Optional
 
-from deta_discord_interactions.models.utils import LoadableDataclass
+from deta_discord_interactions.models.utils import LoadableDataclass, slotted_dataclass
 
 
-@dataclasses.dataclass
+@slotted_dataclass
 class Role(LoadableDataclass):
     """
     Represents a Role in Discord.
@@ -1,11 +1,10 @@
-import dataclasses
 from datetime import datetime
 from typing import Optional
 
-from deta_discord_interactions.models.utils import LoadableDataclass
+from deta_discord_interactions.models.utils import LoadableDataclass, slotted_dataclass
 
 
-@dataclasses.dataclass
+@slotted_dataclass
 class User(LoadableDataclass):
     """
     Represents a User (the identity of a Discord user, not tied to any
@@ -67,7 +66,7 @@ class User(LoadableDataclass):
     def from_dict(cls, data):
         data = {**data, **data.get("user", {})}
         data["avatar_hash"] = data.get("avatar")
-        return super().from_dict(data)
+        return super(User, cls).from_dict(data)
 
     @property
     def display_name(self):
@@ -103,7 +102,7 @@ class User(LoadableDataclass):
             )
 
 
-@dataclasses.dataclass
+@slotted_dataclass
 class Member(User):
     """
     Represents a Member (a specific Discord :class:`User` in one particular
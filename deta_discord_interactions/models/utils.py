@@ -1,6 +1,7 @@
 import dataclasses
 from dataclasses import fields, MISSING
 import copy
+import sys
 import typing
 
 
@@ -39,6 +40,22 @@ def resolve_fancy_annotation(origin: typing.Optional[type], args: tuple, value:
 # TODO: Update this to use typing.Self once deta supports 3.11+
 Self = typing.TypeVar("Self", bound="LoadableDataclass")
 
+
+def slotted_dataclass(cls=None, /, **kwargs):
+    """
+    :func:`dataclasses.dataclass`, storing the fields in ``__slots__`` instead of
+    a ``__dict__`` on Python 3.10+, which makes each instance noticeably smaller.
+    On older versions, a regular dataclass is created instead.
+
+    Slotted instances cannot be given attributes which are not fields, and
+    methods must name their class when calling ``super(...)``, as the decorator
+    creates a new class.
+    Subclasses not decorated with it get a ``__dict__`` again, as usual.
+    """
+    if sys.version_info >= (3, 10):
+        kwargs["slots"] = True
+    return dataclasses.dataclass(cls, **kwargs)
+
 class LoadableDataclass:
     """Base class that provides methods to load and encode the data.
     Also used to interface with the `deta_discord_interactions.utils.database` module.
@@ -47,6 +64,8 @@ class LoadableDataclass:
     - Subclass and use with dataclasses @dataclass.
     - Subclass and overwrite `__init__`, `to_dict` and (@classmethod) `from_dict`
     """
+    # Empty, so that subclasses can use `slotted_dataclass`
+    __slots__ = ()
     def __init__(self, **kwargs):
         "Direct usage of the LoadableDataclass class is not advisable."
         for k, v in kwargs.items():
@@ -71,12 +90,27 @@ class LoadableDataclass:
 
     def to_dict(self) -> dict:
         "Converts into a dictionary fit for storing in the Deta Base"
-        data = copy.copy(self)
-        for attr, val in vars(data).items():
+        if dataclasses.is_dataclass(self):
+            # Read through the fields rather than vars(), which slotted dataclasses do not have
+            return {field.name: _to_builtin(getattr(self, field.name)) for field in fields(self)}
+        data = {k: v for k, v in vars(self).items() if not k.startswith("_")}
+        for attr, val in data.items():
             if isinstance(val, LoadableDataclass):
-                setattr(data, attr, val.to_dict())
-        if dataclasses.is_dataclass(data):
-            data = dataclasses.asdict(data)
-        else:
-            data = {k: v for k, v in vars(data).items() if not k.startswith("_")}
+                data[attr] = val.to_dict()
         return data
+
+
+def _to_builtin(value):
+    "Converts a field value like :func:`dataclasses.asdict` does, using `to_dict` for LoadableDataclasses"
+    if isinstance(value, LoadableDataclass):
+        return value.to_dict()
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    elif isinstance(value, tuple) and hasattr(value, "_fields"):
+        return type(value)(*[_to_builtin(v) for v in value])
+    elif isinstance(value, (list, tuple)):
+        return type(value)(_to_builtin(v) for v in value)
+    elif isinstance(value, dict):
+        return type(value)((_to_builtin(k), _to_builtin(v)) for k, v in value.items())
+    else:
+        return copy.deepcopy(value)
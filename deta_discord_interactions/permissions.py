@@ -0,0 +1,99 @@
+"""Caches the permission overwrites of the application's commands.
+
+:meth:`DiscordInteractions.get_guild_permission_overwrites` fetches the
+overwrites of every command in a guild with a single request, and
+:meth:`DiscordInteractions.set_guild_permission_overwrites` only sends the
+commands whose overwrites changed. Both go through the app's
+:class:`PermissionCache`, so auditing the same guild again shortly after
+does not send any requests.
+
+Example usage:
+    overwrites = app.get_guild_permission_overwrites(guild_id)
+    changed = app.set_guild_permission_overwrites(guild_id, {command_id: [Permission(role=admin_role_id)]})
+"""
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from deta_discord_interactions.models.permission import Permission
+
+
+def permissions_key(permissions: Iterable[Permission]) -> frozenset:
+    "Identifies a list of overwrites regardless of their order, to compare them"
+    return frozenset((permission.type, str(permission.id), permission.permission) for permission in permissions)
+
+
+class PermissionCache:
+    """
+    Remembers the permission overwrites of each command in each guild for ``ttl`` seconds.
+    It can be shared between threads.
+
+    Parameters
+    ----------
+    ttl: float, default 60
+        How many seconds the overwrites are remembered for. Set to 0 to disable the cache.
+    clock: Callable[[], float]
+        Returns the current time in seconds. Only meant to be replaced in tests.
+    """
+
+    def __init__(self, ttl: float = 60, *, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._commands: dict[tuple[str, str], tuple[float, list[Permission]]] = {}
+        # Guilds whose overwrites were all fetched at once, until when.
+        # Commands missing from them have no overwrites.
+        self._guilds: dict[str, float] = {}
+
+    def get(self, guild_id: str, command_id: str) -> Optional[list[Permission]]:
+        "Returns the overwrites of a command, or None if they are not known"
+        with self._lock:
+            now = self.clock()
+            cached = self._commands.get((guild_id, command_id))
+            if cached is not None and cached[0] > now:
+                return list(cached[1])
+            if self._guilds.get(guild_id, 0) > now:
+                return []
+            return None
+
+    def get_guild(self, guild_id: str) -> Optional[dict[str, list[Permission]]]:
+        "Returns the overwrites of every command that has any in a guild, or None if they are not all known"
+        with self._lock:
+            now = self.clock()
+            if self._guilds.get(guild_id, 0) <= now:
+                return None
+            return {
+                command_id: list(permissions)
+                for (guild, command_id), (expires_at, permissions) in self._commands.items()
+                if guild == guild_id and expires_at > now and permissions
+            }
+
+    def put(self, guild_id: str, command_id: str, permissions: list[Permission]):
+        with self._lock:
+            self._commands[(guild_id, command_id)] = (self.clock() + self.ttl, list(permissions))
+
+    def put_guild(self, guild_id: str, overwrites: dict[str, list[Permission]]):
+        "Records the overwrites of every command in a guild, as returned by Discord"
+        with self._lock:
+            expires_at = self.clock() + self.ttl
+            for key in [key for key in self._commands if key[0] == guild_id]:
+                del self._commands[key]
+            for command_id, permissions in overwrites.items():
+                self._commands[(guild_id, command_id)] = (expires_at, list(permissions))
+            self._guilds[guild_id] = expires_at
+
+    def invalidate(self, guild_id: Optional[str] = None, command_id: Optional[str] = None):
+        "Forgets the overwrites of a command, of a guild, or everything if both are omitted"
+        with self._lock:
+            if guild_id is None:
+                self._commands.clear()
+                self._guilds.clear()
+                return
+            if command_id is not None:
+                self._commands.pop((guild_id, command_id), None)
+                # Other commands of the guild are still known, but not this one
+                self._guilds.pop(guild_id, None)
+                return
+            for key in [key for key in self._commands if key[0] == guild_id]:
+                del self._commands[key]
+            self._guilds.pop(guild_id, None)
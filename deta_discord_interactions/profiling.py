@@ -0,0 +1,328 @@
+"""Sampling profiler for the interactions handled in production.
+
+While an interaction is being profiled, a background thread periodically
+records the call stack of each thread working on it. The stacks are then
+aggregated per command (or custom ID handler) in the collapsed format used by
+flamegraph tools such as `flamegraph.pl <https://github.com/brendangregg/FlameGraph>`_
+and `speedscope <https://www.speedscope.app/>`_, one ``.folded`` file per command.
+
+Only the request thread and the threads running synchronous functions for it
+(deferred commands, the ASGI thread pool) are sampled, so ``async def``
+commands are not profiled when using the :class:`ASGIApp`.
+
+Profiling can be enabled with :meth:`DiscordInteractions.enable_profiling`,
+or with environment variables:
+
+- ``DISCORD_INTERACTIONS_PROFILE``: the fraction of interactions to profile, like ``0.05``
+- ``DISCORD_INTERACTIONS_PROFILE_SLOWER_THAN``: only keep interactions slower than this many seconds
+- ``DISCORD_INTERACTIONS_PROFILE_DIR``: the folder to write the ``.folded`` files to
+
+Example usage:
+    # Profile 10% of the interactions, keeping those that took over a second
+    app.enable_profiling("profiles", sample_rate=0.1, slower_than=1.0)
+    # or, to save them to Deta Drive
+    app.enable_profiling(DrivePath("profiles"), slower_than=1.0)
+"""
+import contextlib
+import functools
+import os
+import random
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Callable, Optional
+
+from deta_discord_interactions.timing import interaction_labels
+
+
+NO_PROFILE = contextlib.nullcontext()
+"Context manager used instead of a profile for the interactions that are not profiled"
+
+
+class ProfileSession:
+    """
+    The stacks sampled while handling one interaction.
+
+    Attributes
+    ----------
+    interaction: dict
+        The interaction data.
+    handler_id: str, optional
+        The custom ID or pattern of the handler the interaction was routed to, if any.
+    start_ns: int
+        When the interaction started, from :func:`time.perf_counter_ns`.
+    samples: Counter[tuple[CodeType, ...]]
+        How many times each stack was seen, outermost frame first.
+    """
+
+    def __init__(self, profiler: "Profiler", interaction: dict):
+        self.profiler = profiler
+        self.interaction = interaction
+        self.handler_id: Optional[str] = None
+        self.start_ns = time.perf_counter_ns()
+        self.samples: Counter[tuple[CodeType, ...]] = Counter()
+        # Held by the request itself and by every thread working on it
+        self._references = 1
+
+    @contextlib.contextmanager
+    def attach(self):
+        "Samples the current thread as part of this interaction while inside the context manager"
+        thread_id = threading.get_ident()
+        if not self.profiler._attach(thread_id, self):
+            # The interaction already finished, for example a deferred
+            # command that only started after the request was answered
+            yield self
+            return
+        try:
+            yield self
+        finally:
+            self.profiler._detach(thread_id, self)
+
+
+class Profiler:
+    """
+    Samples the stacks of a fraction of the interactions and aggregates them per command.
+
+    Parameters
+    ----------
+    output: str | Path | DrivePath, optional
+        The folder to write the collapsed stacks to. Anything supporting
+        ``output / "name"`` and ``.write_text(data)`` works, including a :class:`DrivePath`.
+        If omitted, the stacks are only kept in memory, see :meth:`collapsed`.
+    sample_rate: float, default 1.0
+        The fraction of interactions to profile.
+    slower_than: float, optional
+        If set, only keep the profiles of interactions that took at least this many seconds.
+    interval: float, default 0.005
+        Seconds between two samples.
+    flush_every: int, default 10
+        Write the files every time this many more profiles have been kept.
+        Set to 0 to only write them when calling :meth:`dump` or :meth:`stop`.
+
+    Attributes
+    ----------
+    stacks: dict[tuple[str, str], Counter]
+        The aggregated samples, by interaction type and command name.
+    profiled_count: int
+        How many interactions were profiled.
+    kept_count: int
+        How many profiles were aggregated into :attr:`stacks`.
+    """
+
+    def __init__(
+        self,
+        output=None,
+        *,
+        sample_rate: float = 1.0,
+        slower_than: Optional[float] = None,
+        interval: float = 0.005,
+        flush_every: int = 10,
+    ):
+        if isinstance(output, (str, os.PathLike)):
+            output = Path(output)
+        self.output = output
+        self.sample_rate = sample_rate
+        self.slower_than = slower_than
+        self.interval = interval
+        self.flush_every = flush_every
+
+        self.stacks: dict[tuple[str, str], Counter[tuple[CodeType, ...]]] = {}
+        self.profiled_count = 0
+        self.kept_count = 0
+
+        self._condition = threading.Condition()
+        self._threads: dict[int, list[ProfileSession]] = {}
+        self._sampler: Optional[threading.Thread] = None
+        self._stopped = False
+
+    @classmethod
+    def from_env(cls) -> Optional["Profiler"]:
+        "Creates a Profiler from the ``DISCORD_INTERACTIONS_PROFILE*`` environment variables, if set"
+        sample_rate = os.getenv("DISCORD_INTERACTIONS_PROFILE")
+        slower_than = os.getenv("DISCORD_INTERACTIONS_PROFILE_SLOWER_THAN")
+        if not sample_rate and not slower_than:
+            return None
+        return cls(
+            os.getenv("DISCORD_INTERACTIONS_PROFILE_DIR", "profiles"),
+            sample_rate=float(sample_rate or 1.0),
+            slower_than=float(slower_than) if slower_than else None,
+        )
+
+    def profile(self, interaction: dict, *, attach_thread: bool = True):
+        """
+        Returns a context manager that profiles the interaction handled inside it,
+        or does nothing if this interaction was not picked.
+
+        Parameters
+        ----------
+        interaction: dict
+            The interaction data.
+        attach_thread: bool, default True
+            Whether to sample the current thread. Disable it on event loops,
+            whose stack shows whichever task happens to be running.
+        """
+        if self._stopped or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return NO_PROFILE
+        return self._profile(ProfileSession(self, interaction), attach_thread)
+
+    @contextlib.contextmanager
+    def _profile(self, session: ProfileSession, attach_thread: bool):
+        token = _current_session.set(session)
+        try:
+            if attach_thread:
+                with session.attach():
+                    yield session
+            else:
+                yield session
+        finally:
+            _current_session.reset(token)
+            self._release(session)
+
+    def _attach(self, thread_id: int, session: ProfileSession) -> bool:
+        with self._condition:
+            if session._references == 0:
+                return False
+            session._references += 1
+            self._threads.setdefault(thread_id, []).append(session)
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_loop, name="discord-interactions-profiler", daemon=True)
+                self._sampler.start()
+            self._condition.notify()
+        return True
+
+    def _detach(self, thread_id: int, session: ProfileSession):
+        with self._condition:
+            sessions = self._threads[thread_id]
+            sessions.remove(session)
+            if not sessions:
+                del self._threads[thread_id]
+        self._release(session)
+
+    def _release(self, session: ProfileSession):
+        with self._condition:
+            session._references -= 1
+            if session._references:
+                return
+        self._finish(session)
+
+    def _sample_loop(self):
+        while True:
+            with self._condition:
+                while not self._threads and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                frames = sys._current_frames()
+                for thread_id, sessions in self._threads.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        sessions[-1].samples[_stack(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+    def _finish(self, session: ProfileSession):
+        duration = (time.perf_counter_ns() - session.start_ns) / 1e9
+        with self._condition:
+            self.profiled_count += 1
+            if not session.samples or (self.slower_than is not None and duration < self.slower_than):
+                return
+            labels = interaction_labels(session.interaction, session.handler_id)
+            self.stacks.setdefault(labels, Counter()).update(session.samples)
+            self.kept_count += 1
+            flush = self.output is not None and self.flush_every and self.kept_count % self.flush_every == 0
+        if flush:
+            try:
+                self.dump()
+            except Exception:
+                traceback.print_exc()
+
+    def collapsed(self) -> dict[tuple[str, str], str]:
+        """
+        Returns the aggregated stacks of each command in the collapsed format,
+        one ``frame;frame;frame count`` line per distinct stack.
+        """
+        with self._condition:
+            stacks = {labels: dict(samples) for labels, samples in self.stacks.items()}
+        return {
+            labels: "".join(
+                f"{';'.join(_frame_name(code) for code in stack)} {count}\n"
+                for stack, count in sorted(samples.items(), key=lambda item: -item[1])
+            )
+            for labels, samples in stacks.items()
+        }
+
+    def dump(self, output=None):
+        """
+        Writes one ``<type>.<name>.folded`` file per command to ``output``,
+        or to :attr:`output` if omitted. Files are overwritten with the totals so far.
+        """
+        if output is None:
+            output = self.output
+        elif isinstance(output, (str, os.PathLike)):
+            output = Path(output)
+        if output is None:
+            raise ValueError("No output folder to write the profiles to")
+        if isinstance(output, Path):
+            output.mkdir(parents=True, exist_ok=True)
+        for (type_name, name), text in self.collapsed().items():
+            filename = re.sub(r"[^\w.-]+", "_", f"{type_name}.{name}") + ".folded"
+            (output / filename).write_text(text)
+
+    def stop(self):
+        "Stops profiling and writes the files if there is an output folder"
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self.output is not None and self.stacks:
+            self.dump()
+
+
+_current_session: ContextVar[Optional[ProfileSession]] = ContextVar("discord_interactions_profile", default=None)
+
+
+def current_session() -> Optional[ProfileSession]:
+    "Returns the session profiling the interaction being handled, if any"
+    return _current_session.get()
+
+
+def set_handler_id(handler_id: str):
+    "Records which custom ID handler the interaction being profiled was routed to, if any"
+    session = _current_session.get()
+    if session is not None:
+        session.handler_id = handler_id
+
+
+def follow(function: Callable) -> Callable:
+    """
+    Wraps ``function`` so that, if it is called while an interaction is being
+    profiled (in a copy of its context), the thread running it is sampled too.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        session = _current_session.get()
+        if session is None:
+            return function(*args, **kwargs)
+        with session.attach():
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def _stack(frame: FrameType) -> tuple[CodeType, ...]:
+    stack = []
+    while frame is not None:
+        stack.append(frame.f_code)
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+@functools.lru_cache(maxsize=4096)
+def _frame_name(code: CodeType) -> str:
+    filename = os.path.basename(code.co_filename)
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({filename}:{code.co_firstlineno})"
@@ -0,0 +1,235 @@
+"""Client-side handling of Discord's rate limits.
+
+Discord reports the state of each rate limit bucket in the response headers
+(``X-RateLimit-Bucket``, ``X-RateLimit-Remaining``, ``X-RateLimit-Reset-After``),
+and answers with a 429 and a ``retry_after`` when a limit was exceeded.
+A :class:`RateLimiter` remembers those, waits before sending requests that
+would exceed a known limit, and retries the requests that were rate limited anyway.
+It can be shared between threads, and between synchronous and asynchronous code.
+
+See https://discord.com/developers/docs/topics/rate-limits
+
+Example usage:
+    limiter = RateLimiter()
+    route = route_key("PUT", "/applications/123/commands")
+    response = limiter.request(route, lambda: requests.put(...))
+"""
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+
+class RateLimitExceeded(Exception):
+    "Raised when a request is still rate limited after retrying as many times as allowed"
+
+    def __init__(self, route: str, retry_after: float):
+        super().__init__(f"{route} is still rate limited, retry after {retry_after:.2f}s")
+        self.route = route
+        self.retry_after = retry_after
+
+
+class _Bucket:
+    __slots__ = ("remaining", "reset_at")
+
+    def __init__(self):
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+
+
+MAJOR_PARAMETERS = frozenset({"channels", "guilds", "webhooks"})
+"The resources whose ID is part of the rate limit, unlike the IDs of messages, users, etc."
+
+
+def route_key(method: str, path: str) -> str:
+    """
+    Returns the route that a request is rate limited by.
+
+    Only the major parameters are kept, that is the channel, guild and webhook IDs,
+    and the webhook tokens. The other IDs and interaction tokens are replaced by placeholders,
+    as every message of a channel, for example, shares the same rate limit.
+
+    Example usage:
+        route_key("PATCH", "/api/v10/channels/1/messages/2")  # "PATCH /api/v10/channels/1/messages/{id}"
+    """
+    segments = path.split("/")
+    for i, segment in enumerate(segments):
+        previous = segments[i - 1] if i else ""
+        if previous in MAJOR_PARAMETERS or (i > 1 and segments[i - 2] == "webhooks"):
+            continue
+        if i > 1 and segments[i - 2] == "interactions":
+            segments[i] = "{token}"
+        elif segment.isdigit():
+            segments[i] = "{id}"
+    return f"{method} {'/'.join(segments)}"
+
+
+MAX_TRACKED_BUCKETS = 1024
+"How many buckets to track before forgetting those that already reset"
+
+
+class RateLimiter:
+    """
+    Tracks Discord's rate limits per bucket and globally.
+
+    Parameters
+    ----------
+    max_retries: int, default 5
+        How many times to retry a request that got a 429 response.
+    clock: Callable[[], float]
+        Returns the current time in seconds. Only meant to be replaced in tests.
+    sleep: Callable[[float], None]
+        Waits for that many seconds. Only meant to be replaced in tests.
+
+    Attributes
+    ----------
+    rate_limited_count: int
+        How many 429 responses were received.
+    waited: float
+        Total seconds spent waiting for rate limits, summed over every thread.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_retries = max_retries
+        self.clock = clock
+        self.sleep = sleep
+        self.rate_limited_count = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+        self._route_buckets: dict[str, str] = {}
+        self._buckets: dict[str, _Bucket] = {}
+        self._global_reset_at = 0.0
+
+    def _bucket_key(self, route: str) -> str:
+        # Routes sharing a bucket hash still have separate limits per major
+        # parameter (guild, channel, webhook), which are part of the route
+        bucket = self._route_buckets.get(route)
+        return route if bucket is None else f"{bucket}:{route}"
+
+    def _reserve(self, route: str) -> float:
+        # Returns how long to wait before trying again, or 0 if the request can be sent now
+        with self._lock:
+            now = self.clock()
+            delay = self._global_reset_at - now
+            if delay <= 0:
+                bucket = self._buckets.get(self._bucket_key(route))
+                if bucket is None or bucket.remaining is None or bucket.reset_at <= now:
+                    return 0
+                if bucket.remaining > 0:
+                    # Reserve it, so that other threads do not count on it too
+                    bucket.remaining -= 1
+                    return 0
+                delay = bucket.reset_at - now
+            self.waited += delay
+            return delay
+
+    def acquire(self, route: str):
+        "Waits until a request to ``route`` can be sent without exceeding a known rate limit"
+        while True:
+            delay = self._reserve(route)
+            if delay <= 0:
+                return
+            self.sleep(delay)
+
+    async def acquire_async(self, route: str):
+        "Async counterpart of :meth:`acquire`, waiting without blocking the event loop"
+        import asyncio
+        while True:
+            delay = self._reserve(route)
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def update(self, route: str, response) -> Optional[float]:
+        """
+        Records the rate limit headers of a response.
+
+        Returns
+        -------
+        float, optional
+            How many seconds to wait before retrying, if the response was a 429.
+        """
+        headers = response.headers
+        with self._lock:
+            now = self.clock()
+            bucket_hash = headers.get("X-RateLimit-Bucket")
+            if bucket_hash is not None:
+                self._route_buckets[route] = bucket_hash
+            key = self._bucket_key(route)
+            remaining = headers.get("X-RateLimit-Remaining")
+            reset_after = headers.get("X-RateLimit-Reset-After")
+            if remaining is not None and reset_after is not None:
+                if key not in self._buckets and len(self._buckets) >= MAX_TRACKED_BUCKETS:
+                    self._prune(now)
+                bucket = self._buckets.setdefault(key, _Bucket())
+                bucket.remaining = int(remaining)
+                bucket.reset_at = now + float(reset_after)
+
+            if response.status_code != 429:
+                return None
+
+            self.rate_limited_count += 1
+            retry_after = _retry_after(response)
+            if headers.get("X-RateLimit-Global") or headers.get("X-RateLimit-Scope") == "global":
+                self._global_reset_at = max(self._global_reset_at, now + retry_after)
+            else:
+                bucket = self._buckets.setdefault(key, _Bucket())
+                bucket.remaining = 0
+                bucket.reset_at = max(bucket.reset_at, now + retry_after)
+            return retry_after
+
+    def _prune(self, now: float):
+        # Routes include their major parameters, such as the token of each
+        # webhook, so forget the buckets that no longer limit anything
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket.reset_at > now}
+        self._route_buckets = {
+            route: bucket for route, bucket in self._route_buckets.items()
+            if f"{bucket}:{route}" in self._buckets
+        }
+
+    def request(self, route: str, send: Callable[[], "requests.Response"]) -> "requests.Response":
+        """
+        Calls ``send()`` once ``route`` is not rate limited, retrying it if it gets a 429.
+
+        Parameters
+        ----------
+        route: str
+            Identifies the endpoint, including its major parameters,
+            like ``"PUT /applications/{id}/guilds/456/commands"``. See :func:`route_key`.
+        send: Callable
+            Sends the request, returning a :class:`requests.Response`.
+
+        Raises
+        ------
+        RateLimitExceeded
+            If the request was still rate limited after ``max_retries`` retries.
+        """
+        for _ in range(self.max_retries + 1):
+            self.acquire(route)
+            response = send()
+            retry_after = self.update(route, response)
+            if retry_after is None:
+                return response
+        raise RateLimitExceeded(route, retry_after)
+
+    async def request_async(self, route: str, send: Callable[[], Awaitable]):
+        "Async counterpart of :meth:`request`, where ``send()`` returns an awaitable response"
+        for _ in range(self.max_retries + 1):
+            await self.acquire_async(route)
+            response = await send()
+            retry_after = self.update(route, response)
+            if retry_after is None:
+                return response
+        raise RateLimitExceeded(route, retry_after)
+
+
+def _retry_after(response) -> float:
+    try:
+        return float(response.json()["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        return float(response.headers.get("Retry-After", 1))
@@ -0,0 +1,183 @@
+"""Records the requests received by the app, to replay them later.
+
+Each request to a recorded path, served either directly (WSGI) or through
+an :class:`ASGIApp`, is appended to a JSON Lines file, with its
+raw body, the headers relevant to Discord, the response status and how long
+it took to handle. :mod:`deta_discord_interactions.replay` sends them to an app
+again, to benchmark changes with production-shaped traffic.
+
+Interaction tokens allow sending and editing messages for 15 minutes, so they
+are replaced in the recorded bodies by default, along with the signature headers.
+
+Recording can be enabled with :meth:`DiscordInteractions.enable_recording`,
+or with the ``DISCORD_INTERACTIONS_RECORD`` environment variable set to the file to write to.
+``{pid}`` in the file name is replaced by the process ID, to give each worker its own file.
+
+Example usage:
+    app.enable_recording("interactions-{pid}.jsonl")
+    # then: python -m deta_discord_interactions.replay interactions-*.jsonl --app main:app
+"""
+import base64
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from deta_discord_interactions import codec
+
+
+RECORDED_HEADERS = ("CONTENT_TYPE", "HTTP_USER_AGENT", "HTTP_X_SIGNATURE_ED25519", "HTTP_X_SIGNATURE_TIMESTAMP")
+"The WSGI environ keys of the headers that are recorded"
+
+SCRUBBED_HEADERS = ("HTTP_X_SIGNATURE_ED25519", "HTTP_X_SIGNATURE_TIMESTAMP")
+
+SCRUBBED_TOKEN = "scrubbed"
+
+
+class Recorder:
+    """
+    Appends the requests handled by an app to a JSON Lines file. It can be shared between threads.
+
+    Parameters
+    ----------
+    path: str | Path
+        The file to append to. ``{pid}`` is replaced by the ID of the process
+        writing to it, which is resolved when the file is first opened, so
+        that the workers forked after the Recorder was created each get their own file.
+    scrub_tokens: bool, default True
+        Whether to replace the interaction tokens and drop the signature headers.
+        The bodies are then re-encoded, so they may differ in whitespace.
+    paths: Iterable[str], default ("/discord",)
+        Only record requests to these paths, whatever their query string.
+    sample_rate: float, default 1.0
+        The fraction of requests to record.
+
+    Attributes
+    ----------
+    recorded_count: int
+        How many requests have been recorded.
+    """
+
+    def __init__(
+        self,
+        path,
+        *,
+        scrub_tokens: bool = True,
+        paths: Iterable[str] = ("/discord",),
+        sample_rate: float = 1.0,
+    ):
+        self.path_template = str(path)
+        self.scrub_tokens = scrub_tokens
+        self.paths = frozenset(paths)
+        self.sample_rate = sample_rate
+        self.recorded_count = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_pid = None
+
+    @property
+    def path(self) -> Path:
+        "The file this process appends to"
+        return Path(self.path_template.replace("{pid}", str(os.getpid())))
+
+    @classmethod
+    def from_env(cls) -> Optional["Recorder"]:
+        "Creates a Recorder writing to the ``DISCORD_INTERACTIONS_RECORD`` environment variable, if set"
+        path = os.getenv("DISCORD_INTERACTIONS_RECORD")
+        if not path:
+            return None
+        return cls(path)
+
+    def start(self, environ: dict, start_response: Callable) -> tuple[Callable, Optional[dict]]:
+        """
+        Starts recording a request, if it is to be recorded.
+
+        Returns
+        -------
+        Callable
+            The ``start_response`` to use, which records the response status.
+        dict, optional
+            The state to pass to :meth:`finish`, or None if the request is not recorded.
+        """
+        if _path(environ) not in self.paths or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return start_response, None
+        recording = {"environ": environ, "status": None, "start_ns": time.perf_counter_ns(), "time": time.time()}
+
+        def recording_start_response(status, headers, *args):
+            recording["status"] = int(str(status).split(" ", 1)[0])
+            return start_response(status, headers, *args)
+        return recording_start_response, recording
+
+    def finish(self, recording: dict):
+        "Appends a request started with :meth:`start` to the file, once it was handled"
+        duration_ms = (time.perf_counter_ns() - recording["start_ns"]) / 1e6
+        environ = recording["environ"]
+        raw_data = environ.get("raw_data")
+        if raw_data is None:
+            # The body could not be read or decoded
+            return
+        headers = {key: environ[key] for key in RECORDED_HEADERS if key in environ}
+        if self.scrub_tokens:
+            raw_data = scrub(environ.get("json"), raw_data)
+            for key in SCRUBBED_HEADERS:
+                headers.pop(key, None)
+        record = {
+            "time": recording["time"],
+            "method": environ.get("REQUEST_METHOD", "POST"),
+            "path": _path(environ),
+            "query": environ.get("QUERY_STRING", ""),
+            "headers": headers,
+            **encode_body(raw_data),
+            "status": recording["status"],
+            "duration_ms": round(duration_ms, 3),
+        }
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is not None and self._file_pid != os.getpid():
+                # Inherited from the process this one was forked from
+                self._file.close()
+                self._file = None
+            if self._file is None:
+                path = self.path
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = path.open("a", encoding="UTF-8")
+                self._file_pid = os.getpid()
+            self._file.write(line)
+            self._file.flush()
+            self.recorded_count += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _path(environ: dict) -> str:
+    # Some servers include the query string in PATH_INFO
+    return environ.get("PATH_INFO", "").split("?", 1)[0]
+
+
+def scrub(data, raw_data: bytes) -> bytes:
+    "Returns the body with the interaction token replaced, re-encoded if it had one"
+    if not isinstance(data, dict) or "token" not in data:
+        return raw_data
+    return codec.dumps({**data, "token": SCRUBBED_TOKEN})
+
+
+def encode_body(raw_data: bytes) -> dict:
+    "Stores the body as text if possible, or as base64 otherwise"
+    try:
+        return {"body": bytes(raw_data).decode("UTF-8")}
+    except UnicodeDecodeError:
+        return {"body_base64": base64.b64encode(raw_data).decode("ascii")}
+
+
+def decode_body(record: dict) -> bytes:
+    "The inverse of :func:`encode_body`"
+    if "body_base64" in record:
+        return base64.b64decode(record["body_base64"])
+    return record["body"].encode("UTF-8")
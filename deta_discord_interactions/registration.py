@@ -0,0 +1,152 @@
+"""Remembers which commands have been registered with Discord.
+
+:meth:`DiscordInteractions.update_commands` can take a ``cache``, where it
+stores a hash of the registered commands and the IDs Discord assigned to them,
+separately for the global commands and for each guild. When nothing changed
+since the last registration, it skips the request to Discord and restores
+the IDs from the cache instead.
+
+:meth:`DiscordInteractions.update_commands_bulk` registers the commands in
+many guilds at once, returning a :class:`RegistrationResult` for each.
+
+Example usage:
+    app.update_commands(cache="registered_commands.json")
+
+    # or, to share it between machines using a Deta Base
+    from deta_discord_interactions.utils.database import Database
+    commands_cache = Database("_discord_interactions_commands", record_type=RegisteredCommands)
+    app.update_commands(cache=commands_cache)
+"""
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Protocol
+
+from deta_discord_interactions import codec
+from deta_discord_interactions.models.utils import LoadableDataclass
+
+
+@dataclasses.dataclass
+class RegisteredCommands(LoadableDataclass):
+    """
+    The commands registered for an application in one scope.
+
+    Attributes
+    ----------
+    payload_hash: str
+        The hash of the registered commands, see :func:`payload_hash`.
+    ids: dict[str, str]
+        The ID of each registered command, by command name.
+    """
+    payload_hash: str
+    ids: dict[str, str]
+
+
+@dataclasses.dataclass
+class RegistrationResult:
+    """
+    The outcome of registering the commands in one scope.
+
+    Attributes
+    ----------
+    guild_id: str, optional
+        The guild the commands were registered in, or None for global commands.
+    ids: dict[str, str]
+        The ID of each registered command, by command name.
+    cached: bool
+        Whether the commands were unchanged, so nothing was sent to Discord.
+    error: Exception, optional
+        What went wrong, if the registration failed.
+    """
+    guild_id: Optional[str]
+    ids: dict[str, str] = dataclasses.field(default_factory=dict)
+    cached: bool = False
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class RegistrationCache(Protocol):
+    "Where the registered commands are stored. A :class:`Database` of :class:`RegisteredCommands` works too."
+    def get(self, key: str) -> Optional[RegisteredCommands]: ...
+    def put(self, key: str, data: RegisteredCommands) -> None: ...
+
+
+class FileRegistrationCache:
+    """
+    Stores the registered commands in a local JSON file.
+
+    Parameters
+    ----------
+    path: str | Path
+        The file to use. Created when first written to.
+    """
+    record_type = RegisteredCommands
+    file_mode = 0o644
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        try:
+            return codec.loads(self.path.read_bytes())
+        except FileNotFoundError:
+            return {}
+
+    def get(self, key: str) -> Optional[RegisteredCommands]:
+        data = self._load().get(key)
+        if data is None:
+            return None
+        return self.record_type.from_dict(data)
+
+    def put(self, key: str, data: RegisteredCommands) -> None:
+        with self._lock:
+            content = self._load()
+            content[key] = data.to_dict()
+            # Write to a temporary file first so that the cache is never left half written.
+            # Unique to this writer, as other processes may be writing the same file at once.
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name + ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    file.write(codec.dumps(content, pretty=True))
+                os.chmod(temporary, self.file_mode)
+                os.replace(temporary, self.path)
+            except BaseException:
+                try:
+                    os.unlink(temporary)
+                except FileNotFoundError:
+                    pass
+                raise
+
+
+def open_cache(cache) -> RegistrationCache:
+    "Returns a :class:`FileRegistrationCache` for paths, or ``cache`` itself otherwise"
+    if isinstance(cache, (str, os.PathLike)):
+        return FileRegistrationCache(cache)
+    return cache
+
+
+def cache_key(application_id: str, guild_id: Optional[str] = None) -> str:
+    "The key the commands of an application are stored under, for a guild or globally"
+    return f"{application_id}-{guild_id or 'global'}"
+
+
+def payload_hash(payload: list[dict]) -> str:
+    """
+    Hashes the payload sent to Discord to register the commands.
+
+    The commands are sorted and encoded with sorted keys, so the hash only
+    changes when the commands themselves do, not when they are defined
+    in a different order or when the JSON codec changes.
+    """
+    commands = sorted(payload, key=lambda command: (command.get("type", 1), command["name"]))
+    canonical = json.dumps(commands, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("UTF-8")).hexdigest()
@@ -0,0 +1,355 @@
+"""Replays recorded requests against an app, and reports its throughput and latency.
+
+The requests recorded by :mod:`deta_discord_interactions.recorder` are sent
+either straight to a WSGI app in the same process, or over HTTP to a running
+server (such as :func:`run_server`), from several threads at once and
+optionally at a fixed rate. They are signed again with a test key, so the app
+under test must use :func:`replay_public_key` as its ``DISCORD_PUBLIC_KEY``,
+or have ``DONT_VALIDATE_SIGNATURE`` set.
+
+With a ``rate``, latencies are measured from when each request was scheduled
+to be sent rather than from when it was actually sent, so that a slow app
+cannot hide its queueing delay by slowing down the load generator.
+
+Usage:
+    python -m deta_discord_interactions.replay interactions.jsonl --app main:app --concurrency 8
+    python -m deta_discord_interactions.replay interactions.jsonl --url http://127.0.0.1:8080 --rate 200
+
+Or from Python:
+    report = replay(app, load_recording("interactions.jsonl"), concurrency=8)
+    print(report.format())
+"""
+import argparse
+import dataclasses
+import http.client
+import importlib
+import io
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from typing import Callable, Iterable, Optional, Union
+from urllib.parse import urlsplit
+
+from deta_discord_interactions.recorder import SCRUBBED_HEADERS, decode_body
+
+
+TEST_SIGNING_SEED = b"deta-discord-interactions-replay"
+"Seed of the Ed25519 key the replayed requests are signed with. Not a secret."
+
+
+def signing_key():
+    "Returns the :class:`nacl.signing.SigningKey` the replayed requests are signed with"
+    from nacl.signing import SigningKey
+    return SigningKey(TEST_SIGNING_SEED)
+
+
+def replay_public_key() -> str:
+    "Returns the hex encoded public key the app under test should use to verify the replayed requests"
+    return signing_key().verify_key.encode().hex()
+
+
+@dataclasses.dataclass
+class RecordedRequest:
+    """
+    A request read from a recording.
+
+    Attributes
+    ----------
+    method: str
+    path: str
+    query: str
+    headers: dict[str, str]
+        The recorded headers, as WSGI environ keys like ``HTTP_USER_AGENT``.
+    body: bytes
+    status: int, optional
+        The status the app responded with when it was recorded.
+    duration_ms: float, optional
+        How long the app took to handle it when it was recorded.
+    """
+    method: str
+    path: str
+    query: str
+    headers: dict[str, str]
+    body: bytes
+    status: Optional[int] = None
+    duration_ms: Optional[float] = None
+
+
+def load_recording(*paths) -> list[RecordedRequest]:
+    "Reads the requests from one or more files written by a :class:`Recorder`"
+    requests = []
+    for path in paths:
+        with open(path, encoding="UTF-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                requests.append(RecordedRequest(
+                    method=record.get("method", "POST"),
+                    path=record.get("path", "/discord"),
+                    query=record.get("query", ""),
+                    headers=record.get("headers", {}),
+                    body=decode_body(record),
+                    status=record.get("status"),
+                    duration_ms=record.get("duration_ms"),
+                ))
+    return requests
+
+
+@dataclasses.dataclass
+class ReplayReport:
+    """
+    The outcome of a replay.
+
+    Attributes
+    ----------
+    latencies_ms: list[float]
+        How long each request took, sorted.
+    statuses: Counter[int]
+        How many responses had each status code.
+    errors: int
+        How many requests failed without a response, for example because the connection was refused.
+    elapsed: float
+        How many seconds the whole replay took.
+    recorded_ms: list[float]
+        How long the same requests took when they were recorded, sorted, if known.
+    """
+    latencies_ms: list[float]
+    statuses: Counter
+    errors: int
+    elapsed: float
+    recorded_ms: list[float] = dataclasses.field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies_ms)
+
+    @property
+    def throughput(self) -> float:
+        "Requests per second"
+        return self.count / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, q: float, *, recorded: bool = False) -> Optional[float]:
+        "The ``q`` percentile (between 0 and 100) of the latencies, or of the recorded durations"
+        values = self.recorded_ms if recorded else self.latencies_ms
+        if not values:
+            return None
+        index = min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))
+        return values[index]
+
+    def format(self) -> str:
+        lines = [
+            f"requests:   {self.count} ({self.errors} errors) in {self.elapsed:.2f}s",
+            f"throughput: {self.throughput:.1f} req/s",
+            "statuses:   " + ", ".join(f"{status}: {count}" for status, count in sorted(self.statuses.items())),
+        ]
+        for label, recorded in (("latency", False), ("recorded", True)):
+            if self.percentile(50, recorded=recorded) is None:
+                continue
+            percentiles = ", ".join(f"p{q:g} {self.percentile(q, recorded=recorded):.2f}ms" for q in (50, 90, 99, 100))
+            lines.append(f"{label + ':':<12}{percentiles}")
+        return "\n".join(lines)
+
+
+def _signature_headers(key, body: bytes) -> dict[str, str]:
+    timestamp = str(int(time.time()))
+    return {
+        "HTTP_X_SIGNATURE_ED25519": key.sign(timestamp.encode() + body).signature.hex(),
+        "HTTP_X_SIGNATURE_TIMESTAMP": timestamp,
+    }
+
+
+def _wsgi_sender(app: Callable) -> Callable[[RecordedRequest, dict], Callable[[], int]]:
+    def prepare(request: RecordedRequest, headers: dict):
+        environ = {
+            **headers,
+            "wsgi.input": io.BytesIO(request.body),
+            "CONTENT_LENGTH": str(len(request.body)),
+            "REQUEST_METHOD": request.method,
+            "PATH_INFO": request.path,
+            "QUERY_STRING": request.query,
+        }
+
+        def send() -> int:
+            statuses = []
+            result = app(environ, lambda status, response_headers, *args: statuses.append(status))
+            try:
+                for _ in result:
+                    pass
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+            return int(str(statuses[0]).split(" ", 1)[0])
+        return send
+    return prepare
+
+
+def _http_sender(url: str) -> Callable[[RecordedRequest, dict], Callable[[], int]]:
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    base_path = parts.path.rstrip("/")
+    local = threading.local()
+
+    def prepare(request: RecordedRequest, headers: dict):
+        http_headers = {"Content-Length": str(len(request.body))}
+        for key, value in headers.items():
+            if key == "CONTENT_TYPE":
+                http_headers["Content-Type"] = value
+            elif key.startswith("HTTP_"):
+                http_headers[key[5:].replace("_", "-").title()] = value
+        http_headers.setdefault("Content-Type", "application/json")
+        target = base_path + request.path + (f"?{request.query}" if request.query else "")
+
+        def send() -> int:
+            # Each thread keeps its own connection alive, reconnecting if the server closed it
+            for attempt in range(2):
+                connection = getattr(local, "connection", None)
+                if connection is None:
+                    connection = local.connection = connection_class(parts.hostname, parts.port, timeout=30)
+                try:
+                    connection.request(request.method, target, body=request.body, headers=http_headers)
+                    response = connection.getresponse()
+                    response.read()
+                    return response.status
+                except (ConnectionError, http.client.HTTPException):
+                    connection.close()
+                    local.connection = None
+                    if attempt:
+                        raise
+        return send
+    return prepare
+
+
+def replay(
+    target: Union[Callable, str],
+    requests: Iterable[RecordedRequest],
+    *,
+    concurrency: int = 4,
+    rate: Optional[float] = None,
+    repeat: int = 1,
+    sign: bool = True,
+) -> ReplayReport:
+    """
+    Sends recorded requests to an app and measures how long each one takes.
+
+    Parameters
+    ----------
+    target: Callable | str
+        A WSGI app to call in this process, or the base URL of a running server,
+        like ``"http://127.0.0.1:8080"``, to which the recorded paths are appended.
+    requests: Iterable[RecordedRequest]
+        The requests to send, see :func:`load_recording`.
+    concurrency: int, default 4
+        How many requests can be in flight at once, each sent from its own thread.
+    rate: float, optional
+        How many requests to start per second, overall. As fast as possible if omitted.
+    repeat: int, default 1
+        How many times to send the whole recording.
+    sign: bool, default True
+        Whether to sign the requests with :func:`signing_key`.
+        Signing happens before each request is timed.
+    """
+    requests = list(requests) * repeat
+    prepare = _http_sender(target) if isinstance(target, str) else _wsgi_sender(target)
+    key = signing_key() if sign else None
+
+    latencies = []
+    statuses = Counter()
+    errors = 0
+    lock = threading.Lock()
+    next_index = 0
+    start = time.perf_counter()
+
+    def worker():
+        nonlocal next_index, errors
+        while True:
+            with lock:
+                index = next_index
+                next_index += 1
+            if index >= len(requests):
+                return
+            request = requests[index]
+            headers = dict(request.headers)
+            if key is not None:
+                for name in SCRUBBED_HEADERS:
+                    headers.pop(name, None)
+                headers.update(_signature_headers(key, request.body))
+            send = prepare(request, headers)
+
+            if rate:
+                scheduled = start + index / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                started = scheduled
+            else:
+                started = time.perf_counter()
+            try:
+                status = send()
+            except Exception:
+                with lock:
+                    errors += 1
+                continue
+            latency = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(latency)
+                statuses[status] += 1
+
+    threads = [threading.Thread(target=worker, name=f"replay-{i}", daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return ReplayReport(
+        latencies_ms=sorted(latencies),
+        statuses=statuses,
+        errors=errors,
+        elapsed=elapsed,
+        recorded_ms=sorted(request.duration_ms for request in requests if request.duration_ms is not None),
+    )
+
+
+def load_app(spec: str) -> Callable:
+    "Imports a WSGI app from a ``module:attribute`` string"
+    module_name, _, attribute = spec.partition(":")
+    app = importlib.import_module(module_name)
+    for name in (attribute or "app").split("."):
+        app = getattr(app, name)
+    return app
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recordings", nargs="+", help="The files written by the recorder")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--app", help="The WSGI app to replay in this process, as module:attribute")
+    target.add_argument("--url", help="The base URL of a running server, like http://127.0.0.1:8080")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=None, help="Requests started per second")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-sign", action="store_true", help="Send the requests without signatures")
+    args = parser.parse_args(argv)
+
+    requests = load_recording(*args.recordings)
+    if args.app:
+        # Set before importing the app, which reads them when it is created
+        if not args.no_sign:
+            os.environ["DISCORD_PUBLIC_KEY"] = replay_public_key()
+        os.environ.setdefault("DONT_REGISTER_WITH_DISCORD", "True")
+        target = load_app(args.app)
+    else:
+        target = args.url
+        if not args.no_sign:
+            print(f"Signing with the public key {replay_public_key()}")
+
+    report = replay(target, requests, concurrency=args.concurrency, rate=args.rate, repeat=args.repeat, sign=not args.no_sign)
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""HTTP client for the requests sent to the Discord API.
+
+A :class:`RESTClient` keeps a pooled :class:`requests.Session`, so that
+consecutive requests reuse the same connection instead of going through a new
+TCP and TLS handshake each time. It sends every request through a
+:class:`RateLimiter`, retries the ones that failed with a server or connection
+error, and applies a default timeout.
+
+Each :class:`DiscordInteractions` owns one, as :attr:`DiscordInteractions.rest`.
+Code that has no app to use, like the :class:`Webhook` and :class:`OAuthToken`
+helpers, shares the one returned by :func:`default_client`.
+
+:class:`AsyncRESTClient` is its asynchronous counterpart, built on
+`httpx <https://www.python-httpx.org/>`_, which must be installed to use it.
+It is what ``await ctx.asend(...)`` and ``await webhook.asend(...)`` use.
+
+Example usage:
+    response = app.rest.get(f"/applications/{app_id}/commands", headers=app.auth_headers())
+    response.raise_for_status()
+
+    response = await app.async_rest.get(f"/applications/{app_id}/commands", headers=app.auth_headers())
+"""
+import functools
+import threading
+import time
+from typing import AsyncGenerator, Callable, Optional, Union
+from urllib.parse import urlsplit
+
+from deta_discord_interactions.ratelimit import RateLimiter, route_key
+
+
+DISCORD_BASE_URL = "https://discord.com/api/v10"
+
+RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"})
+"Methods retried after a server or connection error. POST is not, since the request might have been processed already."
+
+
+class RESTClient:
+    """
+    Sends requests to the Discord API over a shared connection pool.
+
+    Parameters
+    ----------
+    base_url: str
+        Prepended to the paths starting with ``/``. Full URLs are used as is.
+    rate_limiter: RateLimiter, optional
+        Waits for and retries the rate limited requests. A new one is created if omitted.
+    timeout: float | tuple[float, float], default (5, 30)
+        The default ``timeout`` of the requests, see :mod:`requests`.
+    max_retries: int, default 3
+        How many times to retry a request that failed with a 5XX status code,
+        a connection error or a timeout.
+    backoff: float, default 0.5
+        Seconds to wait before the first retry, doubling after each one.
+    pool_maxsize: int, default 10
+        How many connections to keep open to each host.
+    sleep: Callable[[float], None]
+        Waits for that many seconds. Only meant to be replaced in tests.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DISCORD_BASE_URL,
+        *,
+        rate_limiter: Optional[RateLimiter] = None,
+        timeout: Union[float, tuple[float, float]] = (5, 30),
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        pool_maxsize: int = 10,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool_maxsize = pool_maxsize
+        self.sleep = sleep
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> "requests.Session":
+        "The :class:`requests.Session` used to send the requests, created the first time it is needed"
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> "requests.Session":
+        # Imported here to keep the package quick to import, see `__init__.py`
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        # Retries are handled in `request` instead, together with the rate limits
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> "requests.Response":
+        """
+        Sends a request, waiting for and retrying it if it is rate limited,
+        and retrying it after server and connection errors unless it is a POST.
+
+        Parameters
+        ----------
+        method: str
+            The HTTP method, like ``"GET"``.
+        url: str
+            A full URL, or a path starting with ``/`` relative to :attr:`base_url`.
+        **kwargs
+            Passed to :meth:`requests.Session.request`.
+
+        Returns
+        -------
+        requests.Response
+            The last response received. Check its status with ``raise_for_status()``.
+
+        Raises
+        ------
+        RateLimitExceeded
+            If the request was still rate limited after retrying.
+        requests.RequestException
+            If the last attempt failed with a connection error or a timeout.
+        """
+        import requests
+
+        method = method.upper()
+        if url.startswith("/"):
+            url = self.base_url + url
+        kwargs.setdefault("timeout", self.timeout)
+        route = route_key(method, urlsplit(url).path)
+        session = self.session
+
+        def send():
+            return session.request(method, url, **kwargs)
+
+        retries = self.max_retries if method in RETRY_METHODS else 0
+        for attempt in range(retries + 1):
+            try:
+                response = self.rate_limiter.request(route, send)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == retries:
+                    raise
+            else:
+                if response.status_code < 500 or attempt == retries:
+                    return response
+            self.sleep(self.backoff * 2 ** attempt)
+        return response
+
+    get = functools.partialmethod(request, "GET")
+    post = functools.partialmethod(request, "POST")
+    put = functools.partialmethod(request, "PUT")
+    patch = functools.partialmethod(request, "PATCH")
+    delete = functools.partialmethod(request, "DELETE")
+
+    def close(self):
+        "Closes the pooled connections. The client can still be used afterwards."
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+
+class AsyncRESTClient:
+    """
+    Asynchronous counterpart of :class:`RESTClient`, using :mod:`httpx`.
+
+    Connections are pooled per event loop, so the same client can be used from
+    several event loops, such as one started by ``asyncio.run`` in each thread.
+    The pool of a loop is closed when the loop shuts down its async generators,
+    as ``asyncio.run`` does before returning, and dropped once the loop is closed otherwise.
+
+    Parameters
+    ----------
+    base_url: str
+        Prepended to the paths starting with ``/``. Full URLs are used as is.
+    rate_limiter: RateLimiter, optional
+        Waits for and retries the rate limited requests.
+        Can be shared with a :class:`RESTClient`. A new one is created if omitted.
+    timeout: float | tuple[float, float], default (5, 30)
+        The default timeout of the requests, as seconds or a ``(connect, read)`` tuple.
+    max_retries: int, default 3
+        How many times to retry a request that failed with a 5XX status code,
+        a connection error or a timeout.
+    backoff: float, default 0.5
+        Seconds to wait before the first retry, doubling after each one.
+    max_connections: int, default 100
+        How many connections can be open at once in each event loop.
+        Requests sent while they are all in use wait for one to be available.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DISCORD_BASE_URL,
+        *,
+        rate_limiter: Optional[RateLimiter] = None,
+        timeout: Union[float, tuple[float, float]] = (5, 30),
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_connections: int = 100,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_connections = max_connections
+        # The pooled connections reference their loop, so a WeakKeyDictionary would never release them
+        self._clients: "dict[asyncio.AbstractEventLoop, tuple[httpx.AsyncClient, AsyncGenerator]]" = {}
+        self._clients_lock = threading.Lock()
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        "The :class:`httpx.AsyncClient` of the running event loop, created the first time it is needed"
+        import asyncio
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(loop)
+        if entry is not None:
+            return entry[0]
+
+        client = self._create_client()
+        closer = self._close_at_shutdown(loop, client)
+        # Started right away, which registers it with the loop, so that
+        # loop.shutdown_asyncgens() runs its `finally` block within the loop
+        try:
+            closer.asend(None).send(None)
+        except StopIteration:
+            pass
+        with self._clients_lock:
+            # The loops closed without shutting down their async generators
+            for closed in [other for other in self._clients if other.is_closed()]:
+                del self._clients[closed]
+            self._clients[loop] = (client, closer)
+        return client
+
+    async def _close_at_shutdown(self, loop, client: "httpx.AsyncClient"):
+        try:
+            yield
+        finally:
+            with self._clients_lock:
+                if self._clients.get(loop, (None,))[0] is client:
+                    del self._clients[loop]
+            await client.aclose()
+
+    def _create_client(self) -> "httpx.AsyncClient":
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("The AsyncRESTClient requires httpx, install it with `pip install httpx`") from None
+
+        return httpx.AsyncClient(
+            timeout=_httpx_timeout(httpx, self.timeout),
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+        )
+
+    async def request(self, method: str, url: str, **kwargs) -> "httpx.Response":
+        """
+        Async counterpart of :meth:`RESTClient.request`.
+
+        Parameters
+        ----------
+        method: str
+            The HTTP method, like ``"GET"``.
+        url: str
+            A full URL, or a path starting with ``/`` relative to :attr:`base_url`.
+        **kwargs
+            Passed to :meth:`httpx.AsyncClient.request`. Note that raw bodies
+            are passed as ``content`` in httpx, rather than ``data``.
+
+        Raises
+        ------
+        RateLimitExceeded
+            If the request was still rate limited after retrying.
+        httpx.TransportError
+            If the last attempt failed with a connection error or a timeout.
+        """
+        import asyncio
+        import httpx
+
+        method = method.upper()
+        if url.startswith("/"):
+            url = self.base_url + url
+        route = route_key(method, urlsplit(url).path)
+        client = self.client
+
+        def send():
+            return client.request(method, url, **kwargs)
+
+        retries = self.max_retries if method in RETRY_METHODS else 0
+        for attempt in range(retries + 1):
+            try:
+                response = await self.rate_limiter.request_async(route, send)
+            except httpx.TransportError:
+                if attempt == retries:
+                    raise
+            else:
+                if response.status_code < 500 or attempt == retries:
+                    return response
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+        return response
+
+    get = functools.partialmethod(request, "GET")
+    post = functools.partialmethod(request, "POST")
+    put = functools.partialmethod(request, "PUT")
+    patch = functools.partialmethod(request, "PATCH")
+    delete = functools.partialmethod(request, "DELETE")
+
+    async def aclose(self):
+        "Closes the pooled connections of the running event loop"
+        import asyncio
+        entry = self._clients.get(asyncio.get_running_loop())
+        if entry is not None:
+            await entry[1].aclose()
+
+
+def error_code(response) -> Optional[int]:
+    """
+    Returns the JSON error ``code`` of a Discord API response,
+    or None if its body is not a JSON error, like the ones from a proxy.
+    """
+    try:
+        data = response.json()
+    except ValueError:
+        return None
+    return data.get("code") if isinstance(data, dict) else None
+
+
+def _httpx_timeout(httpx, timeout):
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+_default_client: Optional[RESTClient] = None
+_default_async_client: Optional[AsyncRESTClient] = None
+_default_client_lock = threading.Lock()
+
+
+def default_client() -> RESTClient:
+    "Returns the RESTClient shared by the code that is not tied to a :class:`DiscordInteractions`"
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = RESTClient()
+    return _default_client
+
+
+def default_async_client() -> AsyncRESTClient:
+    "Returns the AsyncRESTClient shared by the code that is not tied to a :class:`DiscordInteractions`"
+    global _default_async_client
+    if _default_async_client is None:
+        with _default_client_lock:
+            if _default_async_client is None:
+                _default_async_client = AsyncRESTClient(rate_limiter=default_client().rate_limiter)
+    return _default_async_client
@@ -0,0 +1,317 @@
+"""URL routing for the custom routes registered with :meth:`DiscordInteractions.route`.
+
+Routes without parameters are stored in a dict keyed by their path, so that
+matching them takes a single lookup. Routes with parameters are compiled into a
+trie with one level per path segment, so that matching a path costs
+O(path length) no matter how many routes are registered.
+
+Path parameters use the Flask syntax, optionally with a converter:
+``/users/<int:user_id>/posts/<slug>``. The available converters are:
+
+- ``string`` (default): any text without a slash
+- ``int``: a non-negative integer, converted to ``int``
+- ``float``: a number, converted to ``float``
+- ``path``: any text including slashes. Must be the last segment.
+
+:class:`CustomIdRouter` reuses the same trie for the patterns of custom ID
+handlers, such as ``page:{n:int}:{query}``, with segments separated by colons.
+"""
+import re
+from typing import Any, Callable, Optional
+
+
+def _to_int(value: str) -> int:
+    if not value.isdigit():
+        raise ValueError(value)
+    return int(value)
+
+
+CONVERTERS: dict[str, Callable[[str], Any]] = {
+    "string": str,
+    "int": _to_int,
+    "float": float,
+    "path": str,
+}
+
+_PARAMETER = re.compile(r"^<(?:(?P<converter>[a-z]+):)?(?P<name>[A-Za-z_][A-Za-z0-9_]*)>$")
+
+ANY_METHOD = "*"
+
+
+class Route:
+    """
+    A path registered in a :class:`Router`, and the functions handling each HTTP method.
+
+    Attributes
+    ----------
+    path: str
+        The path as passed to :meth:`Router.add`, including parameters.
+    handlers: dict[str, Callable]
+        Maps uppercase HTTP methods (or ``"*"`` for any method) to their handler.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.handlers: dict[str, Callable] = {}
+
+    def get_handler(self, method: str) -> Optional[Callable]:
+        "Returns the function handling `method`, or None if it is not allowed"
+        handler = self.handlers.get(method.upper())
+        if handler is None:
+            handler = self.handlers.get(ANY_METHOD)
+        return handler
+
+    @property
+    def allowed_methods(self) -> list[str]:
+        return sorted(self.handlers)
+
+    def __repr__(self) -> str:
+        return f"<Route {self.path!r} {self.allowed_methods}>"
+
+
+class _Node:
+    __slots__ = ("static", "parameters", "catch_all", "route")
+
+    def __init__(self):
+        self.static: dict[str, _Node] = {}
+        # (name, converter, child) for each parameter segment, in registration order
+        self.parameters: list[tuple[str, Callable[[str], Any], _Node]] = []
+        # (name, route) for a trailing `path` parameter
+        self.catch_all: Optional[tuple[str, Route]] = None
+        self.route: Optional[Route] = None
+
+
+class Router:
+    """
+    Maps paths to :class:`Route` s.
+
+    Example usage:
+        router = Router()
+        router.add("/users/<int:user_id>", get_user, methods=["GET"])
+        route, params = router.match("/users/42")
+        # route.get_handler("GET") is get_user, params == {"user_id": 42}
+    """
+    separator = "/"
+    parameter_pattern = _PARAMETER
+    parameter_start = "<"
+
+    def __init__(self):
+        self.static_routes: dict[str, Route] = {}
+        self.root = _Node()
+
+    def _split(self, path: str) -> list[str]:
+        path = path.strip(self.separator)
+        return path.split(self.separator) if path else []
+
+    def add(self, path: str, handler: Callable, methods: Optional[list[str]] = None) -> Route:
+        """
+        Registers `handler` for the given path and HTTP methods.
+        Registering the same path and method twice replaces the previous handler.
+
+        Parameters
+        ----------
+        path: str
+            The path to match, optionally with parameters such as ``<int:user_id>``.
+        handler: Callable
+            The function to handle the matched requests.
+        methods: list[str], optional
+            Which HTTP methods the handler accepts. If omitted, accepts any method.
+        """
+        if not path.startswith("/"):
+            raise ValueError(f"Route paths must start with a slash, got {path!r}")
+        if self.parameter_start not in path:
+            route = self.static_routes.get(path)
+            if route is None:
+                route = self.static_routes[path] = Route(path)
+        else:
+            route = self._add_dynamic(path)
+        for method in (methods or [ANY_METHOD]):
+            route.handlers[method.upper()] = handler
+        return route
+
+    def _add_dynamic(self, path: str) -> Route:
+        node = self.root
+        segments = self._split(path)
+        for index, segment in enumerate(segments):
+            parameter = self.parameter_pattern.match(segment)
+            if parameter is None:
+                if self.parameter_start in segment:
+                    raise ValueError(f"Invalid path parameter {segment!r} in {path!r}")
+                node = node.static.setdefault(segment, _Node())
+                continue
+
+            name = parameter["name"]
+            converter_name = parameter["converter"] or "string"
+            if converter_name not in CONVERTERS:
+                raise ValueError(f"Unknown path converter {converter_name!r} in {path!r}")
+
+            if converter_name == "path":
+                if index != len(segments) - 1:
+                    raise ValueError(f"`path` parameters must be the last segment, got {path!r}")
+                if node.catch_all is None or node.catch_all[0] != name:
+                    node.catch_all = (name, Route(path))
+                return node.catch_all[1]
+
+            converter = CONVERTERS[converter_name]
+            for existing_name, existing_converter, child in node.parameters:
+                if existing_name == name and existing_converter is converter:
+                    node = child
+                    break
+            else:
+                child = _Node()
+                node.parameters.append((name, converter, child))
+                node = child
+
+        if node.route is None:
+            node.route = Route(path)
+        return node.route
+
+    def match(self, path: str) -> tuple[Optional[Route], dict[str, Any]]:
+        """
+        Finds the Route for `path`.
+
+        Returns
+        -------
+        tuple[Route | None, dict[str, Any]]
+            The matched Route (or None if no route matches) and its converted path parameters.
+        """
+        route = self.static_routes.get(path)
+        if route is not None:
+            return route, {}
+        params: dict[str, Any] = {}
+        route = self._match(self.root, self._split(path), 0, params)
+        return route, (params if route is not None else {})
+
+    def _match(self, node: _Node, segments: list[str], index: int, params: dict[str, Any]) -> Optional[Route]:
+        if index == len(segments):
+            return node.route
+
+        segment = segments[index]
+        child = node.static.get(segment)
+        if child is not None:
+            route = self._match(child, segments, index + 1, params)
+            if route is not None:
+                return route
+
+        for name, converter, child in node.parameters:
+            try:
+                params[name] = converter(segment)
+            except ValueError:
+                continue
+            route = self._match(child, segments, index + 1, params)
+            if route is not None:
+                return route
+            del params[name]
+
+        if node.catch_all is not None:
+            name, route = node.catch_all
+            params[name] = self.separator.join(segments[index:])
+            return route
+        return None
+
+    def __iter__(self):
+        "Iterates over every registered Route"
+        yield from self.static_routes.values()
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.route is not None:
+                yield node.route
+            if node.catch_all is not None:
+                yield node.catch_all[1]
+            stack.extend(node.static.values())
+            stack.extend(child for _, _, child in node.parameters)
+
+
+_CUSTOM_ID_PARAMETER = re.compile(r"^\{(?P<name>[A-Za-z_][A-Za-z0-9_]*)(?::(?P<converter>[a-z]+))?\}$")
+
+# Colons outside of braces, as parameters like {n:int} contain one too
+_CUSTOM_ID_SEPARATOR = re.compile(r":(?![^{}]*\})")
+
+
+class CustomIdPattern(str):
+    """
+    The pattern of a custom ID handler, as returned by
+    :meth:`DiscordInteractionsBlueprint.custom_handler`.
+
+    Example usage:
+        @discord.custom_handler("page:{n:int}:{query}")
+        def page(ctx, n, query):
+            ...
+
+        Button(custom_id=page.build(n=2, query="cats"), label="Next")  # "page:2:cats"
+    """
+
+    def build(self, *state, **params) -> str:
+        """
+        Returns a custom ID matching this pattern.
+
+        Parameters
+        ----------
+        *state
+            Values stored after the pattern, one per line, like when
+            passing a list as the ``custom_id`` of a component.
+        **params
+            The value of each parameter of the pattern.
+        """
+        segments = []
+        for segment in _CUSTOM_ID_SEPARATOR.split(self):
+            parameter = _CUSTOM_ID_PARAMETER.match(segment)
+            if parameter is None:
+                segments.append(segment)
+                continue
+            value = str(params[parameter["name"]])
+            if "\n" in value:
+                raise ValueError(f"The value of {parameter['name']!r} cannot contain newlines: {value!r}")
+            if parameter["converter"] != "path" and CustomIdRouter.separator in value:
+                raise ValueError(f"The value of {parameter['name']!r} cannot contain {CustomIdRouter.separator!r}: {value!r}")
+            segments.append(value)
+        return "\n".join((CustomIdRouter.separator.join(segments), *(str(item) for item in state)))
+
+
+class CustomIdRouter(Router):
+    """
+    Maps custom IDs to the patterns of the custom ID handlers registered with one.
+
+    Patterns are segments separated by colons, each of which is either static
+    or a parameter like ``{query}`` or ``{n:int}``, using the same converters
+    as the paths. A trailing ``{rest:path}`` matches everything after a prefix.
+    Matching costs O(custom ID length) no matter how many patterns are registered.
+
+    Example usage:
+        router = CustomIdRouter()
+        router.add("page:{n:int}:{query}")
+        router.match("page:2:cats")  # ("page:{n:int}:{query}", {"n": 2, "query": "cats"})
+    """
+    separator = ":"
+    parameter_pattern = _CUSTOM_ID_PARAMETER
+    parameter_start = "{"
+
+    def _split(self, path: str) -> list[str]:
+        path = path.strip(self.separator)
+        return _CUSTOM_ID_SEPARATOR.split(path) if path else []
+
+    @classmethod
+    def is_pattern(cls, custom_id: str) -> bool:
+        "Whether `custom_id` has parameters, and so has to be registered with a CustomIdRouter"
+        return cls.parameter_start in custom_id
+
+    def add(self, pattern: str, handler: Optional[Callable] = None, methods: Optional[list[str]] = None) -> Route:
+        "Registers a pattern. Custom IDs have no methods, so the handler is optional."
+        if not self.is_pattern(pattern):
+            raise ValueError(f"Custom ID patterns must have parameters, got {pattern!r}")
+        route = self._add_dynamic(pattern)
+        if handler is not None:
+            route.handlers[ANY_METHOD] = handler
+        return route
+
+    def match(self, custom_id: str) -> tuple[Optional[str], dict[str, Any]]:
+        """
+        Finds the pattern matching `custom_id`.
+
+        Returns
+        -------
+        tuple[str | None, dict[str, Any]]
+            The matched pattern (or None if no pattern matches) and its converted parameters.
+        """
+        route, params = super().match(custom_id)
+        return (route.path if route is not None else None), params
@@ -0,0 +1,177 @@
+"""Packs the state of custom ID handlers into as few characters as possible.
+
+Custom IDs are limited to 100 characters, and storing each value as text after
+the handler ID quickly runs out of room. A :class:`StateCodec` instead packs
+all the values with a bounded number of options (``bool``, :class:`enum.Enum`
+members stored by index, ``range`` s) into a single integer, and writes every
+integer in base 64.
+
+Example usage:
+    class Sort(enum.Enum):
+        new = "new"
+        top = "top"
+
+    SEARCH = StateCodec(page=int, sort=Sort, ascending=bool, query=str)
+
+    @discord.custom_handler("search")
+    def search(ctx, state: SEARCH):
+        state["page"], state["sort"], ...
+
+    Button(custom_id=[search, SEARCH.encode(page=12, sort=Sort.top, ascending=False, query="cats")])
+"""
+import enum
+import string
+from typing import Any, Union
+
+
+ALPHABET = string.digits + string.ascii_uppercase + string.ascii_lowercase + "-_"
+"The digits of the base 64 integers, none of which are used as separators"
+
+SEPARATOR = "."
+
+_DIGITS = {character: value for value, character in enumerate(ALPHABET)}
+
+
+def encode_int(value: int) -> str:
+    "Writes a non-negative integer in base 64"
+    if value < 0:
+        raise ValueError(f"Cannot encode a negative integer: {value}")
+    base = len(ALPHABET)
+    digits = []
+    while True:
+        value, digit = divmod(value, base)
+        digits.append(ALPHABET[digit])
+        if not value:
+            return "".join(reversed(digits))
+
+
+def decode_int(text: str) -> int:
+    "The inverse of :func:`encode_int`"
+    if not text:
+        raise ValueError("Empty integer")
+    value = 0
+    base = len(ALPHABET)
+    for character in text:
+        value = value * base + _DIGITS[character]
+    return value
+
+
+FieldType = Union[type, range]
+
+
+class StateCodec:
+    """
+    Encodes a fixed set of named values into a short string, and back.
+
+    Parameters
+    ----------
+    **fields: type | range
+        The type of each value, in the order they are stored:
+
+        - ``bool``, an :class:`enum.Enum` subclass, or a ``range`` of integers:
+          packed together into a single integer.
+        - ``int``: stored on its own, negative numbers take one more character.
+        - ``str``: stored as is, must not contain ``"."`` unless it is the last ``str``,
+          nor newlines, which separate the lines of the custom ID.
+    """
+
+    def __init__(self, **fields: FieldType):
+        self.fields = fields
+        self.packed: list[tuple[str, int]] = []
+        self.separate: list[tuple[str, FieldType]] = []
+        for name, field in fields.items():
+            if field is bool:
+                self.packed.append((name, 2))
+            elif isinstance(field, range):
+                self.packed.append((name, len(field)))
+            elif isinstance(field, type) and issubclass(field, enum.Enum):
+                self.packed.append((name, len(field)))
+            elif field is int or field is str:
+                self.separate.append((name, field))
+            else:
+                raise ValueError(f"Unsupported state field type for {name!r}: {field!r}")
+        self._members = {
+            name: list(field) for name, field in fields.items()
+            if isinstance(field, type) and issubclass(field, enum.Enum)
+        }
+        self._last_str = max((i for i, (_, field) in enumerate(self.separate) if field is str), default=None)
+
+    def _index(self, name: str, value) -> int:
+        field = self.fields[name]
+        if field is bool:
+            return int(bool(value))
+        elif isinstance(field, range):
+            return field.index(value)
+        return self._members[name].index(field(value))
+
+    def _value(self, name: str, index: int):
+        field = self.fields[name]
+        if field is bool:
+            return bool(index)
+        elif isinstance(field, range):
+            return field[index]
+        return self._members[name][index]
+
+    def encode(self, **values) -> str:
+        "Returns the values as a string, to be included in a custom ID"
+        parts = []
+        if self.packed:
+            packed = 0
+            for name, size in reversed(self.packed):
+                packed = packed * size + self._index(name, values[name])
+            parts.append(encode_int(packed))
+        for i, (name, field) in enumerate(self.separate):
+            value = values[name]
+            if field is int:
+                parts.append(encode_int(value) if value >= 0 else "~" + encode_int(-value))
+            else:
+                value = str(value)
+                if "\n" in value:
+                    raise ValueError(f"The str fields cannot contain newlines, got {name}={value!r}")
+                if SEPARATOR in value and i != self._last_str:
+                    raise ValueError(f"Only the last str field can contain {SEPARATOR!r}, got {name}={value!r}")
+                parts.append(value)
+        return SEPARATOR.join(parts)
+
+    def decode(self, text: str) -> dict[str, Any]:
+        """
+        Returns the values encoded by :meth:`encode`.
+
+        Raises
+        ------
+        ValueError
+            If `text` was not encoded by this codec.
+        """
+        count = len(self.separate) + bool(self.packed)
+        if self._last_str is None:
+            parts = text.split(SEPARATOR)
+        else:
+            # Everything after the separators before the last str belongs to it
+            before = self._last_str + bool(self.packed)
+            head = text.split(SEPARATOR, before)
+            tail = head.pop().rsplit(SEPARATOR, count - before - 1) if len(head) == before + 1 else []
+            parts = head + tail
+        if len(parts) != count:
+            raise ValueError(f"Expected {count} values, got {text!r}")
+
+        values = {}
+        try:
+            if self.packed:
+                packed = decode_int(parts.pop(0))
+                for name, size in self.packed:
+                    packed, index = divmod(packed, size)
+                    values[name] = self._value(name, index)
+                if packed:
+                    raise ValueError(f"Packed value out of range in {text!r}")
+            for (name, field), part in zip(self.separate, parts):
+                if field is int:
+                    values[name] = -decode_int(part[1:]) if part.startswith("~") else decode_int(part)
+                else:
+                    values[name] = part
+        except (KeyError, IndexError):
+            raise ValueError(f"Invalid state: {text!r}") from None
+        return values
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(field, '__name__', field)}" for name, field in self.fields.items())
+        return f"StateCodec({fields})"
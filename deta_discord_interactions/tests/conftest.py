@@ -11,9 +11,14 @@ os.environ["DETA_ORM_FORMAT_NICELY"] = "1"
 
 os.environ["DETA_PROJECT_KEY"] = ""
 
+import io
+import json
+from typing import Union
+
 import pytest
+import urllib3
 
-from deta_discord_interactions import DiscordInteractions, Client
+from deta_discord_interactions import DiscordInteractions, Client, InteractionType
 from deta_discord_interactions.utils.oauth import enable_oauth
 
 @pytest.fixture(scope="module")
@@ -37,6 +42,99 @@ def oauth_client(oauth_discord):
     return Client(oauth_discord)
 
 
+@pytest.fixture(scope="session")
+def interaction():
+    "Builds the data of an application command interaction"
+    def build(name: str, options: list = None) -> dict:
+        return {
+            "type": InteractionType.APPLICATION_COMMAND,
+            "id": 1,
+            "channel_id": "",
+            "guild_id": "",
+            "token": "",
+            "data": {"id": 1, "name": name, "options": options or []},
+            "member": {"id": 1, "nick": "", "user": {"id": 1, "username": "test"}},
+        }
+    return build
+
+
+@pytest.fixture(scope="session")
+def component_interaction(interaction):
+    "Builds the data of a message component interaction"
+    def build(custom_id: str) -> dict:
+        data = interaction("")
+        data["type"] = InteractionType.MESSAGE_COMPONENT
+        data["data"] = {"custom_id": custom_id, "component_type": 2}
+        return data
+    return build
+
+
+@pytest.fixture(scope="session")
+def wsgi_environ():
+    "Builds the WSGI environ of a request, encoding dict bodies as JSON"
+    def build(path: str = "/discord", body: Union[dict, bytes, None] = None, method: str = "POST") -> dict:
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+        body = body or b""
+        return {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": io.BytesIO(body),
+        }
+    return build
+
+
+@pytest.fixture(scope="session")
+def wsgi_request(wsgi_environ):
+    "Sends a request to a WSGI app, returning the status, headers and body of the response"
+    def send(app, path: str = "/discord", body: Union[dict, bytes, None] = None, method: str = "POST"):
+        response = {}
+
+        def start_response(status, headers):
+            response["status"] = status
+            response["headers"] = dict(headers)
+
+        result = app(wsgi_environ(path, body, method), start_response)
+        try:
+            content = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], content
+    return send
+
+
+@pytest.fixture(scope="session")
+def asgi_request():
+    "Sends a request to an ASGI app, returning the status, headers and body of the response"
+    async def send(app, path: str = "/discord", body: Union[dict, bytes, None] = None, method: str = "POST"):
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+        body = body or b""
+        # Split in two to exercise reading bodies sent in chunks
+        received = [
+            {"type": "http.request", "body": body[:5], "more_body": True},
+            {"type": "http.request", "body": body[5:], "more_body": False},
+        ]
+        sent = []
+
+        async def receive():
+            return received.pop(0)
+
+        async def send_message(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": method, "path": path, "query_string": b"", "headers": []}
+        await app(scope, receive, send_message)
+        assert sent[0]["type"] == "http.response.start"
+        headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in sent[0]["headers"]}
+        return sent[0]["status"], headers, sent[1]["body"]
+    return send
+
+
 @pytest.fixture(autouse=True)
 def no_http_requests(monkeypatch):
     def urlopen_mock(self, method, url, *args, **kwargs):
@@ -46,4 +144,22 @@ def no_http_requests(monkeypatch):
 
     monkeypatch.setattr(
         "urllib3.connectionpool.HTTPConnectionPool.urlopen", urlopen_mock
-    )
\ No newline at end of file
+    )
+
+_urlopen = urllib3.connectionpool.HTTPConnectionPool.urlopen
+
+
+@pytest.fixture()
+def allow_local_http(monkeypatch):
+    "Allows the requests to servers running on 127.0.0.1"
+    def local_urlopen(self, method, url, *args, **kwargs):
+        if self.host != "127.0.0.1":
+            raise RuntimeError(
+                f"The test was about to {method} {self.scheme}://{self.host}{url}"
+            )
+        return _urlopen(self, method, url, *args, **kwargs)
+
+    monkeypatch.setattr(
+        "urllib3.connectionpool.HTTPConnectionPool.urlopen", local_urlopen
+    )
+
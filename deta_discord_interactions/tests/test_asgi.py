@@ -0,0 +1,142 @@
+import asyncio
+import json
+import threading
+import time
+
+from deta_discord_interactions import (
+    ASGIApp,
+    DiscordInteractions,
+    ResponseType,
+)
+
+
+def test_asgi_sync_and_async_commands(discord: DiscordInteractions, interaction, asgi_request):
+    @discord.command()
+    def ping(ctx, pong: str = "ping"):
+        return f"Ping {pong}!"
+
+    @discord.command()
+    async def async_ping(ctx, pong: str = "ping"):
+        await asyncio.sleep(0)
+        return f"Async {pong}!"
+
+    app = ASGIApp(discord, max_workers=2)
+
+    async def main():
+        return await asyncio.gather(
+            asgi_request(app, "/discord", interaction("ping", [{"type": 3, "name": "pong", "value": "Pong"}])),
+            asgi_request(app, "/discord", interaction("async_ping", [{"type": 3, "name": "pong", "value": "Pong"}])),
+        )
+
+    (status1, _, body1), (status2, _, body2) = asyncio.run(main())
+    app.shutdown()
+
+    assert status1 == status2 == 200
+    assert json.loads(body1)["data"]["content"] == "Ping Pong!"
+    assert json.loads(body2)["type"] == ResponseType.CHANNEL_MESSAGE_WITH_SOURCE
+    assert json.loads(body2)["data"]["content"] == "Async Pong!"
+
+
+def test_asgi_slow_handlers_run_concurrently(discord: DiscordInteractions, interaction, asgi_request):
+    @discord.command()
+    async def slow_async(ctx):
+        await asyncio.sleep(0.2)
+        return "done"
+
+    @discord.command()
+    def slow_sync(ctx):
+        time.sleep(0.2)
+        return threading.current_thread().name
+
+    app = ASGIApp(discord, max_workers=4)
+
+    async def main():
+        return await asyncio.gather(
+            *(asgi_request(app, "/discord", interaction("slow_async")) for _ in range(5)),
+            *(asgi_request(app, "/discord", interaction("slow_sync")) for _ in range(4)),
+        )
+
+    start = time.perf_counter()
+    results = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    app.shutdown()
+
+    assert all(status == 200 for status, _, _ in results)
+    assert json.loads(results[-1][2])["data"]["content"].startswith("discord-interactions")
+    assert elapsed < 0.2 * 3
+
+
+def test_asgi_async_handler_and_action(discord: DiscordInteractions, client, component_interaction, asgi_request):
+    @discord.custom_handler("async_click")
+    async def handle_click(ctx, count: int):
+        return f"Clicked {count + 1} times"
+
+    @discord.action("async_action")
+    async def action(event):
+        return event["id"]
+
+    app = ASGIApp(discord)
+
+    status, _, response = asyncio.run(asgi_request(app, "/discord", component_interaction("async_click\n2")))
+    assert status == 200
+    assert json.loads(response)["data"]["content"] == "Clicked 3 times"
+
+    status, _, response = asyncio.run(asgi_request(app, "/__space/v0/actions", {"event": {"id": "async_action"}}))
+    assert status == 200
+    assert json.loads(response)["result"] == "async_action"
+
+    # Async handlers also work through the synchronous Client
+    assert client.run_handler("async_click", "4").content == "Clicked 5 times"
+    assert client.run_action("async_action") == "async_action"
+    app.shutdown()
+
+
+def test_asgi_errors(discord: DiscordInteractions, interaction, asgi_request):
+    app = ASGIApp(discord)
+    status, _, response = asyncio.run(asgi_request(app, "/missing", method="GET"))
+    assert status == 404
+
+    status, _, response = asyncio.run(asgi_request(app, "/discord", interaction("this_command_does_not_exist")))
+    assert status == 500
+    app.shutdown()
+
+
+def test_asgi_routes(asgi_request):
+    discord = DiscordInteractions()
+
+    @discord.route("/sync/<int:number>", methods=["GET"])
+    def sync_route(request, start_response, abort):
+        start_response("200 OK", [])
+        return [str(request["path_params"]["number"] * 2).encode()]
+
+    @discord.route("/async/<name>")
+    async def async_route(request, start_response, abort):
+        await asyncio.sleep(0)
+        start_response("200 OK", [])
+        return [f"Hello {request['path_params']['name']}".encode()]
+
+    app = ASGIApp(discord)
+    status, _, response = asyncio.run(asgi_request(app, "/sync/21", method="GET"))
+    assert (status, response) == (200, b"42")
+    status, _, response = asyncio.run(asgi_request(app, "/async/world", method="GET"))
+    assert (status, response) == (200, b"Hello world")
+    status, _, _ = asyncio.run(asgi_request(app, "/sync/21", method="POST"))
+    assert status == 405
+    app.shutdown()
+
+
+def test_asgi_lifespan(discord: DiscordInteractions):
+    app = ASGIApp(discord)
+    _ = app.executor
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(app({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert app._executor is None
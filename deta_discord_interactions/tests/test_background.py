@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+
+from deta_discord_interactions import (
+    BackgroundExecutor,
+    BackgroundQueueFull,
+    Context,
+    DiscordInteractions,
+    Message,
+)
+
+
+def test_queue_limit():
+    executor = BackgroundExecutor(max_workers=1, max_queued=1)
+    release = threading.Event()
+
+    first = executor.submit(release.wait, 5)
+    second = executor.submit(release.wait, 5)
+    with pytest.raises(BackgroundQueueFull):
+        executor.submit(release.wait, 5)
+
+    stats = executor.stats()
+    assert stats["queued"] + stats["running"] == 2
+    assert stats["rejected"] == 1
+
+    release.set()
+    assert first.result(timeout=5) and second.result(timeout=5)
+    executor.shutdown()
+    assert executor.stats()["completed"] == 2
+    assert executor.queue_depth == 0
+
+
+def test_failures_are_reported():
+    executor = BackgroundExecutor(max_workers=1)
+    failures = []
+    executor.failure_callbacks.append(lambda err, function: failures.append((err, function)))
+
+    def fail():
+        raise ValueError("Oops")
+
+    future = executor.submit(fail)
+    with pytest.raises(ValueError):
+        future.result(timeout=5)
+    executor.shutdown()
+
+    assert executor.stats()["failed"] == 1
+    assert isinstance(failures[0][0], ValueError)
+    assert failures[0][1] is fail
+
+
+def test_shutdown_drains():
+    executor = BackgroundExecutor(max_workers=1, max_queued=10)
+    results = []
+    for i in range(5):
+        executor.submit(results.append, i)
+    executor.shutdown(wait=True)
+    assert results == [0, 1, 2, 3, 4]
+
+
+def test_run_with_deadline():
+    executor = BackgroundExecutor(max_workers=2)
+    late = []
+
+    assert executor.run_with_deadline(lambda: 42, 5, late.append) == (True, 42)
+
+    release = threading.Event()
+    delivered = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "late"
+
+    assert executor.run_with_deadline(slow, 0.01, lambda result: (late.append(result), delivered.set())) == (False, None)
+    release.set()
+    assert delivered.wait(5)
+    assert late == ["late"]
+
+    def fail():
+        raise KeyError("early")
+
+    # Failures before the deadline are raised to the caller instead of counted
+    with pytest.raises(KeyError):
+        executor.run_with_deadline(fail, 5, late.append)
+    executor.shutdown()
+    assert executor.stats()["failed"] == 0
+
+
+def test_context_run_in_background(monkeypatch):
+    app = DiscordInteractions()
+    sent = []
+    monkeypatch.setattr(Context, "send", lambda self, message: sent.append((self, message)))
+
+    ctx = Context(discord=app, token="token")
+
+    def work(ctx, text):
+        ctx.send(text)
+        return ctx
+
+    future = ctx.run_in_background(work, "Done!")
+    snapshot = future.result(timeout=5)
+    app.shutdown()
+
+    assert snapshot is not ctx
+    assert snapshot.token == "token"
+    assert sent == [(snapshot, "Done!")]
+
+
+def test_context_run_in_background_without_app(client, discord):
+    @discord.command()
+    def report(ctx):
+        ctx.run_in_background(lambda ctx: results.append("ran"))
+        return Message(deferred=True)
+
+    results = []
+    client.run("report")
+    assert results == ["ran"]
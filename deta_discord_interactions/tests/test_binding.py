@@ -0,0 +1,116 @@
+import copy
+import enum
+
+from deta_discord_interactions import (
+    ApplicationCommandType,
+    CommandOptionType,
+    Context,
+    Member,
+    User,
+)
+from deta_discord_interactions.binding import bind_options
+
+
+class Animal(enum.Enum):
+    Dog = "dog"
+    Cat = "cat"
+
+
+class BigNumber(enum.IntEnum):
+    thousand = 1_000
+    million = 1_000_000
+
+
+RESOLVED = {
+    "users": {
+        "1": {"id": "1", "username": "member"},
+        "2": {"id": "2", "username": "user"},
+    },
+    "members": {"1": {"nick": "nickname"}},
+}
+
+
+def make_context(options: list[dict], resolved: dict = None) -> Context:
+    return Context(
+        command_type=ApplicationCommandType.CHAT_INPUT,
+        options=options,
+        resolved=resolved,
+    )
+
+
+def test_enum_members(discord):
+    @discord.command()
+    def favorite(ctx, animal: Animal, number: BigNumber):
+        pass
+
+    context = make_context([
+        {"name": "animal", "type": CommandOptionType.STRING, "value": "cat"},
+        {"name": "number", "type": CommandOptionType.INTEGER, "value": 1_000_000},
+    ])
+    args, kwargs = context.create_args(discord.discord_commands["favorite"])
+    assert args == []
+    assert kwargs == {"animal": Animal.Cat, "number": BigNumber.million}
+    assert kwargs["number"] is BigNumber.million
+
+
+def test_number_is_float(discord):
+    @discord.command()
+    def half(ctx, number: float):
+        pass
+
+    context = make_context([{"name": "number", "type": CommandOptionType.NUMBER, "value": 3}])
+    _, kwargs = context.create_args(discord.discord_commands["half"])
+    assert kwargs["number"] == 3.0
+    assert isinstance(kwargs["number"], float)
+
+
+def test_users_leave_resolved_untouched(discord):
+    @discord.command()
+    def pair(ctx, first: Member, second: User):
+        pass
+
+    resolved = copy.deepcopy(RESOLVED)
+    context = make_context(
+        [
+            {"name": "first", "type": CommandOptionType.USER, "value": "1"},
+            {"name": "second", "type": CommandOptionType.USER, "value": "2"},
+        ],
+        resolved,
+    )
+    _, kwargs = context.create_args(discord.discord_commands["pair"])
+    assert isinstance(kwargs["first"], Member)
+    assert kwargs["first"].display_name == "nickname"
+    assert type(kwargs["second"]) is User
+    assert resolved == RESOLVED
+
+
+def test_subcommand_path(discord):
+    group = discord.command_group("group")
+    subgroup = group.subgroup("pets")
+
+    @subgroup.command()
+    def adopt(ctx, animal: Animal):
+        pass
+
+    options = [{
+        "name": "pets",
+        "type": CommandOptionType.SUB_COMMAND_GROUP,
+        "options": [{
+            "name": "adopt",
+            "type": CommandOptionType.SUB_COMMAND,
+            "options": [{"name": "animal", "type": CommandOptionType.STRING, "value": "dog"}],
+        }],
+    }]
+    args, kwargs = bind_options(discord.discord_commands["group"], options, {})
+    assert args == ["pets", "adopt"]
+    assert kwargs == {"animal": Animal.Dog}
+
+
+def test_without_command():
+    context = make_context([
+        {"name": "animal", "type": CommandOptionType.STRING, "value": "dog"},
+        {"name": "user", "type": CommandOptionType.USER, "value": "2"},
+    ], RESOLVED)
+    _, kwargs = context.create_args()
+    assert kwargs["animal"] == "dog"
+    assert kwargs["user"].username == "user"
@@ -0,0 +1,71 @@
+import subprocess
+import sys
+
+import pytest
+
+from deta_discord_interactions import DiscordInteractions, Message, codec
+
+
+CODEC_NAMES = ["json", "orjson", "msgspec"]
+
+
+@pytest.fixture(params=CODEC_NAMES)
+def json_codec(request):
+    try:
+        new_codec = codec.create_codec(request.param)
+    except ImportError:
+        pytest.skip(f"{request.param} is not installed")
+    previous = codec.get_codec()
+    codec.set_codec(new_codec)
+    yield new_codec
+    codec.set_codec(previous)
+
+
+def test_codec_roundtrip(json_codec):
+    data = {"a": [1, 2.5, None, True], "b": {"c": "ç"}}
+    encoded = json_codec.dumps(data)
+    assert isinstance(encoded, bytes)
+    assert json_codec.loads(encoded) == data
+    assert json_codec.loads(encoded.decode()) == data
+    assert json_codec.dumps_str(data) == encoded.decode()
+
+    pretty = json_codec.dumps({"b": 1, "a": 2}, pretty=True)
+    assert b"\n" in pretty
+    assert pretty.index(b'"a"') < pretty.index(b'"b"')
+
+
+def test_codec_pretty_matches_json(json_codec):
+    # The local files are written the same way whichever codec is in use
+    data = {"b": [1, 2.5], "a": {"c": "ç"}}
+    assert json_codec.dumps(data, pretty=True) == codec.JSONCodec().dumps(data, pretty=True)
+
+
+def test_default_codec(monkeypatch):
+    # Installing orjson or msgspec does not change the codec unless asked to
+    monkeypatch.delenv("DISCORD_INTERACTIONS_JSON", raising=False)
+    script = "from deta_discord_interactions import codec; print(codec.get_codec().name)"
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "json"
+
+
+def test_codec_non_str_keys(json_codec):
+    assert json_codec.loads(json_codec.dumps({1: "a"})) == {"1": "a"}
+
+
+def test_codec_app_setting(json_codec):
+    app = DiscordInteractions()
+    assert app.json_codec is json_codec
+
+    app.json_codec = "json"
+    assert type(codec.get_codec()) is codec.JSONCodec
+
+
+def test_message_encode(json_codec):
+    content, mimetype = Message("Hello").encode()
+    assert mimetype == "application/json"
+    assert json_codec.loads(content)["data"]["content"] == "Hello"
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        codec.create_codec("yaml")
@@ -262,3 +262,45 @@ def test_message_command_argument(discord, client):
 
     with client.context(Context(target_message=Message(content="This is a test."))):
         assert client.run("repeat").content == "I repeat, this is a test."
+
+
+def test_lazy_parsing():
+    data = {
+        "type": 2,
+        "member": {"user": {"id": "1", "username": "author"}, "nick": None},
+        "data": {
+            "type": ApplicationCommandType.USER,
+            "name": "inspect",
+            "target_id": "2",
+            "resolved": {
+                "users": {"2": {"id": "2", "username": "target"}},
+                "members": {"2": {"nick": "nickname"}},
+                "attachments": {"3": {"id": "3", "filename": "file.txt"}},
+            },
+        },
+    }
+    context = Context.from_data(data=data)
+
+    for name in ("author", "members", "users", "attachments", "target_user", "message", "components"):
+        assert name not in vars(context)
+
+    assert context.author.display_name == "author"
+    assert "members" not in vars(context)
+    assert context.target_user.display_name == "nickname"
+    assert context.target_message is None
+    assert context.attachments["3"].filename == "file.txt"
+    assert context.message is None
+    assert context.components == []
+    # Left untouched while parsing the members
+    assert "user" not in data["data"]["resolved"]["members"]["2"]
+
+    # Assigning overrides the parsed value
+    context.author = None
+    assert context.author is None
+
+
+def test_direct_construction():
+    context = Context(author=Member(nick="nickname"))
+    assert context.author.display_name == "nickname"
+    assert context.target_user is None
+    assert context.users is None
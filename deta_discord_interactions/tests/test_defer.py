@@ -0,0 +1,166 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+
+import pytest
+import requests
+
+from deta_discord_interactions import (
+    ASGIApp,
+    BackgroundExecutor,
+    Context,
+    DiscordInteractions,
+    ResponseType,
+)
+
+
+@pytest.fixture()
+def edits(monkeypatch):
+    "Collects the messages edited in after deferring"
+    edited = queue.Queue()
+    monkeypatch.setattr(Context, "edit", lambda self, updated, message="@original": edited.put((updated, message)))
+    return edited
+
+
+@pytest.fixture()
+def app():
+    app = DiscordInteractions()
+    release = threading.Event()
+
+    @app.command(defer_after=0.05)
+    def slow(ctx):
+        release.wait(5)
+        return "Done!"
+
+    @app.command(defer_after=1)
+    def fast(ctx):
+        return "Fast!"
+
+    @app.custom_handler("slow_button", defer_after=0.05)
+    def slow_button(ctx):
+        release.wait(5)
+        return "Clicked!"
+
+    app.release = release
+    yield app
+    release.set()
+
+
+def test_defer_command(app, edits, interaction):
+    response = app.run_command(interaction("slow"))
+    assert response.response_type == ResponseType.DEFERRED_CHANNEL_MESSAGE_WITH_SOURCE
+    assert edits.empty()
+
+    app.release.set()
+    message, target = edits.get(timeout=5)
+    assert message.content == "Done!"
+    assert target == "@original"
+
+
+def test_defer_not_needed(app, edits, interaction):
+    response = app.run_command(interaction("fast"))
+    assert response.response_type == ResponseType.CHANNEL_MESSAGE_WITH_SOURCE
+    assert response.content == "Fast!"
+    assert edits.empty()
+
+
+def test_defer_handler(app, edits, component_interaction):
+    response = app.run_handler(component_interaction("slow_button"))
+    assert response.response_type == ResponseType.DEFERRED_UPDATE_MESSAGE
+
+    app.release.set()
+    message, _ = edits.get(timeout=5)
+    assert message.content == "Clicked!"
+
+
+def test_defer_asgi(app, edits, interaction):
+    asgi_app = ASGIApp(app)
+
+    async def main():
+        response = await asgi_app.run_command(interaction("slow"))
+        assert response.response_type == ResponseType.DEFERRED_CHANNEL_MESSAGE_WITH_SOURCE
+        app.release.set()
+        # Let the task finish while the loop is still running
+        while asgi_app._deferred_tasks:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    message, _ = edits.get(timeout=5)
+    assert message.content == "Done!"
+    asgi_app.shutdown()
+
+
+def test_defer_waits_for_response(app, edits, interaction, wsgi_environ):
+    @app.command(defer_after=0.05)
+    def barely_late(ctx):
+        time.sleep(0.06)
+        return "Late!"
+
+    body = app(wsgi_environ(body=interaction("barely_late")), lambda status, headers: None)
+    assert json.loads(b"".join(body))["type"] == ResponseType.DEFERRED_CHANNEL_MESSAGE_WITH_SOURCE
+    # The command is done, but the server has not finished sending the deferred response
+    time.sleep(0.1)
+    assert edits.empty()
+
+    body.close()
+    message, _ = edits.get(timeout=5)
+    assert message.content == "Late!"
+
+
+def test_defer_asgi_waits_for_response(app, edits, interaction):
+    asgi_app = ASGIApp(app)
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": json.dumps(interaction("slow")).encode()}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            # Finishes the command right before the deferred response is sent
+            app.release.set()
+            await asyncio.sleep(0.1)
+            assert edits.empty()
+        sent.append(message)
+
+    async def main():
+        scope = {"type": "http", "method": "POST", "path": "/discord", "query_string": b"", "headers": []}
+        await asgi_app(scope, receive, send)
+        while asgi_app._deferred_tasks:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    message, _ = edits.get(timeout=5)
+    assert message.content == "Done!"
+    assert json.loads(sent[-1]["body"])["type"] == ResponseType.DEFERRED_CHANNEL_MESSAGE_WITH_SOURCE
+    asgi_app.shutdown()
+
+
+def test_defer_retries_not_found(app, interaction, monkeypatch):
+    edited = queue.Queue()
+    attempts = []
+
+    def edit(self, updated, message="@original"):
+        attempts.append(updated)
+        if len(attempts) < 3:
+            response = requests.Response()
+            response.status_code = 404
+            raise requests.HTTPError(response=response)
+        edited.put(updated)
+
+    monkeypatch.setattr(Context, "edit", edit)
+    app.DEFERRED_EDIT_BACKOFF = 0.01
+    app.run_command(interaction("slow"))
+    app.release.set()
+    assert edited.get(timeout=5).content == "Done!"
+    assert len(attempts) == 3
+
+
+def test_defer_queue_full(app, edits, interaction, capsys):
+    app.background_executor = BackgroundExecutor(max_workers=1, max_queued=0)
+    app.background_executor.submit(app.release.wait, 5)
+
+    response = app.run_command(interaction("fast"))
+    assert response.content == "Fast!"
+    assert "without a deadline" in capsys.readouterr().out
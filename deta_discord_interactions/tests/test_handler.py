@@ -1,4 +1,17 @@
-from deta_discord_interactions import Message, ActionRow, Button, ButtonStyles
+import enum
+from typing import Optional
+
+import pytest
+
+from deta_discord_interactions import (
+    Message,
+    ActionRow,
+    Button,
+    ButtonStyles,
+    DiscordInteractionsBlueprint,
+    HandlerStateError,
+    Snowflake,
+)
 
 
 def test_basic_handler(discord, client):
@@ -95,3 +108,88 @@ def test_stateful_handler(discord, client):
     client.run("click_counter")
     response = discord.custom_id_handlers['click_handler'](None, 0)
     assert response.content == "1 clicks"
+
+
+class Page(enum.Enum):
+    first = "first"
+    last = "last"
+
+
+class Vote(enum.IntEnum):
+    no = 0
+    yes = 1
+
+
+def test_typed_state(discord, client):
+    @discord.custom_handler('typed_handler')
+    def handle(ctx, page: Page, vote: Vote, score: float, message_id: Snowflake, limit: Optional[int], raw):
+        return repr((page, vote, score, message_id, limit, raw))
+
+    # The state is stored as the str() of each value
+    button = Button(custom_id=['typed_handler', Page.last, Vote.yes, 0.5, "1234567890", None, 7])
+    assert client.run_handler(*button.custom_id.split("\n")).content == repr(
+        (Page.last, Vote.yes, 0.5, "1234567890", None, "7")
+    )
+    assert client.run_handler('typed_handler', "first", "0", "1", "1", "10", "").content == repr(
+        (Page.first, Vote.no, 1.0, "1", 10, "")
+    )
+
+
+def test_malformed_state(discord, client):
+    @discord.custom_handler('strict_handler')
+    def handle(ctx, message_id: Snowflake, count: int = 0, flag: bool = False):
+        return "ok"
+
+    assert client.run_handler('strict_handler', "123").content == "ok"
+    with pytest.raises(HandlerStateError, match="message_id"):
+        client.run_handler('strict_handler', "not an ID")
+    with pytest.raises(HandlerStateError, match="count"):
+        client.run_handler('strict_handler', "123", "many")
+    with pytest.raises(ValueError, match="flag"):
+        client.run_handler('strict_handler', "123", "1", "maybe")
+
+
+def test_decoder_compiled_once(discord, client, monkeypatch):
+    @discord.custom_handler('cached_handler')
+    def handle(ctx, count: int):
+        return str(count + 1)
+
+    decoder = discord.custom_id_decoders['cached_handler']
+    monkeypatch.setattr("inspect.signature", None)
+    assert client.run_handler('cached_handler', "41").content == "42"
+    assert discord.custom_id_decoders['cached_handler'] is decoder
+
+
+def test_pattern_handler(discord, client):
+    @discord.custom_handler('page:{n:int}:{query}')
+    def page(ctx, n, query):
+        return f"{query} page {n} {ctx.handler_params}"
+
+    @discord.custom_handler('page:last:{query}')
+    def last_page(ctx, query, sort: Page = Page.first):
+        return f"{query} last page {sort.value}"
+
+    @discord.custom_handler('page:0:cats')
+    def exact(ctx):
+        return "exact"
+
+    assert isinstance(page, str)
+    assert page.build(n=2, query="dogs") == "page:2:dogs"
+    assert client.run_handler(page.build(n=2, query="dogs")).content == "dogs page 2 {'n': 2, 'query': 'dogs'}"
+    assert client.run_handler("page:last:dogs").content == "dogs last page first"
+    assert client.run_handler("page:0:cats").content == "exact"
+    with pytest.raises(KeyError):
+        client.run_handler("page:next:dogs")
+
+
+def test_pattern_handler_blueprint(discord, client):
+    blueprint = DiscordInteractionsBlueprint()
+
+    @blueprint.custom_handler('vote:{choice}')
+    def vote(ctx, count: int, *, choice: Vote):
+        return f"{choice.name} {count + 1}"
+
+    discord.register_blueprint(blueprint)
+    assert client.run_handler(vote.build(1, choice=Vote.yes.value)).content == "yes 2"
+    with pytest.raises(HandlerStateError, match="choice"):
+        client.run_handler("vote:maybe", "1")
@@ -1,5 +1,13 @@
+import http.client
 import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
 import threading
+import time
 from urllib.request import Request, urlopen
 
 import pytest
@@ -9,7 +17,7 @@ from deta_discord_interactions import (
     ResponseType,
     InteractionType,
 )
-from deta_discord_interactions.http import run_server
+from deta_discord_interactions.http import get_server
 
 HOST = '127.0.0.1'
 PORT = 1234
@@ -30,7 +38,18 @@ JSON_DATA = {
 }
 
 
-def test_http(discord: DiscordInteractions, capsys: pytest.CaptureFixture):
+@pytest.fixture(scope="module")
+def server(discord):
+    "Binds the socket before any test sends a request, so that they never race the server"
+    server = get_server(discord, PORT)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_http(discord: DiscordInteractions, server, capsys: pytest.CaptureFixture):
     "Make sure that the requests work"
 
     @discord.command()
@@ -43,9 +62,6 @@ def test_http(discord: DiscordInteractions, capsys: pytest.CaptureFixture):
         headers={},
         method='POST',
     )
-    server_thread = threading.Thread(target=run_server, args=(discord, PORT), daemon=True)
-    server_thread.start()
-
     response = json.loads(urlopen(request).read().decode())
     assert response["type"] == ResponseType.CHANNEL_MESSAGE_WITH_SOURCE
     assert response["data"]["content"] == "Ping Pong!"
@@ -55,7 +71,7 @@ def test_http(discord: DiscordInteractions, capsys: pytest.CaptureFixture):
     assert captured.err == ''
 
 @pytest.mark.xfail(strict=True)
-def test_fail_http(discord: DiscordInteractions):
+def test_fail_http(discord: DiscordInteractions, server):
     "A negative test to make sure that it is not just somehow cheating to just pass or ignore all Assertions everywhere"
 
     @discord.command()
@@ -68,9 +84,6 @@ def test_fail_http(discord: DiscordInteractions):
         headers={},
         method='POST'
     )
-    server_thread = threading.Thread(target=run_server, args=(discord, PORT), daemon=True)
-    server_thread.start()
-
     response = json.loads(urlopen(request).read().decode())
     # Intentionally False assertion
     assert response["type"] == ResponseType.PONG
@@ -87,7 +100,7 @@ def test_action(discord, client):
     assert client.run_action("test") == 42
 
 
-def test_action_http(discord: DiscordInteractions):
+def test_action_http(discord: DiscordInteractions, server):
     @discord.action("test")
     def _(event):
         assert event["id"] == "test"
@@ -106,8 +119,272 @@ def test_action_http(discord: DiscordInteractions):
         headers={},
         method='POST',
     )
-    server_thread = threading.Thread(target=run_server, args=(discord, PORT), daemon=True)
-    server_thread.start()
-
     response = json.loads(urlopen(request).read().decode())
     assert response["result"] == 42
+
+
+## Production mode
+
+PRODUCTION_PORT = PORT + 1
+
+
+@pytest.fixture()
+def production_server(discord):
+    def _start(**options):
+        server = get_server(discord, PRODUCTION_PORT, production=True, **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+    servers = []
+    yield _start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def post(connection: http.client.HTTPConnection, path: str, data: dict) -> http.client.HTTPResponse:
+    connection.request("POST", path, body=json.dumps(data).encode(), headers={"Content-Type": "application/json"})
+    return connection.getresponse()
+
+
+def test_production_keep_alive(discord: DiscordInteractions, production_server):
+    @discord.command()
+    def ping(ctx, pong: str = "ping"):
+        return f"Ping {pong}!"
+
+    production_server()
+    connection = http.client.HTTPConnection(HOST, PRODUCTION_PORT, timeout=5)
+    response = post(connection, "/discord", JSON_DATA)
+    assert response.version == 11
+    assert json.loads(response.read())["data"]["content"] == "Ping Pong!"
+    sock = connection.sock
+
+    response = post(connection, "/discord", JSON_DATA)
+    assert json.loads(response.read())["data"]["content"] == "Ping Pong!"
+    assert connection.sock is sock, "The connection should have been reused"
+    connection.close()
+
+
+def test_production_unread_body():
+    "Bodies the app does not read must not leak into the next request on the connection"
+    def ignores_body(environ, start_response):
+        start_response("200 OK", [])
+        return [b"ok"]
+
+    server = get_server(ignores_body, PRODUCTION_PORT, production=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        connection = http.client.HTTPConnection(HOST, PRODUCTION_PORT, timeout=5)
+        sockets = set()
+        for _ in range(3):
+            response = post(connection, "/", {"padding": "x" * 100_000})
+            assert response.status == 200
+            assert response.read() == b"ok"
+            sockets.add(connection.sock)
+        assert len(sockets) == 1, "The connection should have been reused"
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_production_concurrency(discord: DiscordInteractions, production_server):
+    release = threading.Event()
+
+    @discord.command()
+    def slow(ctx):
+        release.wait(5)
+        return "slow"
+
+    @discord.command()
+    def ping(ctx, pong: str = "ping"):
+        return f"Ping {pong}!"
+
+    production_server(max_workers=2)
+
+    slow_data = {**JSON_DATA, "data": {"id": 2, "name": "slow"}}
+    slow_connection = http.client.HTTPConnection(HOST, PRODUCTION_PORT, timeout=5)
+    slow_thread = threading.Thread(target=post, args=(slow_connection, "/discord", slow_data))
+    slow_thread.start()
+
+    # The slow command must not block other interactions
+    connection = http.client.HTTPConnection(HOST, PRODUCTION_PORT, timeout=2)
+    response = post(connection, "/discord", JSON_DATA)
+    assert json.loads(response.read())["data"]["content"] == "Ping Pong!"
+    connection.close()
+
+    release.set()
+    slow_thread.join()
+    slow_connection.close()
+
+
+def test_production_queue_limit(discord: DiscordInteractions, production_server):
+    release = threading.Event()
+
+    @discord.command()
+    def slow(ctx):
+        release.wait(5)
+        return "slow"
+
+    production_server(max_workers=1, max_queued_requests=0, keep_alive_timeout=5)
+
+    # Keeps the only worker busy
+    slow_data = {**JSON_DATA, "data": {"id": 2, "name": "slow"}}
+    slow_connection = http.client.HTTPConnection(HOST, PRODUCTION_PORT, timeout=5)
+    slow_thread = threading.Thread(target=post, args=(slow_connection, "/discord", slow_data))
+    slow_thread.start()
+    time.sleep(0.2)
+
+    try:
+        connection = http.client.HTTPConnection(HOST, PRODUCTION_PORT, timeout=5)
+        assert post(connection, "/discord", JSON_DATA).status == 503
+        connection.close()
+    finally:
+        release.set()
+        slow_thread.join()
+        slow_connection.close()
+
+
+def test_production_idle_connections(discord: DiscordInteractions, production_server):
+    @discord.command()
+    def ping(ctx, pong: str = "ping"):
+        return f"Ping {pong}!"
+
+    production_server(max_workers=2, max_queued_requests=0, keep_alive_timeout=5)
+
+    # More idle keep-alive connections than workers, some of which never sent a request
+    idle = [http.client.HTTPConnection(HOST, PRODUCTION_PORT, timeout=5) for _ in range(4)]
+    for connection in idle[:2]:
+        post(connection, "/discord", JSON_DATA).read()
+    for connection in idle[2:]:
+        connection.connect()
+
+    try:
+        connection = http.client.HTTPConnection(HOST, PRODUCTION_PORT, timeout=2)
+        response = post(connection, "/discord", JSON_DATA)
+        assert json.loads(response.read())["data"]["content"] == "Ping Pong!"
+        connection.close()
+
+        # The idle connections can still be used afterwards
+        response = post(idle[0], "/discord", JSON_DATA)
+        assert json.loads(response.read())["data"]["content"] == "Ping Pong!"
+    finally:
+        for connection in idle:
+            connection.close()
+
+
+def test_production_idle_timeout(discord: DiscordInteractions, production_server):
+    @discord.command()
+    def ping(ctx, pong: str = "ping"):
+        return f"Ping {pong}!"
+
+    production_server(keep_alive_timeout=0.2)
+    with socket.create_connection((HOST, PRODUCTION_PORT), timeout=5) as idle:
+        # Closed by the server once it has been idle for long enough
+        assert idle.recv(1024) == b""
+
+
+## Multiple worker processes
+
+WORKERS_PORT = PORT + 2
+
+WORKERS_SCRIPT = textwrap.dedent(f"""
+    import os
+    from deta_discord_interactions import DiscordInteractions
+    from deta_discord_interactions.http import run_server
+
+    app = DiscordInteractions()
+
+    @app.command()
+    def ping(ctx, pong: str = "ping"):
+        return str(os.getpid())
+
+    run_server(app, {WORKERS_PORT}, production=True, workers=2)
+""")
+
+
+def worker_pid(connection_timeout: float = 10) -> int:
+    "Sends a request to whichever worker accepts it, retrying until the server is up"
+    deadline = time.monotonic() + connection_timeout
+    while True:
+        try:
+            connection = http.client.HTTPConnection(HOST, WORKERS_PORT, timeout=5)
+            response = post(connection, "/discord", JSON_DATA)
+            pid = int(json.loads(response.read())["data"]["content"])
+            connection.close()
+            return pid
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Multiple workers require os.fork")
+def test_multiple_workers():
+    process = subprocess.Popen([sys.executable, "-c", WORKERS_SCRIPT], env=os.environ.copy())
+    try:
+        pid = worker_pid()
+        assert pid != process.pid, "Requests should be handled by the forked workers"
+
+        # Kill the workers until a third one shows up, which must have replaced a dead one
+        killed = set()
+        while len(killed) < 3:
+            if pid not in killed:
+                os.kill(pid, signal.SIGKILL)
+                killed.add(pid)
+            pid = worker_pid()
+        assert pid not in killed
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=10) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+
+RECORDING_PORT = PORT + 3
+
+RECORDING_SCRIPT = textwrap.dedent(f"""
+    import os, sys
+    from deta_discord_interactions import DiscordInteractions
+    from deta_discord_interactions.http import run_server
+
+    app = DiscordInteractions()
+    app.enable_recording(os.path.join(sys.argv[1], "interactions-{{pid}}.jsonl"))
+
+    @app.command()
+    def ping(ctx, pong: str = "ping"):
+        return str(os.getpid())
+
+    run_server(app, {RECORDING_PORT}, production=True, workers=2)
+""")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Multiple workers require os.fork")
+def test_recording_with_multiple_workers(tmp_path):
+    process = subprocess.Popen([sys.executable, "-c", RECORDING_SCRIPT, str(tmp_path)], env=os.environ.copy())
+    try:
+        handled = {}
+        deadline = time.monotonic() + 10
+        while len(handled) < 2 and time.monotonic() < deadline:
+            try:
+                connection = http.client.HTTPConnection(HOST, RECORDING_PORT, timeout=5)
+                pid = int(json.loads(post(connection, "/discord", JSON_DATA).read())["data"]["content"])
+                connection.close()
+            except OSError:
+                time.sleep(0.1)
+                continue
+            handled[pid] = handled.get(pid, 0) + 1
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=10) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+    assert handled
+    assert process.pid not in handled
+    # Each worker wrote its own file, with only the requests it handled
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(f"interactions-{pid}.jsonl" for pid in handled)
+    for pid, count in handled.items():
+        assert len((tmp_path / f"interactions-{pid}.jsonl").read_text().splitlines()) == count
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+# Imported only once they are needed: sending messages, verifying signatures, running async code...
+HEAVY_MODULES = ["requests", "requests_toolbelt", "nacl", "asyncio", "deta"]
+
+# Generous, to avoid flaky failures on slow machines. The import usually takes well under half of it.
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "150"))
+
+
+def run_python(code: str, *args) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+
+
+def import_time_ms(statement: str) -> float:
+    "Total time spent on the imports triggered by `statement`, according to `python -X importtime`"
+    stderr = run_python(statement, "-X", "importtime").stderr
+    total_us = 0
+    after_site = False
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() == "site" and not name.startswith("  "):
+            after_site = True
+        elif after_site and not name.startswith("  "):
+            # Only count the top-level imports, which include their own imports
+            total_us += int(cumulative)
+    return total_us / 1000
+
+
+def test_package_import_is_lazy():
+    result = run_python(
+        "import sys; import deta_discord_interactions; "
+        "print(sorted(name for name in sys.modules if name.startswith('deta_discord_interactions')))"
+    )
+    assert result.stdout.strip() == "['deta_discord_interactions']"
+
+
+@pytest.mark.parametrize("statement", [
+    "from deta_discord_interactions import DiscordInteractions",
+    # Also creates a Database, whose backend should only be created when used
+    "import deta_discord_interactions.utils.cooldown",
+])
+def test_heavy_dependencies_are_lazy(statement):
+    result = run_python(f"import sys; {statement}; print(' '.join(sorted(sys.modules)))")
+    loaded = set(result.stdout.split())
+    for module in HEAVY_MODULES:
+        assert module not in loaded, f"{statement!r} imported {module!r}"
+
+
+def test_import_time_budget():
+    # Warm up the bytecode and file system caches first
+    run_python("from deta_discord_interactions import DiscordInteractions")
+    elapsed = min(import_time_ms("from deta_discord_interactions import DiscordInteractions") for _ in range(3))
+    assert elapsed < IMPORT_TIME_BUDGET_MS, f"Importing took {elapsed:.1f}ms"
@@ -0,0 +1,98 @@
+import pytest
+
+from deta_discord_interactions import (
+    CommandOptionType,
+    DiscordInteractions,
+    InteractionType,
+)
+from deta_discord_interactions.metrics import Histogram, enable_metrics
+from deta_discord_interactions.timing import interaction_labels
+
+
+@pytest.fixture()
+def app():
+    app = DiscordInteractions()
+
+    @app.command()
+    def ping(ctx):
+        return "Pong!"
+
+    @app.command()
+    def fail(ctx):
+        raise ValueError("Oops")
+
+    group = app.command_group("settings")
+
+    @group.command()
+    def show(ctx):
+        return "Settings"
+
+    return app
+
+
+def test_labels(interaction):
+    assert interaction_labels(interaction("ping")) == ("application_command", "ping")
+    subcommand = interaction("settings", [{"type": CommandOptionType.SUB_COMMAND, "name": "show", "options": []}])
+    assert interaction_labels(subcommand) == ("application_command", "settings show")
+    component = {"type": InteractionType.MESSAGE_COMPONENT, "data": {"custom_id": "counter\n3", "component_type": 2}}
+    assert interaction_labels(component) == ("message_component", "counter")
+    assert interaction_labels({"type": InteractionType.PING}) == ("ping", "")
+
+
+def test_histogram_quantiles():
+    histogram = Histogram((1.0, 2.0, 4.0))
+    assert histogram.quantile(0.5) is None
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [1, 3, 4, 4]
+    assert histogram.quantile(0.5) == pytest.approx(1.5)
+    assert histogram.quantile(0.99) == pytest.approx(3.92)
+    histogram.observe(100)
+    assert histogram.quantile(1) == 4.0
+
+
+def test_metrics_endpoint(app, interaction, wsgi_request, capsys):
+    metrics = enable_metrics(app)
+    assert app.metrics is metrics
+
+    for _ in range(3):
+        assert wsgi_request(app, "/discord", interaction("ping"))[0] == "200 OK"
+    subcommand = [{"type": CommandOptionType.SUB_COMMAND, "name": "show", "options": []}]
+    assert wsgi_request(app, "/discord", interaction("settings", subcommand))[0] == "200 OK"
+    assert wsgi_request(app, "/discord", interaction("fail"))[0] == "500 Internal Server Error"
+    assert wsgi_request(app, "/missing")[0] == "404 Page not found"
+    capsys.readouterr()
+
+    assert metrics.requests == {
+        ("application_command", "ping", "ok"): 3,
+        ("application_command", "settings show", "ok"): 1,
+        ("application_command", "fail", "exception"): 1,
+    }
+    summary = metrics.summary()
+    assert summary[("application_command", "ping")]["count"] == 3
+    assert 0 < summary[("application_command", "ping")]["p99"] <= 10
+
+    status, headers, content = wsgi_request(app, "/metrics", method="GET")
+    assert status == "200 OK"
+    assert headers["Content-Type"].startswith("text/plain")
+    text = content.decode()
+    assert 'discord_interactions_requests_total{type="application_command",name="ping",outcome="ok"} 3' in text
+    assert 'discord_interactions_request_duration_seconds_count{type="application_command",name="settings show"} 1' in text
+    assert 'discord_interactions_request_duration_seconds_bucket{type="application_command",name="ping",le="+Inf"} 3' in text
+    assert 'discord_interactions_phase_duration_seconds_count{phase="handler"} 5' in text
+    # Scraping the metrics is not counted as an interaction
+    assert sum(metrics.requests.values()) == 5
+
+
+def test_pattern_labels(app, component_interaction, wsgi_request):
+    metrics = enable_metrics(app)
+
+    @app.custom_handler("page:{number}")
+    def page(ctx, number: int):
+        return f"Page {number}"
+
+    for custom_id in ("page:1", "page:2"):
+        assert wsgi_request(app, "/discord", component_interaction(custom_id))[0] == "200 OK"
+
+    # Labelled by the pattern, not by each custom ID it matched
+    assert metrics.requests == {("message_component", "page:{number}", "ok"): 2}
@@ -0,0 +1,77 @@
+import pickle
+import sys
+
+import pytest
+
+from deta_discord_interactions import (
+    ActionRow,
+    Button,
+    Channel,
+    Embed,
+    Member,
+    Role,
+    User,
+    embed,
+)
+
+
+requires_slots = pytest.mark.skipif(sys.version_info < (3, 10), reason="dataclass(slots=True) requires Python 3.10")
+
+
+MEMBER_DATA = {
+    "user": {"id": "1", "username": "user", "avatar": "hash"},
+    "nick": "nickname",
+    "roles": ["2"],
+    "permissions": "8",
+}
+
+
+@requires_slots
+@pytest.mark.parametrize("instance", [
+    User(id="1"),
+    Member.from_dict(MEMBER_DATA),
+    Role(id="1"),
+    Channel(id="1"),
+    Embed(title="title"),
+    Button(custom_id="handler"),
+    ActionRow(components=[]),
+], ids=type)
+def test_slotted(instance):
+    assert "__slots__" in vars(type(instance))
+    assert not hasattr(instance, "__dict__")
+    with pytest.raises(AttributeError):
+        instance.not_a_field = True
+
+
+def test_round_trip():
+    member = Member.from_dict(MEMBER_DATA)
+    assert member.display_name == "nickname"
+    assert member.avatar_hash == "hash"
+    assert member.permissions == 8
+    assert member.to_dict()["nick"] == "nickname"
+    assert pickle.loads(pickle.dumps(member)) == member
+
+    role = Role(id="1", name="role", color=0xFF0000)
+    assert Role.from_dict(role.to_dict()) == role
+
+
+def test_nested_to_dict():
+    message_embed = Embed(
+        title="title",
+        footer=embed.Footer(text="footer"),
+        fields=[embed.Field(name="name", value="value")],
+    )
+    data = message_embed.to_dict()
+    assert data["footer"] == {"text": "footer", "icon_url": None, "proxy_icon_url": None}
+    assert data["fields"] == [{"name": "name", "value": "value", "inline": False}]
+    # Copied, not shared with the Embed
+    data["fields"].clear()
+    assert len(message_embed.fields) == 1
+
+
+def test_components_dump():
+    row = ActionRow(components=[Button(custom_id=["handler", 1], label="Click")])
+    assert row.dump() == {
+        "components": [{"custom_id": "handler\n1", "label": "Click", "disabled": False, "type": 2, "style": 1}],
+        "type": 1,
+    }
@@ -38,7 +38,9 @@ def test_webhook(oauth_discord: DiscordInteractions, oauth_client: Client):
         "PATH_INFO": "/oauth",
         'QUERY_STRING': 'state=test123&code=456',
     }
-    with mock.patch.object(requests, "post") as req_mock:
+    with mock.patch.object(requests.Session, "request") as req_mock:
+        req_mock.return_value.status_code = 200
+        req_mock.return_value.headers = {}
         req_mock.return_value.json.return_value = {
             "access_token": "atoken",
             "refresh_token": "rtoken",
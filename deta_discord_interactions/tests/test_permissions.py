@@ -0,0 +1,119 @@
+import time
+
+import pytest
+import requests
+
+from deta_discord_interactions import DiscordInteractions, Permission
+from deta_discord_interactions.permissions import PermissionCache
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, data):
+        self.status_code = status_code
+        self.data = data
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code))
+
+    def json(self):
+        if isinstance(self.data, str):
+            raise ValueError("Not JSON")
+        return self.data
+
+
+@pytest.fixture()
+def api(monkeypatch):
+    "Stores the overwrites sent to it, and records the requests"
+    overwrites = {
+        "1": [{"type": 1, "id": "role", "permission": True}],
+        "2": [{"type": 2, "id": "user", "permission": False}],
+    }
+    sent = []
+
+    def request(session, method, url, json=None, headers=None, timeout=None):
+        path = url.split("/guilds/456/commands/")[-1]
+        sent.append((method, path))
+        if method == "PUT":
+            overwrites[path.split("/")[0]] = json["permissions"]
+            return FakeResponse(200, {})
+        if path == "permissions":
+            return FakeResponse(200, [
+                {"id": command_id, "application_id": "123", "guild_id": "456", "permissions": permissions}
+                for command_id, permissions in overwrites.items()
+            ])
+        command_id = path.split("/")[0]
+        if command_id not in overwrites:
+            return FakeResponse(404, {"message": "Unknown application command permissions", "code": 10066})
+        return FakeResponse(200, {"id": command_id, "permissions": overwrites[command_id]})
+
+    monkeypatch.setattr(requests.Session, "request", request)
+    return sent
+
+
+@pytest.fixture()
+def app():
+    app = DiscordInteractions()
+    app.DONT_REGISTER_WITH_DISCORD = False
+    app.discord_token = {"access_token": "token", "expires_on": time.time() + 600}
+    return app
+
+
+def test_get_guild_overwrites(api, app):
+    overwrites = app.get_guild_permission_overwrites("456")
+    assert {command_id: [perm.dump() for perm in perms] for command_id, perms in overwrites.items()} == {
+        "1": [{"type": 1, "id": "role", "permission": True}],
+        "2": [{"type": 2, "id": "user", "permission": False}],
+    }
+    assert api == [("GET", "permissions")]
+
+    # Known from the guild-wide request, including commands without overwrites
+    assert app.get_permission_overwrites(guild_id="456", command_id="1")[0].id == "role"
+    assert app.get_permission_overwrites(guild_id="456", command_id="3") == []
+    assert app.get_guild_permission_overwrites("456").keys() == {"1", "2"}
+    assert api == [("GET", "permissions")]
+
+    assert app.get_permission_overwrites(guild_id="456", command_id="3", use_cache=False) == []
+    assert api[-1] == ("GET", "3/permissions")
+
+
+def test_set_only_changed(api, app):
+    changed = app.set_guild_permission_overwrites("456", {
+        "1": [Permission(role="role")],
+        "2": [Permission(user="user")],
+        "3": [],
+    })
+    assert changed == ["2"]
+    assert api == [("GET", "permissions"), ("PUT", "2/permissions")]
+
+    # The cache was updated with the new overwrites
+    assert app.set_guild_permission_overwrites("456", {"2": [Permission(user="user")]}) == []
+    assert app.get_permission_overwrites(guild_id="456", command_id="2")[0].permission is True
+    assert len(api) == 2
+
+
+def test_cache_expires():
+    now = [0.0]
+    cache = PermissionCache(ttl=10, clock=lambda: now[0])
+    cache.put_guild("456", {"1": [Permission(role="role")]})
+    cache.put("456", "2", [])
+    assert cache.get("456", "3") == []
+    assert cache.get_guild("456").keys() == {"1"}
+
+    now[0] = 11
+    assert cache.get("456", "1") is None
+    assert cache.get_guild("456") is None
+
+    cache.put_guild("456", {})
+    cache.invalidate("456", "1")
+    assert cache.get("456", "1") is None
+
+
+def test_not_json_error(monkeypatch, app):
+    def request(session, method, url, json=None, headers=None, timeout=None):
+        return FakeResponse(404, "<html>Not Found</html>")
+
+    monkeypatch.setattr(requests.Session, "request", request)
+    with pytest.raises(requests.HTTPError):
+        app.get_permission_overwrites(guild_id="456", command_id="1")
@@ -0,0 +1,94 @@
+import queue
+import time
+
+import pytest
+
+from deta_discord_interactions import (
+    Context,
+    DiscordInteractions,
+    ResponseType,
+)
+from deta_discord_interactions.profiling import Profiler
+
+
+def busy_work(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+@pytest.fixture()
+def app():
+    app = DiscordInteractions()
+
+    @app.command()
+    def slow(ctx):
+        busy_work(0.05)
+        return "Slow"
+
+    @app.command()
+    def fast(ctx):
+        return "Fast"
+
+    @app.command(defer_after=0.01)
+    def deferred(ctx):
+        busy_work(0.1)
+        return "Deferred"
+
+    yield app
+    app.shutdown()
+
+
+def test_profile_to_folder(app, interaction, tmp_path):
+    profiler = app.enable_profiling(tmp_path, interval=0.001)
+    assert app.handle_interaction({"json": interaction("slow")}).content == "Slow"
+
+    assert profiler.profiled_count == profiler.kept_count == 1
+    folded = profiler.collapsed()[("application_command", "slow")]
+    assert "busy_work" in folded
+    stack, count = folded.splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert stack.index("handle_interaction") < stack.index("slow") < stack.index("busy_work")
+
+    profiler.dump()
+    assert (tmp_path / "application_command.slow.folded").read_text() == folded
+
+
+def test_slower_than(app, interaction):
+    profiler = app.enable_profiling(slower_than=0.02, interval=0.001)
+    app.handle_interaction({"json": interaction("fast")})
+    app.handle_interaction({"json": interaction("slow")})
+    assert profiler.profiled_count == 2
+    assert list(profiler.stacks) == [("application_command", "slow")]
+
+
+def test_sample_rate(app, interaction):
+    profiler = app.enable_profiling(sample_rate=0, interval=0.001)
+    app.handle_interaction({"json": interaction("slow")})
+    assert profiler.profiled_count == 0
+
+
+def test_profile_deferred(app, interaction, monkeypatch):
+    edits = queue.Queue()
+    monkeypatch.setattr(Context, "edit", lambda self, updated, message="@original": edits.put(updated))
+    profiler = app.enable_profiling(interval=0.001)
+
+    response = app.handle_interaction({"json": interaction("deferred")})
+    assert response.response_type == ResponseType.DEFERRED_CHANNEL_MESSAGE_WITH_SOURCE
+    assert edits.get(timeout=5).content == "Deferred"
+    app.shutdown()
+
+    # The profile includes the samples from the worker thread that kept running
+    assert profiler.kept_count == 1
+    assert "busy_work" in profiler.collapsed()[("application_command", "deferred")]
+
+
+def test_from_env(monkeypatch, tmp_path):
+    assert Profiler.from_env() is None
+    monkeypatch.setenv("DISCORD_INTERACTIONS_PROFILE", "0.25")
+    monkeypatch.setenv("DISCORD_INTERACTIONS_PROFILE_SLOWER_THAN", "1.5")
+    monkeypatch.setenv("DISCORD_INTERACTIONS_PROFILE_DIR", str(tmp_path))
+    app = DiscordInteractions()
+    assert app.profiler.sample_rate == 0.25
+    assert app.profiler.slower_than == 1.5
+    assert app.profiler.output == tmp_path
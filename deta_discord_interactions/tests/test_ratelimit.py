@@ -0,0 +1,170 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from deta_discord_interactions import DiscordInteractions
+from deta_discord_interactions.ratelimit import RateLimiter, RateLimitExceeded, route_key
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict, data=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_waits_for_exhausted_bucket():
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    headers = {"X-RateLimit-Bucket": "abc", "X-RateLimit-Remaining": "1", "X-RateLimit-Reset-After": "2"}
+    limiter.update("PUT /a", FakeResponse(200, headers))
+
+    limiter.acquire("PUT /a")
+    assert clock.sleeps == []
+    # The last request was reserved by the previous call
+    limiter.acquire("PUT /a")
+    assert clock.sleeps == [2.0]
+    # Other routes are not affected
+    limiter.acquire("PUT /b")
+    assert clock.sleeps == [2.0]
+
+
+def test_route_key():
+    # Messages of the same channel share a limit
+    assert route_key("PATCH", "/api/v10/channels/1/messages/2") == "PATCH /api/v10/channels/1/messages/{id}"
+    assert route_key("PATCH", "/api/v10/channels/1/messages/3") == route_key("PATCH", "/api/v10/channels/1/messages/2")
+    assert route_key("PUT", "/api/v10/applications/1/guilds/2/commands") == "PUT /api/v10/applications/{id}/guilds/2/commands"
+    # Webhooks are limited per token
+    assert route_key("PATCH", "/webhooks/1/abc/messages/@original") == "PATCH /webhooks/1/abc/messages/@original"
+    assert route_key("DELETE", "/webhooks/1/abc/messages/2") == "DELETE /webhooks/1/abc/messages/{id}"
+    assert route_key("POST", "/interactions/1/abc/callback") == "POST /interactions/{id}/{token}/callback"
+
+
+def test_retries_after_429():
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    responses = [
+        FakeResponse(429, {"X-RateLimit-Global": "true"}, {"retry_after": 1.5, "global": True}),
+        FakeResponse(429, {"Retry-After": "3"}, None),
+        FakeResponse(200, {}, "ok"),
+    ]
+    assert limiter.request("PUT /a", lambda: responses.pop(0)).data == "ok"
+    assert clock.sleeps == [1.5, 3.0]
+    assert limiter.rate_limited_count == 2
+    assert limiter.waited == 4.5
+
+
+def test_gives_up_after_max_retries():
+    clock = FakeClock()
+    limiter = RateLimiter(max_retries=2, clock=clock, sleep=clock.sleep)
+    with pytest.raises(RateLimitExceeded):
+        limiter.request("PUT /a", lambda: FakeResponse(429, {}, {"retry_after": 1}))
+    assert len(clock.sleeps) == 2
+
+
+class FakeDiscordAPI(BaseHTTPRequestHandler):
+    "Rate limits the first registration of each guild, and rejects the guild `bad`"
+    lock = threading.Lock()
+    seen: set
+    active = 0
+    max_active = 0
+    requests = 0
+
+    def do_PUT(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.requests += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            guild_id = self.path.split("/")[-2]
+            commands = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(0.02)
+            with cls.lock:
+                first = guild_id not in cls.seen
+                cls.seen.add(guild_id)
+            headers = {"X-RateLimit-Bucket": "commands", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "0.05"}
+            if guild_id == "bad":
+                self.respond(400, headers, {"message": "Invalid Form Body"})
+            elif first:
+                self.respond(429, headers, {"retry_after": 0.05, "global": False})
+            else:
+                self.respond(200, headers, [{"name": command["name"], "id": f"{guild_id}-{command['name']}"} for command in commands])
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def respond(self, status: int, headers: dict, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def fake_api(allow_local_http):
+    "Runs FakeDiscordAPI on a local port"
+    handler = type("Handler", (FakeDiscordAPI,), {"seen": set(), "lock": threading.Lock()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/v10", handler
+    server.shutdown()
+    server.server_close()
+
+
+def test_update_commands_bulk(fake_api, tmp_path):
+    base_url, api = fake_api
+    app = DiscordInteractions()
+    app.DONT_REGISTER_WITH_DISCORD = False
+    app.DISCORD_BASE_URL = base_url
+    app.discord_token = {"access_token": "token", "expires_on": time.time() + 600}
+
+    @app.command()
+    def ping(ctx):
+        return "Pong"
+
+    guild_ids = [str(guild_id) for guild_id in range(10)] + ["bad"]
+    results = app.update_commands_bulk(guild_ids, max_workers=3, cache=tmp_path / "commands.json")
+
+    assert list(results) == guild_ids
+    for guild_id in guild_ids[:-1]:
+        assert results[guild_id].ok
+        assert results[guild_id].ids == {"ping": f"{guild_id}-ping"}
+    assert isinstance(results["bad"].error, ValueError)
+
+    assert api.max_active <= 3
+    # Every valid guild was rate limited once, then registered
+    assert app.rate_limiter.rate_limited_count == 10
+    assert api.requests == 21
+
+    # Unchanged guilds are skipped the next time
+    results = app.update_commands_bulk(guild_ids[:-1], cache=tmp_path / "commands.json")
+    assert all(result.cached for result in results.values())
+    assert api.requests == 21
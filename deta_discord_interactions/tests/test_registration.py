@@ -0,0 +1,96 @@
+import time
+
+import pytest
+import requests
+
+from deta_discord_interactions import DiscordInteractions
+from deta_discord_interactions.registration import (
+    FileRegistrationCache,
+    RegisteredCommands,
+    payload_hash,
+)
+from deta_discord_interactions.utils.database import Database
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.status_code = 200
+        self.headers = {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+@pytest.fixture()
+def puts(monkeypatch):
+    "Records the commands registered with Discord"
+    sent = []
+
+    def request(session, method, url, json, headers, timeout):
+        assert method == "PUT"
+        sent.append((url, json))
+        return FakeResponse([{"name": command["name"], "id": f"id-{command['name']}"} for command in json])
+
+    monkeypatch.setattr(requests.Session, "request", request)
+    return sent
+
+
+def make_app(*names: str) -> DiscordInteractions:
+    app = DiscordInteractions()
+    app.DONT_REGISTER_WITH_DISCORD = False
+    app.discord_token = {"access_token": "token", "expires_on": time.time() + 600}
+    for name in names:
+        app.command(name)(lambda ctx: "Hi")
+    return app
+
+
+def test_payload_hash_is_canonical():
+    first = [{"name": "a", "type": 1, "options": []}, {"type": 1, "name": "b"}]
+    second = [{"name": "b", "type": 1}, {"options": [], "type": 1, "name": "a"}]
+    assert payload_hash(first) == payload_hash(second)
+    assert payload_hash(first) != payload_hash(first[:1])
+
+
+def test_skip_unchanged_commands(tmp_path, puts):
+    cache_path = tmp_path / "commands.json"
+
+    make_app("ping", "echo").update_commands(cache=cache_path)
+    assert len(puts) == 1
+
+    app = make_app("echo", "ping")
+    app.update_commands(cache=cache_path)
+    assert len(puts) == 1
+    assert app.discord_commands["ping"].id == "id-ping"
+    assert app.discord_commands["echo"].id == "id-echo"
+
+    # Each guild is cached separately
+    app.update_commands("1234", cache=cache_path)
+    assert len(puts) == 2
+    assert puts[1][0].endswith("/guilds/1234/commands")
+
+    changed = make_app("ping", "echo", "new")
+    changed.update_commands(cache=cache_path)
+    assert len(puts) == 3
+    assert changed.discord_commands["new"].id == "id-new"
+
+    cached = FileRegistrationCache(cache_path).get("123-global")
+    assert cached.ids == {"ping": "id-ping", "echo": "id-echo", "new": "id-new"}
+
+
+def test_without_cache_always_registers(puts):
+    app = make_app("ping")
+    app.update_commands()
+    app.update_commands()
+    assert len(puts) == 2
+
+
+def test_database_cache(puts):
+    database = Database("_test_registered_commands", record_type=RegisteredCommands)
+    make_app("ping").update_commands(cache=database)
+    make_app("ping").update_commands(cache=database)
+    assert len(puts) == 1
+    assert database.get("123-global").ids == {"ping": "id-ping"}
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from deta_discord_interactions import ASGIApp, DiscordInteractions
+from deta_discord_interactions.http import get_server
+from deta_discord_interactions.recorder import SCRUBBED_TOKEN
+from deta_discord_interactions.replay import load_recording, replay, replay_public_key
+
+
+@pytest.fixture()
+def app():
+    app = DiscordInteractions()
+
+    @app.command()
+    def ping(ctx):
+        return "Pong"
+
+    yield app
+    app.shutdown()
+
+
+@pytest.fixture()
+def recording(app, interaction, wsgi_request, tmp_path):
+    recorder = app.enable_recording(tmp_path / "interactions-{pid}.jsonl")
+    for i in range(5):
+        wsgi_request(app, body={**interaction("ping"), "token": f"secret-{i}"})
+    wsgi_request(app, "/not-recorded", {})
+    app.shutdown()
+    app.recorder = None
+    assert recorder.recorded_count == 5
+    return recorder.path
+
+
+def test_recorder(recording):
+    lines = [json.loads(line) for line in recording.read_text().splitlines()]
+    assert len(lines) == 5
+    assert "secret" not in recording.read_text()
+    for line in lines:
+        assert json.loads(line["body"])["token"] == SCRUBBED_TOKEN
+        assert line["headers"] == {"CONTENT_TYPE": "application/json"}
+        assert line["status"] == 200
+        assert line["duration_ms"] >= 0
+
+
+def test_recorder_query_string(app, interaction, wsgi_request, tmp_path):
+    recorder = app.enable_recording(tmp_path / "interactions.jsonl")
+    wsgi_request(app, "/discord?source=test", {**interaction("ping"), "token": "secret"})
+    app.shutdown()
+    assert recorder.recorded_count == 1
+    assert json.loads(recorder.path.read_text())["path"] == "/discord"
+
+
+def test_recorder_asgi(app, interaction, asgi_request, tmp_path):
+    recorder = app.enable_recording(tmp_path / "interactions.jsonl")
+    asgi_app = ASGIApp(app)
+    status, _, _ = asyncio.run(asgi_request(asgi_app, body={**interaction("ping"), "token": "secret"}))
+    asgi_app.shutdown()
+
+    assert status == 200
+    assert recorder.recorded_count == 1
+    line = json.loads(recorder.path.read_text())
+    assert line["status"] == 200
+    assert json.loads(line["body"])["token"] == SCRUBBED_TOKEN
+
+
+def test_replay_in_process(app, recording):
+    app.DONT_VALIDATE_SIGNATURE = False
+    app.discord_public_key = replay_public_key()
+
+    report = replay(app, load_recording(recording), concurrency=3, repeat=4)
+    assert report.count == 20
+    assert report.errors == 0
+    assert report.statuses == {200: 20}
+    assert app.signature_verifier.stats() == {**app.signature_verifier.stats(), "count": 20, "failures": 0}
+    assert report.percentile(50) <= report.percentile(99) <= report.percentile(100)
+    assert len(report.recorded_ms) == 20
+    assert "throughput" in report.format()
+
+
+def test_replay_over_http(app, recording):
+    server = get_server(app, 0, production=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        report = replay(f"http://127.0.0.1:{server.server_address[1]}", load_recording(recording), concurrency=2, rate=200)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert report.statuses == {200: 5}
+    # Paced at 200 requests per second
+    assert report.elapsed >= 4 / 200
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from deta_discord_interactions import DiscordInteractions, Context, Message
+from deta_discord_interactions.rest import AsyncRESTClient, RESTClient
+
+
+class FakeAPI(BaseHTTPRequestHandler):
+    "Answers with the queued status codes, then 200, over keep-alive connections"
+    protocol_version = "HTTP/1.1"
+    statuses: list
+    clients: set
+    requests: list
+
+    def handle_one_request(self):
+        type(self).clients.add(self.client_address)
+        super().handle_one_request()
+
+    def respond(self):
+        cls = type(self)
+        length = int(self.headers.get("Content-Length") or 0)
+        cls.requests.append((self.command, self.path, self.rfile.read(length)))
+        status = cls.statuses.pop(0) if cls.statuses else 200
+        data = {"id": "1", "path": self.path}
+        if status == 429:
+            data["retry_after"] = 0.01
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def api(allow_local_http):
+    handler = type("Handler", (FakeAPI,), {"statuses": [], "clients": set(), "requests": []})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/v10", handler
+    server.shutdown()
+    server.server_close()
+
+
+def test_reuses_connections(api):
+    base_url, handler = api
+    rest = RESTClient(base_url)
+    for _ in range(5):
+        response = rest.get("/users/@me")
+        assert response.json()["path"] == "/api/v10/users/@me"
+    assert len(handler.requests) == 5
+    assert len(handler.clients) == 1
+    rest.close()
+
+
+def test_retries_server_errors(api):
+    base_url, handler = api
+    sleeps = []
+    rest = RESTClient(base_url, backoff=0.5, sleep=sleeps.append)
+
+    handler.statuses = [503, 502]
+    assert rest.patch("/webhooks/1/token/messages/@original").status_code == 200
+    assert sleeps == [0.5, 1.0]
+    assert len(handler.requests) == 3
+
+    # POST requests may have been processed, so they are not retried
+    handler.statuses = [500]
+    assert rest.post("/webhooks/1/token").status_code == 500
+    assert len(handler.requests) == 4
+
+    handler.statuses = [500] * 10
+    assert rest.get("/users/@me").status_code == 500
+    assert len(handler.requests) == 4 + 1 + rest.max_retries
+
+
+class RecordingSession:
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        return type("Response", (), {"status_code": 200, "headers": {}})()
+
+
+class FailingSession:
+    "Fails to connect the first ``failures`` times"
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        import requests
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise requests.ConnectionError("Connection refused")
+        return type("Response", (), {"status_code": 200, "headers": {}})()
+
+
+def test_retries_connection_errors():
+    import requests
+    sleeps = []
+    rest = RESTClient("https://example.com/api", sleep=sleeps.append)
+    rest._session = FailingSession(2)
+    assert rest.get("/a").status_code == 200
+    assert rest._session.calls == 3
+    assert sleeps == [0.5, 1.0]
+
+    rest._session = FailingSession(10)
+    with pytest.raises(requests.ConnectionError):
+        rest.delete("/a")
+    assert rest._session.calls == 1 + rest.max_retries
+
+    # POST requests are not retried
+    rest._session = FailingSession(1)
+    with pytest.raises(requests.ConnectionError):
+        rest.post("/a")
+    assert rest._session.calls == 1
+
+
+def test_default_timeout():
+    rest = RESTClient("https://example.com/api/")
+    rest._session = RecordingSession()
+    rest.get("/a")
+    rest.get("https://example.com/b", timeout=1)
+    assert rest._session.calls == [
+        ("GET", "https://example.com/api/a", {"timeout": rest.timeout}),
+        ("GET", "https://example.com/b", {"timeout": 1}),
+    ]
+
+
+def test_context_uses_app_client(api):
+    base_url, handler = api
+    app = DiscordInteractions()
+    app.DONT_REGISTER_WITH_DISCORD = False
+    app.DISCORD_BASE_URL = base_url
+    context = Context(discord=app, token="abc")
+
+    assert context.send(Message("Hello")) == "1"
+    context.edit(Message("Edited"))
+    context.delete()
+
+    assert [(method, path) for method, path, _ in handler.requests] == [
+        ("POST", "/api/v10/webhooks/123/abc"),
+        ("PATCH", "/api/v10/webhooks/123/abc/messages/@original"),
+        ("DELETE", "/api/v10/webhooks/123/abc/messages/@original"),
+    ]
+    assert len(handler.clients) == 1
+    app.shutdown()
+
+
+def test_async_context_fans_out(api):
+    pytest.importorskip("httpx")
+    base_url, handler = api
+    app = DiscordInteractions()
+    app.DONT_REGISTER_WITH_DISCORD = False
+    app.DISCORD_BASE_URL = base_url
+    app.async_rest = AsyncRESTClient(base_url, rate_limiter=app.rate_limiter, max_connections=4)
+    context = Context(discord=app, token="abc")
+
+    async def main():
+        ids = await asyncio.gather(*(context.asend(f"Message {i}") for i in range(40)))
+        await context.aedit("Edited")
+        await context.adelete()
+        await app.aclose()
+        return ids
+
+    assert asyncio.run(main()) == ["1"] * 40
+    methods = [method for method, _, _ in handler.requests]
+    assert methods == ["POST"] * 40 + ["PATCH", "DELETE"]
+    assert 1 <= len(handler.clients) <= 4
+
+
+def test_async_retries(api):
+    pytest.importorskip("httpx")
+    base_url, handler = api
+    rest = AsyncRESTClient(base_url, backoff=0.01)
+
+    async def main():
+        handler.statuses = [429, 503]
+        response = await rest.get("/users/@me")
+        await rest.aclose()
+        return response
+
+    assert asyncio.run(main()).status_code == 200
+    assert len(handler.requests) == 3
+    assert rest.rate_limiter.rate_limited_count == 1
+
+
+def test_async_retries_connection_errors(allow_local_http, monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    # Nothing listens on this port once the socket is closed
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    rest = AsyncRESTClient(f"http://127.0.0.1:{port}", max_retries=2, backoff=0.01)
+    sleeps = []
+    sleep = asyncio.sleep
+
+    async def record_sleep(delay):
+        sleeps.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", record_sleep)
+
+    async def main():
+        try:
+            await rest.get("/users/@me")
+        finally:
+            await rest.aclose()
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(main())
+    assert sleeps == [0.01, 0.02]
+
+
+def test_async_client_in_several_loops(api):
+    pytest.importorskip("httpx")
+    base_url, handler = api
+    rest = AsyncRESTClient(base_url)
+
+    async def main():
+        return (await rest.get("/users/@me")).status_code
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(asyncio.run(main()))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [200] * 3
+    # Each event loop has its own connections
+    assert len(handler.clients) == 3
+
+
+def test_async_clients_released(api):
+    pytest.importorskip("httpx")
+    base_url, handler = api
+    rest = AsyncRESTClient(base_url)
+    clients = []
+
+    async def main():
+        response = await rest.get("/users/@me")
+        clients.append(rest.client)
+        return response.status_code
+
+    for _ in range(10):
+        thread = threading.Thread(target=lambda: asyncio.run(main()))
+        thread.start()
+        thread.join()
+        # Closed when asyncio.run shut the loop down
+        assert rest._clients == {}
+    assert all(client.is_closed for client in clients)
+
+    # Loops closed without shutting down their async generators are dropped on the next use
+    for _ in range(10):
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(rest.get("/users/@me"))
+        loop.close()
+    assert len(rest._clients) == 1
+    asyncio.run(main())
+    assert rest._clients == {}
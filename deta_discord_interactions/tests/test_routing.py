@@ -0,0 +1,128 @@
+import io
+
+import pytest
+
+from deta_discord_interactions import DiscordInteractions
+from deta_discord_interactions.routing import CustomIdPattern, CustomIdRouter, Router
+
+
+def handler(name):
+    def _handler(request, start_response, abort):
+        return name
+    return _handler
+
+
+def test_router():
+    router = Router()
+    home, user, posts, files, latest = (handler(name) for name in ("home", "user", "posts", "files", "latest"))
+    router.add("/", home)
+    router.add("/users/<int:user_id>", user, methods=["GET"])
+    router.add("/users/<int:user_id>/posts/<slug>", posts)
+    router.add("/users/latest", latest)
+    router.add("/files/<path:file_path>", files)
+
+    assert router.match("/") == (router.static_routes["/"], {})
+
+    route, params = router.match("/users/42")
+    assert route.get_handler("get") is user
+    assert route.get_handler("POST") is None
+    assert route.allowed_methods == ["GET"]
+    assert params == {"user_id": 42}
+
+    # Static segments take priority over parameters
+    route, params = router.match("/users/latest")
+    assert route.get_handler("GET") is latest
+    assert params == {}
+
+    route, params = router.match("/users/7/posts/hello-world")
+    assert route.get_handler("DELETE") is posts
+    assert params == {"user_id": 7, "slug": "hello-world"}
+
+    route, params = router.match("/files/a/b/c.txt")
+    assert route.get_handler("GET") is files
+    assert params == {"file_path": "a/b/c.txt"}
+
+    # Converters that do not accept the segment do not match
+    assert router.match("/users/abc") == (None, {})
+    assert router.match("/users/7/posts") == (None, {})
+    assert router.match("/nothing") == (None, {})
+
+    assert len(list(router)) == 5
+
+
+def test_router_backtracking():
+    router = Router()
+    static, dynamic = handler("static"), handler("dynamic")
+    router.add("/a/<x>/c", static)
+    router.add("/a/b/d", dynamic)
+
+    # `b` matches the static segment first, but only the parameter leads to `c`
+    route, params = router.match("/a/b/c")
+    assert route.get_handler("GET") is static
+    assert params == {"x": "b"}
+
+
+@pytest.mark.parametrize("path", ["no-slash", "/<bad-name>", "/<unknown:x>", "/<path:x>/after"])
+def test_router_invalid_paths(path):
+    with pytest.raises(ValueError):
+        Router().add(path, handler("invalid"))
+
+
+def request(app: DiscordInteractions, path: str, method: str = "GET"):
+    statuses = []
+    response = app(
+        {
+            "wsgi.input": io.BytesIO(b""),
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+        },
+        lambda status, headers: statuses.append((status, headers)),
+    )
+    status, headers = statuses[0]
+    return status, dict(headers), b"".join(response)
+
+
+def test_app_routes():
+    app = DiscordInteractions()
+
+    @app.route("/items/<int:item_id>", methods=["GET", "PUT"])
+    def item(request, start_response, abort):
+        start_response("200 OK", [])
+        return [f"Item {request['path_params']['item_id']}".encode()]
+
+    assert request(app, "/items/3") == ("200 OK", {}, b"Item 3")
+
+    status, headers, _ = request(app, "/items/3", method="DELETE")
+    assert status == "405 Method Not Allowed"
+    assert headers["Allow"] == "GET, PUT"
+
+    status, _, _ = request(app, "/items/three")
+    assert status == "404 Page not found"
+
+
+def test_custom_id_router():
+    router = CustomIdRouter()
+    router.add("page:{n:int}:{query}")
+    router.add("page:last:{query}")
+    router.add("poll:{poll_id}:{rest:path}")
+
+    assert router.match("page:2:cats") == ("page:{n:int}:{query}", {"n": 2, "query": "cats"})
+    assert router.match("page:last:cats") == ("page:last:{query}", {"query": "cats"})
+    assert router.match("poll:1:a:b") == ("poll:{poll_id}:{rest:path}", {"poll_id": "1", "rest": "a:b"})
+    assert router.match("page:first:cats") == (None, {})
+    assert router.match("page:2") == (None, {})
+
+    with pytest.raises(ValueError):
+        router.add("static")
+
+
+def test_custom_id_pattern_build():
+    pattern = CustomIdPattern("page:{n:int}:{query}")
+    assert pattern.build(n=2, query="cats") == "page:2:cats"
+    assert pattern.build(1, True, n=2, query="cats") == "page:2:cats\n1\nTrue"
+    with pytest.raises(ValueError):
+        pattern.build(n=2, query="a:b")
+    assert CustomIdPattern("poll:{rest:path}").build(rest="a:b") == "poll:a:b"
+    with pytest.raises(ValueError):
+        CustomIdPattern("poll:{rest:path}").build(rest="a\nb")
@@ -0,0 +1,99 @@
+import io
+import json
+import threading
+
+import pytest
+from nacl.signing import SigningKey
+
+from deta_discord_interactions import DiscordInteractions, InteractionType, ResponseType
+from deta_discord_interactions.signature import SignatureVerifier
+
+
+@pytest.fixture()
+def signing_key():
+    return SigningKey.generate()
+
+
+@pytest.fixture()
+def public_key(signing_key):
+    return signing_key.verify_key.encode().hex()
+
+
+def sign(signing_key, timestamp: str, body: bytes) -> str:
+    return signing_key.sign(timestamp.encode() + body).signature.hex()
+
+
+def test_verifier(signing_key, public_key):
+    verifier = SignatureVerifier(public_key)
+    body = b'{"type": 1}'
+
+    assert verifier.verify(sign(signing_key, "1000", body), "1000", body)
+    assert not verifier.verify(sign(signing_key, "1000", body), "1001", body)
+    assert not verifier.verify("not hex", "1000", body)
+    assert not verifier.verify("abcd", "1000", body)
+
+    stats = verifier.stats()
+    assert stats["count"] == 4
+    assert stats["failures"] == 3
+    assert stats["total_ns"] >= stats["last_ns"] > 0
+
+
+def test_verifier_threads(signing_key, public_key):
+    verifier = SignatureVerifier(public_key)
+    body = b'{"type": 1}'
+    signature = sign(signing_key, "1000", body)
+
+    def verify_many():
+        for i in range(200):
+            verifier.verify(signature, "1000" if i % 2 else "1001", body)
+
+    threads = [threading.Thread(target=verify_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = verifier.stats()
+    assert stats["count"] == 1600
+    assert stats["failures"] == 800
+
+
+def test_verifier_whitespace_fallback(signing_key, public_key):
+    verifier = SignatureVerifier(public_key)
+    signature = sign(signing_key, "1000", b'{"type":1}')
+
+    assert not verifier.verify(signature, "1000", b'{"type": 1}')
+    with pytest.warns(UserWarning):
+        assert verifier.verify(signature, "1000", b'{"type": 1}', {"type": 1})
+
+
+def test_signed_ping(signing_key, public_key):
+    app = DiscordInteractions()
+    app.discord_public_key = public_key
+    app.DONT_VALIDATE_SIGNATURE = False
+
+    body = json.dumps({"type": InteractionType.PING}).encode()
+
+    def request(signature):
+        statuses = []
+        response = app(
+            {
+                "wsgi.input": io.BytesIO(body),
+                "PATH_INFO": "/discord",
+                "QUERY_STRING": "",
+                "HTTP_X_SIGNATURE_ED25519": signature,
+                "HTTP_X_SIGNATURE_TIMESTAMP": "1000",
+            },
+            lambda status, headers: statuses.append(status),
+        )
+        return statuses[0], json.loads(response[0])
+
+    status, response = request(sign(signing_key, "1000", body))
+    assert status == "200 OK"
+    assert response["type"] == ResponseType.PONG
+
+    status, _ = request(sign(signing_key, "999", body))
+    assert status.startswith("401")
+
+    # The verifier (and its parsed key) is reused between requests
+    assert app.signature_verifier.verify_count == 2
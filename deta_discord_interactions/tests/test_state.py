@@ -0,0 +1,61 @@
+import enum
+
+import pytest
+
+from deta_discord_interactions import StateCodec
+from deta_discord_interactions.state import decode_int, encode_int
+
+
+class Sort(enum.Enum):
+    new = "new"
+    top = "top"
+    controversial = "controversial"
+
+
+SEARCH = StateCodec(page=int, sort=Sort, ascending=bool, hour=range(24), query=str)
+
+
+def test_integers():
+    for value in (0, 1, 63, 64, 10**18, 2**64):
+        assert decode_int(encode_int(value)) == value
+    # A snowflake fits in 11 characters instead of 19
+    assert len(encode_int(1234567890123456789)) == 11
+    with pytest.raises(ValueError):
+        encode_int(-1)
+
+
+def test_round_trip():
+    values = {"page": 1_000_000, "sort": Sort.controversial, "ascending": True, "hour": 23, "query": "a.b c"}
+    encoded = SEARCH.encode(**values)
+    assert SEARCH.decode(encoded) == values
+    # The enum, the bool and the hour share a single character
+    assert encoded.split(".", 1)[0] == encode_int(2 + 3 * (1 + 2 * 23))
+
+    values = {**values, "page": -5}
+    assert SEARCH.decode(SEARCH.encode(**values)) == values
+
+
+def test_str_fields():
+    codec = StateCodec(first=str, second=str, count=int)
+    values = {"first": "a", "second": "b.c", "count": 3}
+    assert codec.decode(codec.encode(**values)) == values
+    with pytest.raises(ValueError):
+        codec.encode(first="a.b", second="c", count=1)
+    # Newlines separate the lines of the custom ID
+    with pytest.raises(ValueError):
+        codec.encode(first="a", second="b\nc", count=1)
+
+
+@pytest.mark.parametrize("text", ["", "zz", "0.0", "_.0.0", "0.!.x"])
+def test_invalid(text):
+    with pytest.raises(ValueError):
+        StateCodec(sort=Sort, page=int, query=str).decode(text)
+
+
+def test_handler(discord, client):
+    @discord.custom_handler("search:{sort}")
+    def search(ctx, state: SEARCH, sort: Sort):
+        return f"{sort.value} {state['page']} {state['query']}"
+
+    custom_id = search.build(SEARCH.encode(page=3, sort=Sort.new, ascending=False, hour=0, query="cats"), sort="top")
+    assert client.run_handler(*custom_id.split("\n")).content == "top 3 cats"
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import pytest
+
+from deta_discord_interactions import (
+    ASGIApp,
+    DiscordInteractions,
+    timing,
+)
+
+
+@pytest.fixture()
+def app() -> DiscordInteractions:
+    app = DiscordInteractions()
+
+    @app.command()
+    def ping(ctx):
+        with timing.phase("custom"):
+            return "Pong!"
+
+    return app
+
+
+def test_server_timing_header(app, interaction, wsgi_request):
+    app.enable_timing(server_timing=True)
+
+    status, headers, content = wsgi_request(app, body=interaction("ping"))
+    assert status == "200 OK"
+    assert json.loads(content)["data"]["content"] == "Pong!"
+
+    metrics = [metric.split(";")[0] for metric in headers["Server-Timing"].split(", ")]
+    for name in ("parse", "context", "bind", "handler", "custom", "encode", "total"):
+        assert name in metrics
+
+
+def test_timing_observer(app, interaction, wsgi_request):
+    timers = []
+    app.add_timing_observer(timers.append)
+    assert app.timing_enabled
+
+    status, headers, _ = wsgi_request(app, body=interaction("ping"))
+    assert status == "200 OK"
+    assert "Server-Timing" not in headers
+
+    [timer] = timers
+    assert timer.path == "/discord"
+    assert timer.end_ns is not None
+    assert set(timer.phases) >= {"parse", "context", "bind", "handler", "encode"}
+    assert timer.total_ns >= sum(timer.phases.values()) - timer.phases["custom"]
+    assert timer.to_dict()["path"] == "/discord"
+    assert timing.current_timer() is None
+
+
+def test_timing_disabled(app, interaction, wsgi_request):
+    _, headers, _ = wsgi_request(app, body=interaction("ping"))
+    assert "Server-Timing" not in headers
+    assert timing.current_timer() is None
+    assert timing.phase("anything") is timing.phase("something else")
+
+
+def test_observer_errors_are_ignored(app, interaction, wsgi_request, capsys):
+
+    def broken(timer):
+        raise ValueError("Oops")
+
+    app.add_timing_observer(broken)
+    status, _, _ = wsgi_request(app, body=interaction("ping"))
+    assert status == "200 OK"
+    assert "ValueError" in capsys.readouterr().err
+
+
+def test_asgi_server_timing(app, interaction, asgi_request):
+    app.enable_timing(server_timing=True)
+    timers = []
+    app.add_timing_observer(timers.append)
+    asgi_app = ASGIApp(app)
+
+    _, headers, _ = asyncio.run(asgi_request(asgi_app, body=interaction("ping")))
+    asgi_app.shutdown()
+
+    assert "handler;dur=" in headers["Server-Timing"]
+    # Phases recorded in the executor threads reach the same timer
+    assert "custom" in timers[0].phases
@@ -0,0 +1,104 @@
+import threading
+import time
+
+from deta_discord_interactions import DiscordInteractions
+from deta_discord_interactions.tokens import FileTokenStore, StoredToken, token_key
+from deta_discord_interactions.utils.database import Database
+
+
+def make_app(fetched: list) -> DiscordInteractions:
+    "Creates an app whose fetch_token records its calls"
+    app = DiscordInteractions()
+    app.DONT_REGISTER_WITH_DISCORD = False
+
+    def fetch_token():
+        time.sleep(0.05)
+        fetched.append(app)
+        return {
+            "access_token": f"token-{len(fetched)}",
+            "token_type": "Bearer",
+            "scope": app.discord_scope,
+            "expires_in": 600,
+            "expires_on": time.time() + 300,
+        }
+
+    app.fetch_token = fetch_token
+    return app
+
+
+def test_single_flight():
+    fetched = []
+    app = make_app(fetched)
+    headers = []
+    threads = [threading.Thread(target=lambda: headers.append(app.auth_headers())) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fetched) == 1
+    assert headers == [{"Authorization": "Bearer token-1"}] * 10
+
+    app.discord_token["expires_on"] = time.time() - 1
+    assert app.auth_headers() == {"Authorization": "Bearer token-2"}
+
+
+def test_file_store(tmp_path):
+    fetched = []
+    first = make_app(fetched)
+    first.token_store = tmp_path / "token.json"
+    assert isinstance(first.token_store, FileTokenStore)
+    first.auth_headers()
+
+    # Another worker reuses the token instead of fetching its own
+    second = make_app(fetched)
+    second.token_store = tmp_path / "token.json"
+    assert second.auth_headers() == {"Authorization": "Bearer token-1"}
+    assert fetched == [first]
+
+    # Unless it expired
+    key = token_key(second.discord_client_id, second.discord_scope)
+    stored = second.token_store.get(key)
+    stored.expires_on = time.time() - 1
+    second.token_store.put(key, stored)
+    third = make_app(fetched)
+    third.token_store = tmp_path / "token.json"
+    assert third.auth_headers() == {"Authorization": "Bearer token-2"}
+    assert third.token_store.get(key).access_token == "token-2"
+
+
+def test_file_store_concurrent_writers(tmp_path):
+    # Separate stores do not share a lock, like the workers of a pre-forked server
+    path = tmp_path / "token.json"
+    stores = [FileTokenStore(path) for _ in range(8)]
+    errors = []
+
+    def refresh(i):
+        try:
+            for j in range(25):
+                stores[i].put("key", StoredToken(f"token-{i}-{j}", "Bearer", "scope", time.time() + 60))
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=refresh, args=(i,)) for i in range(len(stores))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert FileTokenStore(path).get("key").access_token.startswith("token-")
+    assert [file.name for file in tmp_path.iterdir()] == ["token.json"]
+    assert path.stat().st_mode & 0o777 == 0o600
+
+
+def test_database_store():
+    store = Database("_test_discord_interactions_tokens", record_type=StoredToken)
+    fetched = []
+    first = make_app(fetched)
+    first.token_store = store
+    second = make_app(fetched)
+    second.token_store = store
+
+    assert first.auth_headers() == second.auth_headers()
+    assert len(fetched) == 1
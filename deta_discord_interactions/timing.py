@@ -0,0 +1,204 @@
+"""Per-phase timing of the requests handled by :class:`DiscordInteractions`.
+
+While timing is enabled (see :meth:`DiscordInteractions.enable_timing`), each
+request gets a :class:`RequestTimer`, and the library records how long each of
+its phases took:
+
+- ``parse``: reading and decoding the body
+- ``verify``: verifying the signature
+- ``context``: building the :class:`Context`
+- ``bind``: converting the options or custom ID state into arguments
+- ``handler``: running the command or handler
+- ``encode``: encoding the response
+
+When disabled, :func:`phase` returns a shared no-op context manager,
+so the instrumentation only costs a context variable lookup.
+
+Example usage:
+    app.enable_timing(server_timing=True)
+    app.add_timing_observer(lambda timer: print(timer.path, timer.phases))
+
+    # Timing custom code:
+    with timing.phase("database"):
+        ...
+"""
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+
+from deta_discord_interactions.models.option import CommandOptionType
+
+
+INTERACTION_TYPE_NAMES = {
+    1: "ping",
+    2: "application_command",
+    3: "message_component",
+    4: "application_command_autocomplete",
+    5: "modal_submit",
+}
+
+_SUBCOMMAND_TYPES = (CommandOptionType.SUB_COMMAND, CommandOptionType.SUB_COMMAND_GROUP)
+
+
+def interaction_labels(data: dict, handler_id: Optional[str] = None) -> tuple[str, str]:
+    """
+    Returns the interaction type and name that requests are grouped by.
+
+    The name is the command name followed by its subcommand group and subcommand, if any,
+    or for message components and modals the custom ID or pattern of the handler
+    (``handler_id``), falling back to the custom ID primary ID if it was not matched.
+    """
+    interaction_type = data.get("type")
+    type_name = INTERACTION_TYPE_NAMES.get(interaction_type, str(interaction_type))
+    interaction_data = data.get("data") or {}
+    if "custom_id" in interaction_data:
+        if handler_id is not None:
+            return type_name, handler_id
+        return type_name, interaction_data["custom_id"].split("\n", 1)[0]
+    if "name" not in interaction_data:
+        return type_name, ""
+    path = [interaction_data["name"]]
+    options = interaction_data.get("options") or []
+    while options and options[0].get("type") in _SUBCOMMAND_TYPES:
+        path.append(options[0]["name"])
+        options = options[0].get("options") or []
+    return type_name, " ".join(path)
+
+
+class RequestTimer:
+    """
+    The phases recorded while handling one request.
+
+    Attributes
+    ----------
+    path: str
+        The path of the request.
+    start_ns: int
+        When the request started, from :func:`time.perf_counter_ns`.
+    end_ns: int, optional
+        When the request finished, if it did.
+    phases: dict[str, int]
+        Total nanoseconds spent in each phase, in the order they first ran.
+    interaction: dict, optional
+        The interaction data, once its signature has been verified.
+        None for requests that are not interactions.
+    handler_id: str, optional
+        The custom ID or pattern of the handler the interaction was routed to, if any.
+    outcome: str
+        ``"ok"``, ``"abort"`` if the request was aborted with an HTTP error,
+        or ``"exception"`` if it raised an unexpected exception.
+    """
+    __slots__ = ("path", "start_ns", "end_ns", "phases", "interaction", "handler_id", "outcome")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        self.phases: dict[str, int] = {}
+        self.interaction: Optional[dict] = None
+        self.handler_id: Optional[str] = None
+        self.outcome = "ok"
+
+    def add(self, name: str, duration_ns: int):
+        "Adds ``duration_ns`` to the ``name`` phase"
+        self.phases[name] = self.phases.get(name, 0) + duration_ns
+
+    def finish(self):
+        self.end_ns = time.perf_counter_ns()
+
+    @property
+    def total_ns(self) -> int:
+        "Nanoseconds from the start of the request until it finished (or until now)"
+        return (self.end_ns or time.perf_counter_ns()) - self.start_ns
+
+    def server_timing(self) -> str:
+        "Formats the phases recorded so far as a ``Server-Timing`` header value"
+        metrics = [f"{name};dur={duration / 1e6:.3f}" for name, duration in self.phases.items()]
+        metrics.append(f"total;dur={self.total_ns / 1e6:.3f}")
+        return ", ".join(metrics)
+
+    def to_dict(self) -> dict:
+        "Returns the phases and the total, in milliseconds"
+        return {
+            "path": self.path,
+            "phases": {name: duration / 1e6 for name, duration in self.phases.items()},
+            "total": self.total_ns / 1e6,
+        }
+
+    def __repr__(self) -> str:
+        return f"<RequestTimer {self.path!r} {self.server_timing()}>"
+
+
+class _Phase:
+    __slots__ = ("timer", "name", "start_ns")
+
+    def __init__(self, timer: RequestTimer, name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer.add(self.name, time.perf_counter_ns() - self.start_ns)
+
+
+class _NoopPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NOOP_PHASE = _NoopPhase()
+_current_timer: ContextVar[Optional[RequestTimer]] = ContextVar("discord_interactions_timer", default=None)
+
+
+def phase(name: str):
+    """
+    Context manager recording the time spent inside it as the ``name`` phase
+    of the current request. Does nothing if timing is disabled.
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        return _NOOP_PHASE
+    return _Phase(timer, name)
+
+
+def current_timer() -> Optional[RequestTimer]:
+    "Returns the timer for the request being handled, if timing is enabled"
+    return _current_timer.get()
+
+
+def set_interaction(data: dict):
+    "Records which interaction the current request is handling, if timing is enabled"
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.interaction = data
+
+
+def set_handler_id(handler_id: str):
+    "Records which custom ID handler the current request was routed to, if timing is enabled"
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.handler_id = handler_id
+
+
+def set_outcome(outcome: str):
+    "Records the outcome of the current request, if timing is enabled"
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.outcome = outcome
+
+
+def activate(timer: RequestTimer) -> Token:
+    "Makes ``timer`` the current timer. Pass the returned token to :func:`deactivate`"
+    return _current_timer.set(timer)
+
+
+def deactivate(token: Token):
+    _current_timer.reset(token)
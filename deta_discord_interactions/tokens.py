@@ -0,0 +1,90 @@
+"""Shares the application's OAuth2 token between worker processes.
+
+:meth:`DiscordInteractions.auth_headers` fetches a client credentials token
+from Discord when it has none or when it expired. Within a process, only one
+thread fetches it while the others wait for it. With a :attr:`token_store`,
+the token is also saved there, so that other workers (or the next run of the
+app) use it for as long as it is valid instead of fetching their own.
+
+The token grants access to the application's commands, so keep the store private.
+
+Example usage:
+    app.token_store = "discord_token.json"
+
+    # or, to share it between machines using a Deta Base
+    from deta_discord_interactions.utils.database import Database
+    app.token_store = Database("_discord_interactions_tokens", record_type=StoredToken)
+"""
+import dataclasses
+import os
+import time
+from typing import Optional, Protocol
+
+from deta_discord_interactions.models.utils import LoadableDataclass
+from deta_discord_interactions.registration import FileRegistrationCache
+
+
+@dataclasses.dataclass
+class StoredToken(LoadableDataclass):
+    """
+    A client credentials token fetched from Discord.
+
+    Attributes
+    ----------
+    access_token: str
+        The token itself.
+    token_type: str
+        Always ``"Bearer"``.
+    scope: str
+        The scopes it was granted.
+    expires_on: float
+        When it should be renewed, as a :func:`time.time` timestamp.
+    """
+    access_token: str
+    token_type: str
+    scope: str
+    expires_on: float
+
+    @classmethod
+    def from_token(cls, token: dict) -> "StoredToken":
+        "Creates a StoredToken from the dictionary returned by :meth:`DiscordInteractions.fetch_token`"
+        return cls(token["access_token"], token["token_type"], token["scope"], token["expires_on"])
+
+    def to_token(self) -> dict:
+        "Converts it back to the format used by ``DiscordInteractions.discord_token``"
+        return self.to_dict()
+
+    @property
+    def valid(self) -> bool:
+        return time.time() <= self.expires_on
+
+
+class TokenStore(Protocol):
+    "Where the token is stored. A :class:`Database` of :class:`StoredToken` works too."
+    def get(self, key: str) -> Optional[StoredToken]: ...
+    def put(self, key: str, data: StoredToken) -> None: ...
+
+
+class FileTokenStore(FileRegistrationCache):
+    """
+    Stores the token in a local JSON file, for the workers running on the same machine.
+
+    Parameters
+    ----------
+    path: str | Path
+        The file to use. Created when first written to, readable only by its owner.
+    """
+    record_type = StoredToken
+    file_mode = 0o600
+
+
+def open_store(store) -> TokenStore:
+    "Returns a :class:`FileTokenStore` for paths, or ``store`` itself otherwise"
+    if isinstance(store, (str, os.PathLike)):
+        return FileTokenStore(store)
+    return store
+
+
+def token_key(application_id: str, scope: str) -> str:
+    "The key the token of an application is stored under"
+    return f"{application_id}-{scope.replace(' ', '+')}"
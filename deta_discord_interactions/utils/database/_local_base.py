@@ -1,9 +1,9 @@
 import functools
-import json
 import pathlib
 from typing import Callable, Optional
 
-from deta.base import Util
+
+from deta_discord_interactions import codec
 
 from deta_discord_interactions.utils.database.bound_meta import BoundMeta
 
@@ -68,7 +68,7 @@ class Base:
     def get(self, key):
         obj = self.inventory.get(key)
         if obj:
-            obj = json.loads(obj)
+            obj = codec.loads(obj)
         return obj
 
     def insert(self, data, key, *, expire_in: None=None, expire_at: None=None):
@@ -79,13 +79,15 @@ class Base:
 
         if key in self.inventory:
             raise Exception(f"Item with key '{key}' already exists")
-        self.inventory[key] = json.dumps(data)
+        self.inventory[key] = codec.dumps_str(data)
 
     def update(self, updates, key):
+        from deta.base import Util
+
         if key not in self.inventory:
             raise Exception(f"Key '{key}' not found")
 
-        obj = json.loads(self.inventory[key])
+        obj = codec.loads(self.inventory[key])
 
         for attribute, value in updates.items():
             if isinstance(value, Util.Trim):
@@ -101,13 +103,13 @@ class Base:
             else:
                 obj[attribute] = value
         
-        self.inventory[key] = json.dumps(obj)
+        self.inventory[key] = codec.dumps_str(obj)
 
     def delete(self, key):
         del self.inventory[key]
 
     def put_many(self, items):
-        items = {record.pop('key'): json.dumps(record) for record in (item.copy() for item in items)}
+        items = {record.pop('key'): codec.dumps_str(record) for record in (item.copy() for item in items)}
         self.inventory.update(items)
 
     def put(self, item, key, *, expire_in: None=None, expire_at: None=None):
@@ -115,13 +117,13 @@ class Base:
             print(f"Ignoring parameter (not supported by local base): {expire_in=}")
         if expire_at:
             print(f"Ignoring parameter (not supported by local base): {expire_at=}")
-        self.inventory[key] = json.dumps(item)
+        self.inventory[key] = codec.dumps_str(item)
 
     def fetch(self, query, limit, last):
         results = []
         match_condition = parse_filters(query)
         for key, value in self.inventory.items():
-            obj = json.loads(value)
+            obj = codec.loads(value)
             obj["key"] = key
             if match_condition(obj):
                 results.append(obj)
@@ -154,23 +156,12 @@ class DiskBaseBackend(dict, metaclass=BoundMeta, bind_methods=bind_methods):
             raise Exception("When using a Database on DISK mode, you must specify the path."\
                 "\nUsing the `disk_base_path` keyword argument or the `DETA_ORM_FOLDER` environment variable.")
         try:
-            with self._path.open('r') as file:
-                super().__init__(json.load(file))
+            super().__init__(codec.loads(self._path.read_bytes()))
         except Exception:
             super().__init__()
-        if os.getenv("DETA_ORM_FORMAT_NICELY", False):
-            self._options = {
-                "indent": 4,
-                "sort_keys": True,
-            }
-        else:
-            self._options = {
-                "indent": None,
-                "separators": (',', ':'),
-            }
+        self._pretty = bool(os.getenv("DETA_ORM_FORMAT_NICELY", False))
 
 
     def _sync(self, method, value, *args, **kwargs):
-        with self._path.open('w') as file:
-            json.dump(dict(self), file, **self._options)
+        self._path.write_bytes(codec.dumps(dict(self), pretty=self._pretty))
         return value
@@ -6,8 +6,6 @@ from collections.abc import MutableMapping
 from datetime import datetime
 import inspect
 
-from deta import Base
-
 from deta_discord_interactions.models.utils import LoadableDataclass
 from deta_discord_interactions.utils.database.exceptions import KeyNotFound, UnexpectedEscapeString, UnexpectedFunction
 from deta_discord_interactions.utils.database.query import Query
@@ -44,20 +42,34 @@ class Database(MutableMapping[str, Record]):
         base_folder : str
             If using `base_mode = "DISK"`, you can use this to specify where the database should be stored.
             If missing, expects for the `DETA_ORM_FOLDER` environment variable to be set.
+
+        The underlying Base is only created (and the `deta` SDK imported) when first used,
+        so that creating a Database at the top of a module costs nothing at import time.
         """
         if base_mode is None:
             base_mode = os.getenv("DETA_ORM_DATABASE_MODE", "DETA")
-        if base_mode.startswith("DETA"):
-            self.__base = Base(name)
-        elif base_mode == "MEMORY":
-            self.__base = LocalBase(name, sync_disk=False)
-        elif base_mode == "DISK":
-            self.__base = LocalBase(name, sync_disk=True, folder=base_folder)
-        else:
+        if not base_mode.startswith("DETA") and base_mode not in {"MEMORY", "DISK"}:
             raise Exception("Invalid value for DETA_ORM_DATABASE_MODE")
 
+        self._name = name
+        self._base_mode = base_mode
+        self._base_folder = base_folder
+        self.__backend = None
         self._record_type = record_type
         self.__known_functions = {}
+
+    @property
+    def __base(self):
+        "The Deta Base or local Base storing the records, created on first use"
+        if self.__backend is None:
+            if self._base_mode.startswith("DETA"):
+                from deta import Base
+                self.__backend = Base(self._name)
+            elif self._base_mode == "MEMORY":
+                self.__backend = LocalBase(self._name, sync_disk=False)
+            else:
+                self.__backend = LocalBase(self._name, sync_disk=True, folder=self._base_folder)
+        return self.__backend
     
     def remember_function(self, function: Callable):
         """Use as a decorator to be able to save/load a function reference in LoadableDataclasses."""
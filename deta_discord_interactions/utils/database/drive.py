@@ -2,12 +2,15 @@ import os
 import typing
 from typing import Literal, Optional, Union
 
-from deta import _Drive as DetaDrive, Drive as get_drive
 from deta_discord_interactions.utils.database._local_drive import Drive as LocalDrive
 from deta_discord_interactions.utils.database.exceptions import DriveOutOfBoundsError
 
+if typing.TYPE_CHECKING:
+    from deta import _Drive as DetaDrive
+
+
 class DrivePath:
-    def __init__(self, path: str, *, drive: Union[DetaDrive, LocalDrive, None] = None):
+    def __init__(self, path: str, *, drive: Union['DetaDrive', LocalDrive, None] = None):
         assert '//' not in path, "Paths cannot contain `//`"
         assert '..' not in path, "Paths cannot contain `..`"
         assert './' not in path, "Paths cannot contain `./`"
@@ -97,7 +100,7 @@ class DrivePath:
         return self._path.replace('/', "_DIR_").removeprefix("_DIR_")
 
     @classmethod
-    def from_deta_path(cls, path: str, *, drive: Union[DetaDrive, LocalDrive, None] = None) -> 'DrivePath':
+    def from_deta_path(cls, path: str, *, drive: Union['DetaDrive', LocalDrive, None] = None) -> 'DrivePath':
         return DrivePath('/' + path.replace('_DIR_', '/').removeprefix('/'), drive=drive)
 
     @property
@@ -333,16 +336,31 @@ class Drive(DrivePath):
         drive_folder : str
             If using `drive_mode = "DISK"`, you can use this to specify where the files should be stored.
             If missing, expects for the `DETA_ORM_FOLDER` environment variable to be set.
+
+        The underlying drive is only created (and the `deta` SDK imported) when first used.
         """
         if drive_mode is None:
             drive_mode = os.getenv("DETA_ORM_DATABASE_MODE", "DETA")
-        if drive_mode.startswith("DETA"):
-            drive = get_drive(name)
-        elif drive_mode == "MEMORY":
-            drive = LocalDrive(name, sync_disk=False)
-        elif drive_mode == "DISK":
-            drive = LocalDrive(name, sync_disk=True, folder=drive_folder)
-        else:
+        if not drive_mode.startswith("DETA") and drive_mode not in {"MEMORY", "DISK"}:
             raise Exception("Invalid value for DETA_ORM_DATABASE_MODE")
 
-        super().__init__('/', drive=drive)
+        self._name = name
+        self._drive_mode = drive_mode
+        self._drive_folder = drive_folder
+        super().__init__('/', drive=None)
+
+    @property
+    def _drive(self) -> Union['DetaDrive', LocalDrive]:
+        if self.__drive is None:
+            if self._drive_mode.startswith("DETA"):
+                from deta import Drive as get_drive
+                self.__drive = get_drive(self._name)
+            elif self._drive_mode == "MEMORY":
+                self.__drive = LocalDrive(self._name, sync_disk=False)
+            else:
+                self.__drive = LocalDrive(self._name, sync_disk=True, folder=self._drive_folder)
+        return self.__drive
+
+    @_drive.setter
+    def _drive(self, drive: Union['DetaDrive', LocalDrive, None]):
+        self.__drive = drive
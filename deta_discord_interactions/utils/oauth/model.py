@@ -3,12 +3,12 @@ import datetime
 from typing import Callable, Optional
 from dataclasses import dataclass
 
-import requests
 from deta_discord_interactions.models.user import User
 from deta_discord_interactions.models.message import Message
 
 from deta_discord_interactions.models.utils import LoadableDataclass
 from deta_discord_interactions.context import Context
+from deta_discord_interactions.rest import default_async_client, default_client
 
 
 @dataclass
@@ -52,8 +52,8 @@ class OAuthToken(LoadableDataclass):
     def from_client_credentials(cls, scope: str = "identify connections"):
         "Generate an OAuth Access Token from the environment variables client credentials"
         # https://discord.com/developers/docs/topics/oauth2#client-credentials-grant
-        response = requests.post(
-            'https://discord.com/api/v10/oauth2/token',
+        response = default_client().post(
+            '/oauth2/token',
             data={
                 'grant_type': 'client_credentials',
                 'scope': scope,
@@ -76,7 +76,7 @@ class OAuthToken(LoadableDataclass):
         headers = {
             "Authorization": f"Bearer {self.access_token}"
         }
-        response = requests.get('https://discord.com/api/v10/oauth2/@me', headers=headers)
+        response = default_client().get('/oauth2/@me', headers=headers)
         response.raise_for_status()
         return OAuthInfo.from_dict(response.json())
 
@@ -85,13 +85,13 @@ class OAuthToken(LoadableDataclass):
         headers = {
             "Authorization": f"Bearer {self.access_token}"
         }
-        response = requests.get('https://discord.com/api/v10/users/@me', headers=headers)
+        response = default_client().get('/users/@me', headers=headers)
         response.raise_for_status()
         return User.from_dict(response.json())
 
     def revoke(self) -> None:
-        response = requests.post(
-            "https://discord.com/api/oauth2/token/revoke",
+        response = default_client().post(
+            "/oauth2/token/revoke",
             data={"token": self.access_token},
             auth=(os.getenv("DISCORD_CLIENT_ID"), os.getenv("DISCORD_CLIENT_SECRET"))
         )
@@ -169,6 +169,38 @@ class Webhook(LoadableDataclass):
             If `wait_for_response` is set to True, returns the Message.
             Otherwise returns None
         """
+        encoded, mimetype, params = self._encode_send(message, wait_for_response, username, avatar_url)
+        response = default_client().post(
+            self.url,
+            data=encoded,
+            headers={"Content-Type": mimetype},
+            params=params,
+        )
+        response.raise_for_status()
+        if wait_for_response:
+            return Message.from_dict(response.json())
+
+    async def asend(
+        self,
+        message: Message,
+        *,
+        wait_for_response: bool = False,
+        username: str = None,
+        avatar_url: str = None,
+    ) -> Optional[Message]:
+        "Async counterpart of :meth:`send`. Requires httpx."
+        encoded, mimetype, params = self._encode_send(message, wait_for_response, username, avatar_url)
+        response = await default_async_client().post(
+            self.url,
+            content=encoded,
+            headers={"Content-Type": mimetype},
+            params=params,
+        )
+        response.raise_for_status()
+        if wait_for_response:
+            return Message.from_dict(response.json())
+
+    def _encode_send(self, message, wait_for_response: bool, username: Optional[str], avatar_url: Optional[str]):
         message = Message.from_return_value(message)
 
         encode_kwargs = {}
@@ -180,20 +212,11 @@ class Webhook(LoadableDataclass):
         wait_param = 'true' if wait_for_response else 'false'
 
         encoded, mimetype = message.encode(followup=True, **encode_kwargs)
-
-        response = requests.post(
-            self.url,
-            data=encoded,
-            headers={"Content-Type": mimetype},
-            params={"wait": wait_param}
-        )
-        response.raise_for_status()
-        if wait_for_response:
-            return Message.from_dict(response.json())
+        return encoded, mimetype, {"wait": wait_param}
 
     def get(self) -> 'Webhook':
         "Returns the updated Discord data for this Webhook"
-        response = requests.get(self.url)
+        response = default_client().get(self.url)
         response.raise_for_status()
         return Webhook.from_dict(response.json())
 
@@ -221,7 +244,7 @@ class Webhook(LoadableDataclass):
             data["name"] = name
         if reason is not None:
             headers["X-Audit-Log-Reason"] = reason
-        response = requests.patch(
+        response = default_client().patch(
             self.url,
             headers=headers,
             json=data,
@@ -242,7 +265,7 @@ class Webhook(LoadableDataclass):
         headers = {}
         if reason is not None:
             headers["X-Audit-Log-Reason"] = reason
-        response = requests.delete(
+        response = default_client().delete(
             self.url,
             headers=headers,
         )
@@ -253,7 +276,7 @@ class Webhook(LoadableDataclass):
 
     def get_message(self, message_id: str) -> Message:
         "Returns a message previously sent through this Webhook"
-        response = requests.get(
+        response = default_client().get(
             self.message_url(message_id),
         )
         response.raise_for_status()
@@ -261,7 +284,14 @@ class Webhook(LoadableDataclass):
 
     def delete_message(self, message_id: str) -> None:
         "Deletes a message previously sent through this Webhook"
-        response = requests.delete(
+        response = default_client().delete(
+            self.message_url(message_id),
+        )
+        response.raise_for_status()
+
+    async def adelete_message(self, message_id: str) -> None:
+        "Async counterpart of :meth:`delete_message`. Requires httpx."
+        response = await default_async_client().delete(
             self.message_url(message_id),
         )
         response.raise_for_status()
@@ -282,11 +312,28 @@ class Webhook(LoadableDataclass):
         if message_id is None:
             raise ValueError("You must provide a message with an ID or a message_id")
 
-        encoded, _ = message.encode(followup=True)
+        encoded, mimetype = message.encode(followup=True)
 
-        response = requests.patch(
+        response = default_client().patch(
             self.message_url(message_id),
             data=encoded,
+            headers={"Content-Type": mimetype},
+        )
+        response.raise_for_status()
+        return Message.from_dict(response.json())
+
+    async def aedit_message(self, message: Message, *, message_id: str = None) -> Message:
+        "Async counterpart of :meth:`edit_message`. Requires httpx."
+        message_id = message_id or message.id
+        if message_id is None:
+            raise ValueError("You must provide a message with an ID or a message_id")
+
+        encoded, mimetype = message.encode(followup=True)
+
+        response = await default_async_client().patch(
+            self.message_url(message_id),
+            content=encoded,
+            headers={"Content-Type": mimetype},
         )
         response.raise_for_status()
         return Message.from_dict(response.json())
@@ -5,13 +5,13 @@ from typing import Callable, NoReturn, Optional, Protocol
 from urllib.parse import quote, unquote
 from dataclasses import dataclass
 
-import requests
 from deta_discord_interactions.models.component import ActionRow, Button, ButtonStyles
 
 from deta_discord_interactions.models.message import Message
 
 from deta_discord_interactions.discord import DiscordInteractions
 from deta_discord_interactions.context import Context
+from deta_discord_interactions.rest import default_client
 
 from deta_discord_interactions.utils.database import Database, LoadableDataclass
 from deta_discord_interactions.utils.oauth.model import OAuthToken, PendingOAuth
@@ -233,7 +233,7 @@ def _handle_oauth(
             headers = {
                 'Content-Type': 'application/x-www-form-urlencoded'
             }
-            response = requests.post(url, data=data, headers=headers)
+            response = default_client().post(url, data=data, headers=headers)
             response.raise_for_status()
             result = response.json()
 